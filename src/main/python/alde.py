@@ -21,6 +21,10 @@ import flask_restless
 import slurm
 import logging
 import executor
+import metrics
+import polling
+import simulator
+import snapshot
 from flask_apscheduler import APScheduler
 from flask import current_app as current
 from models import db, Application, ExecutionConfiguration, Testbed, Node, Memory, CPU, MCP, GPU, Deployment, Executable, Execution
@@ -40,39 +44,55 @@ class Config(object):
 
     JOBS = [
         {
-            'id': 'check_nodes_in_db_for_on_line_testbeds',
-            'func': 'slurm:check_nodes_in_db_for_on_line_testbeds',
-            'args': (),
+            'id': 'update_testbed_snapshots',
+            'func': 'polling:run',
+            'args': ('update_testbed_snapshots',),
             'trigger': 'interval',
-            'seconds': 60 
+            'seconds': polling.TICK_SECONDS,
+            'max_instances': 1,
+            'coalesce': True
         },
         {
-            'id': 'update_node_info',
-            'func': 'slurm:update_node_information',
+            'id': 'check_not_compiled_apps',
+            'func': 'compilation.compiler:compile_executables',
             'args': (),
             'trigger': 'interval',
-            'seconds': 70 
+            'seconds': 31 
         },
         {
-            'id': 'update_cpu_node_info',
-            'func': 'slurm:update_cpu_node_information',
-            'args': (),
+            'id': 'check_running_app_status',
+            'func': 'polling:run',
+            'args': ('check_running_app_status',),
             'trigger': 'interval',
-            'seconds': 80 
+            'seconds': polling.TICK_SECONDS,
+            'max_instances': 1,
+            'coalesce': True
         },
         {
-            'id': 'check_not_compiled_apps',
-            'func': 'compilation.compiler:compile_executables',
+            'id': 'maintain_ssh_connection_pool',
+            'func': 'shell:maintain_connection_pool',
             'args': (),
             'trigger': 'interval',
-            'seconds': 31 
+            'seconds': 60
+        },
+    ]
+
+    # Jobs whose interval is adapted to the changes of each testbed, the
+    # scheduler only ticks them. seconds is the interval of a new testbed.
+    POLLING_JOBS = [
+        {
+            'id': 'update_testbed_snapshots',
+            'func': 'snapshot:poll',
+            'seconds': 60,
+            'min_seconds': 15,
+            'max_seconds': 300
         },
         {
             'id': 'check_running_app_status',
             'func': 'executor:monitor_execution_apps',
-            'args': (),
-            'trigger': 'interval',
-            'seconds': 20 
+            'seconds': 20,
+            'min_seconds': 5,
+            'max_seconds': 120
         },
     ]
 
@@ -166,6 +186,15 @@ def post_testbed_preprocessor(data=None, **kw):
                                             description=create['reason'],
                                             code=405)
 
+def post_testbed_postprocessor(result=None):
+    """
+    It starts the simulated cluster of a SIMULATED testbed
+    """
+
+    testbed = db.session.query(Testbed).filter_by(id=result['id']).first()
+
+    simulator.register_testbed(testbed)
+
 def patch_execution_script_preprocessor(instance_id=None, data=None, **kw):
     """
     It is going to start the execution of an application in the selected testbed
@@ -387,6 +416,9 @@ def create_app_v1(sql_db_url,
                             'PATCH_SINGLE': [put_testbed_preprocessor],
                             'PUT_SINGLE': [put_testbed_preprocessor]
                             },
+                       postprocessors={
+                            'POST': [post_testbed_postprocessor]
+                       },
                        url_prefix=url_prefix_v1, results_per_page=-1)
 
     # Create teh REST methods for a Node
@@ -417,6 +449,16 @@ def create_app_v1(sql_db_url,
                        methods=['GET', 'POST', 'PUT', 'DELETE'],
                        url_prefix=url_prefix_v1, results_per_page=-1)
 
+    # Register the metrics of the shell commands
+    app.register_blueprint(metrics.metrics_blueprint, url_prefix=url_prefix_v1 + '/metrics')
+
+    # Register the latest snapshots of the testbeds
+    app.register_blueprint(snapshot.snapshot_blueprint, url_prefix=url_prefix_v1 + '/snapshots')
+
+    # Register the adaptive intervals of the polling jobs
+    polling.configure(app.config['POLLING_JOBS'])
+    app.register_blueprint(polling.polling_blueprint, url_prefix=url_prefix_v1 + '/polling')
+
     # Create the scheduler of tasks
     scheduler = APScheduler()
     # it is also possible to enable the API directly
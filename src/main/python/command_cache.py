@@ -0,0 +1,191 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Module that caches the results of read-only SLURM commands so they can be
+# shared between the different scheduler jobs
+#
+
+import collections
+import threading
+import time
+
+MAX_ENTRIES = 1024
+DEFAULT_TTL = 10
+
+# Seconds a result is valid for each command, 0 disables the cache
+COMMAND_TTLS = {
+    'sinfo': 30,
+    'scontrol': 30,
+    'sacct': 15
+}
+
+class TTLCache():
+    """
+    Cache of command results indexed by (endpoint, command, args).
+    Each entry expires after the TTL of its command and, when the cache
+    is full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttls=COMMAND_TTLS, default_ttl=DEFAULT_TTL, clock=time.monotonic):
+        """Initializes an empty cache"""
+
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def _key(self, endpoint, command, args):
+        """
+        It builds the key of an entry
+        """
+
+        return (endpoint or '', command, tuple(str(arg) for arg in args))
+
+    def ttl(self, command):
+        """
+        It returns the number of seconds the results of a command are valid
+        """
+
+        return self.ttls.get(command, self.default_ttl)
+
+    def get(self, endpoint, command, args):
+        """
+        It returns a tuple (found, value) for the given entry
+        """
+
+        key = self._key(endpoint, command, args)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is not None and entry[0] > self.clock():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+
+            if entry is not None:
+                del self.entries[key]
+
+            self.misses += 1
+            return False, None
+
+    def put(self, endpoint, command, args, value):
+        """
+        It stores the result of a command
+        """
+
+        ttl = self.ttl(command)
+
+        if ttl <= 0:
+            return
+
+        key = self._key(endpoint, command, args)
+
+        with self.lock:
+            self.entries[key] = (self.clock() + ttl, value)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def cached(self, endpoint, command, args, producer):
+        """
+        It returns the cached result of a command, if not present
+        producer is called to get it and the result is stored
+        """
+
+        found, value = self.get(endpoint, command, args)
+
+        if not found:
+            value = producer()
+            self.put(endpoint, command, args, value)
+
+        return value
+
+    def invalidate(self, endpoint=None):
+        """
+        It removes all the entries of an endpoint, or all of them
+        if no endpoint is given
+        """
+
+        with self.lock:
+            if endpoint is None:
+                keys = list(self.entries.keys())
+            else:
+                keys = [ key for key in self.entries.keys() if key[0] == endpoint ]
+
+            for key in keys:
+                del self.entries[key]
+
+            self.invalidations += 1
+
+    def clear(self):
+        """
+        It removes all the entries and resets the counters
+        """
+
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def stats(self):
+        """
+        It returns the hit and miss counters of the cache
+        """
+
+        with self.lock:
+            return { 'size': len(self.entries),
+                     'max_entries': self.max_entries,
+                     'hits': self.hits,
+                     'misses': self.misses,
+                     'evictions': self.evictions,
+                     'invalidations': self.invalidations }
+
+results = TTLCache()
+
+def cached(endpoint, command, args, producer):
+    """
+    It returns the cached result of a read-only command. The returned
+    value is shared, so it must not be modified.
+    """
+
+    return results.cached(endpoint, command, args, producer)
+
+def invalidate(endpoint):
+    """
+    It needs to be called after executing a command that changes the
+    state of a testbed (scontrol update, scancel, sbatch...)
+    """
+
+    results.invalidate(endpoint)
+
+def stats():
+    """
+    It returns the statistics of the cache
+    """
+
+    return results.stats()
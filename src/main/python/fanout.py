@@ -0,0 +1,101 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Module that runs the remote commands of several testbeds at the same time,
+# so a slow or unreachable testbed does not delay the other ones.
+#
+# Only the remote commands run in the pool of threads, the results are
+# given back to the thread that called each, which is the only one that
+# writes in the db. The threads receive RemoteTestbed and RemoteNode copies
+# of the db objects so they never touch the db session.
+#
+
+import collections
+import concurrent.futures
+
+DEFAULT_MAX_WORKERS = 8
+
+# Maximum number of testbeds polled at the same time, 1 polls them
+# one after the other in the calling thread
+max_workers = DEFAULT_MAX_WORKERS
+
+RemoteTestbed = collections.namedtuple('RemoteTestbed', [ 'id', 'name', 'category', 'protocol', 'endpoint' ])
+RemoteNode = collections.namedtuple('RemoteNode', [ 'id', 'name', 'disabled' ])
+
+def set_max_workers(workers):
+    """
+    It sets the maximum number of testbeds polled at the same time
+    """
+
+    global max_workers
+    max_workers = max(1, int(workers))
+
+def remote_testbed(testbed):
+    """
+    It returns the copy of a testbed that can be used outside of the
+    thread of the db session
+    """
+
+    return RemoteTestbed(testbed.id, testbed.name, testbed.category, testbed.protocol, testbed.endpoint)
+
+def remote_nodes(nodes):
+    """
+    It returns the copies of some nodes that can be used outside of the
+    thread of the db session
+    """
+
+    return [ RemoteNode(node.id, node.name, node.disabled) for node in nodes ]
+
+def _completed(function, item):
+    """
+    It calls the function in the current thread and returns a future
+    with its result or its exception
+    """
+
+    future = concurrent.futures.Future()
+
+    try:
+        future.set_result(function(item))
+    except Exception as e:
+        future.set_exception(e)
+
+    return future
+
+def each(function, items, workers=None):
+    """
+    It calls function(item) for each item in a pool of at most workers
+    threads and yields (item, future) in the order of the items. The
+    result of the call, or the exception it raised, is obtained with
+    future.result() in the calling thread.
+
+    All the calls start at once, so a cycle takes as long as the slowest
+    item instead of the sum of all of them.
+    """
+
+    items = list(items)
+    workers = min(max_workers if workers is None else workers, len(items))
+
+    if workers <= 1:
+        for item in items:
+            yield item, _completed(function, item)
+        return
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fanout') as pool:
+        futures = [ pool.submit(function, item) for item in items ]
+
+        for item, future in zip(items, futures):
+            yield item, future
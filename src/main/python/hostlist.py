@@ -0,0 +1,284 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Module that expands and compresses the SLURM hostlist notation used by sinfo,
+# squeue and scontrol: nd[001-128],rack[1-2]n[01-16],login
+#
+
+import collections
+import functools
+import itertools
+import re
+
+_name_number = re.compile(r'^(.*?)(\d+)$')
+
+class _Range():
+    """
+    Range of numbers of a bracket group, the numbers are zero padded
+    to width digits
+    """
+
+    __slots__ = ('start', 'end', 'width')
+
+    def __init__(self, start, end, width):
+        """Initializes the range"""
+
+        self.start = start
+        self.end = end
+        self.width = width
+
+    def __len__(self):
+        """
+        It returns the number of numbers of the range
+        """
+
+        return self.end - self.start + 1
+
+    def __iter__(self):
+        """
+        It yields the zero padded numbers of the range
+        """
+
+        for number in range(self.start, self.end + 1):
+            yield str(number).zfill(self.width)
+
+    def __contains__(self, digits):
+        """
+        It returns True if the digits are a number of the range
+        """
+
+        number = int(digits)
+        return self.start <= number <= self.end and str(number).zfill(self.width) == digits
+
+class _Pattern():
+    """
+    One element of a hostlist, literal texts alternated with bracket
+    groups: rack[1-2]n[01-16] -> 'rack', [1-2], 'n', [01-16], ''
+    """
+
+    __slots__ = ('texts', 'groups', 'regex')
+
+    def __init__(self, texts, groups):
+        """Initializes the pattern and the regex that matches its names"""
+
+        self.texts = texts
+        self.groups = groups
+        self.regex = re.compile('(\\d+)'.join(re.escape(text) for text in texts) + '$')
+
+    def __len__(self):
+        """
+        It returns the number of names of the pattern
+        """
+
+        count = 1
+        for group in self.groups:
+            count *= sum(len(group_range) for group_range in group)
+        return count
+
+    def __iter__(self):
+        """
+        It yields the names of the pattern, the last group varies fastest
+        """
+
+        if len(self.groups) == 1:
+            prefix, suffix = self.texts
+            for group_range in self.groups[0]:
+                for digits in group_range:
+                    yield prefix + digits + suffix
+            return
+
+        expanded = [ list(itertools.chain.from_iterable(group)) for group in self.groups ]
+
+        for numbers in itertools.product(*expanded):
+            yield ''.join(text + digits for text, digits in zip(self.texts, numbers)) + self.texts[-1]
+
+    def __contains__(self, name):
+        """
+        It returns True if the name matches the pattern
+        """
+
+        match = self.regex.match(name)
+
+        if match is None:
+            return False
+
+        return all(any(digits in group_range for group_range in group) for digits, group in zip(match.groups(), self.groups))
+
+def _split(hostlist):
+    """
+    It splits a hostlist by the commas that are not inside brackets
+    """
+
+    elements = []
+    depth = 0
+    start = 0
+
+    for i, character in enumerate(hostlist):
+        if character == '[':
+            depth += 1
+        elif character == ']':
+            depth -= 1
+        elif character == ',' and depth == 0:
+            elements.append(hostlist[start:i])
+            start = i + 1
+
+    if depth != 0:
+        raise ValueError('Unbalanced brackets in hostlist: ' + hostlist)
+
+    elements.append(hostlist[start:])
+
+    return [ element.strip() for element in elements if element.strip() ]
+
+def _parse_group(group, hostlist):
+    """
+    It parses the content of a bracket group: 1-3,07,10-12
+    """
+
+    ranges = []
+
+    for item in group.split(','):
+        limits = item.strip().split('-')
+
+        if len(limits) > 2 or not all(limit.isdigit() for limit in limits):
+            raise ValueError('Invalid range ' + item + ' in hostlist: ' + hostlist)
+
+        start = int(limits[0])
+        end = int(limits[-1])
+        width = len(limits[0]) if limits[0].startswith('0') else 0
+
+        if end < start:
+            raise ValueError('Invalid range ' + item + ' in hostlist: ' + hostlist)
+
+        ranges.append(_Range(start, end, width))
+
+    return ranges
+
+@functools.lru_cache(maxsize=256)
+def parse(hostlist):
+    """
+    It parses a hostlist once into the patterns of its elements, so
+    they can be iterated, counted and searched without expanding
+    all the names
+    """
+
+    patterns = []
+
+    for element in _split(hostlist):
+        parts = re.split(r'\[([^\]]*)\]', element)
+        texts = parts[0::2]
+        groups = [ _parse_group(group, hostlist) for group in parts[1::2] ]
+
+        if '[' in ''.join(texts) or ']' in ''.join(texts):
+            raise ValueError('Invalid hostlist: ' + hostlist)
+
+        patterns.append(_Pattern(texts, groups))
+
+    return tuple(patterns)
+
+def expand(hostlist):
+    """
+    It returns an iterator over the node names of a hostlist, in the
+    same order SLURM expands them:
+
+    rack[1-2]n[01-02] -> rack1n01, rack1n02, rack2n01, rack2n02
+    """
+
+    return itertools.chain.from_iterable(parse(hostlist))
+
+def first(hostlist):
+    """
+    It returns the first node name of a hostlist, None if it is empty
+    """
+
+    return next(expand(hostlist), None)
+
+def count(hostlist):
+    """
+    It returns the number of node names of a hostlist without
+    expanding it
+    """
+
+    return sum(len(pattern) for pattern in parse(hostlist))
+
+def contains(hostlist, name):
+    """
+    It returns True if the node name belongs to the hostlist, without
+    expanding it
+    """
+
+    return any(name in pattern for pattern in parse(hostlist))
+
+def compress(names):
+    """
+    It compresses a collection of node names into the hostlist notation,
+    the numbers at the end of the names are grouped in ranges keeping
+    their zero padding:
+
+    nd001,nd002,nd003,nd007,login -> nd[001-003,007],login
+    """
+
+    groups = collections.OrderedDict()
+
+    for name in names:
+        match = _name_number.match(name)
+
+        if match is None:
+            groups.setdefault((name, None), None)
+        else:
+            digits = match.group(2)
+            width = len(digits) if digits.startswith('0') and len(digits) > 1 else 0
+            groups.setdefault((match.group(1), width), set()).add(int(digits))
+
+    # Numbers without zeros of the length of a padded group go with it:
+    # nd099,nd100 -> nd[099-100]
+    for (prefix, width), numbers in list(groups.items()):
+        if width and (prefix, 0) in groups:
+            natural = groups[(prefix, 0)]
+            padded = set(number for number in natural if len(str(number)) == width)
+            numbers.update(padded)
+            natural.difference_update(padded)
+
+    elements = []
+
+    for (prefix, width), numbers in groups.items():
+        if width is None:
+            elements.append(prefix)
+            continue
+
+        if not numbers:
+            continue
+
+        numbers = sorted(numbers)
+        ranges = []
+        start = end = numbers[0]
+
+        for number in itertools.islice(numbers, 1, None):
+            if number == end + 1:
+                end = number
+            else:
+                ranges.append((start, end))
+                start = end = number
+
+        ranges.append((start, end))
+
+        if len(numbers) == 1:
+            elements.append(prefix + str(numbers[0]).zfill(width))
+        else:
+            elements.append(prefix + '[' + ','.join(str(s).zfill(width) if s == e else str(s).zfill(width) + '-' + str(e).zfill(width)
+                                                    for s, e in ranges) + ']')
+
+    return ','.join(elements)
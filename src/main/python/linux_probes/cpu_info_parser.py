@@ -1,91 +1,198 @@
-# Builder script for the Application Lifecycle Deployment Engine
-#
-# This is being developed for the TANGO Project: http://tango-project.eu
-#
-# Copyright: David García Pérez, Atos Research and Innovation, 2016.
-#
-# This code is licensed under an Apache 2.0 license. Please, refer to the LICENSE.TXT file for more information
-
-import itertools
-import re
-import shell
-import subprocess
-import logging
-from models import CPU, Testbed, Node
-
-architectures={ 'GenuineIntel': 'x86_64'}
-
-def parse_cpu_info(cpu_info):
-    """
-    This class understands the file /proc/cpuinfo from linux distributions
-    and parses it to extract information from it.
-
-    This information is returned in the form of an array defined by the class
-    models.cpu
-    """
-
-    lines = cpu_info.decode('utf-8')
-    lines = re.sub(r'(^[ \t]+|[ \t]+(?=:))', '', lines, flags=re.M)
-    lines = lines.split("\n")
-
-    cpus = []
-
-    for key,group in itertools.groupby(lines, lambda x: x==''):
-
-        if not key:
-            data={}
-            for item in list(group):
-                field,value=item.split(':')
-                value=value.strip()
-                data[field]=value
-
-            cpu = CPU(vendor_id=data['vendor_id'],
-                      model_name=data['model name'],
-                      arch=architectures[data['vendor_id']],
-                      model=data['model'],
-                      speed=data['cpu MHz'],
-                      fpu= data['fpu'] == 'yes',
-                      cores=int(data['cpu cores']),
-                      cache=data['cache size'],
-                      flags=data['flags'])
-            cpu.physical_id = int(data['physical id'])
-            cpu.siblings = int(data['siblings'])
-            cpu.stepping = int(data['stepping'])
-            cpu.microcode = data['microcode']
-            cpu.fpu_exception = data['fpu_exception'] == 'yes'
-            cpu.wp = data['wp'] == 'yes'
-            cpu.bogomips = data['bogomips']
-            cpus.append(cpu)
-
-    return cpus
-
-def get_cpuinfo_node(testbed, node):
-    """
-    Given a testbed of type linux and a node, it is able to connect to it
-    and retrieve the necessary information of the cpu_info of the node.
-
-    In returns the cpu information in the form of a list of CPU objects
-    """
-
-    try:
-        if node in testbed.nodes and not node.disabled:
-            command = "ssh"
-            params = [node.name, "'cat", "/proc/cpuinfo'"]
-
-            if Testbed.protocol_local == testbed.protocol:
-                cpu_info = shell.execute_command(command=command, params=params)
-            elif Testbed.protocol_ssh == testbed.protocol:
-                cpu_info = shell.execute_command(command=command,
-                                                 server=testbed.endpoint,
-                                                 params=params)
-            else:
-                logging.info("Tesbed protocol: %s not supported to get node information",
-                    testbed.protocol)
-                return []
-
-            return parse_cpu_info(cpu_info)
-        else:
-            return []
-    except subprocess.CalledProcessError:
-        logging.error("Exception trying to get the node cpu info")
-        return []
+# Builder script for the Application Lifecycle Deployment Engine
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Copyright: David García Pérez, Atos Research and Innovation, 2016.
+#
+# This code is licensed under an Apache 2.0 license. Please, refer to the LICENSE.TXT file for more information
+
+import collections
+import hashlib
+import itertools
+import re
+import shell
+import subprocess
+import logging
+from models import CPU, Testbed, Node
+
+architectures={ 'GenuineIntel': 'x86_64'}
+
+# Number of nodes the login node connects to at the same time, and the
+# options that stop a dead node from blocking the others
+CPUINFO_PARALLEL = 32
+NODE_SSH_OPTIONS = [ "-o", "BatchMode=yes", "-o", "ConnectTimeout=10" ]
+
+# Result of probing the cpuinfo of a node: digest of the output and its
+# CPUs. cpus is None if the output did not change and digest is None if
+# the probe failed
+CpuinfoProbe = collections.namedtuple('CpuinfoProbe', [ 'digest', 'cpus' ])
+
+def parse_cpu_info(cpu_info):
+    """
+    This class understands the file /proc/cpuinfo from linux distributions
+    and parses it to extract information from it.
+
+    This information is returned in the form of an array defined by the class
+    models.cpu
+    """
+
+    lines = cpu_info.decode('utf-8')
+    lines = re.sub(r'(^[ \t]+|[ \t]+(?=:))', '', lines, flags=re.M)
+    lines = lines.split("\n")
+
+    cpus = []
+
+    for key,group in itertools.groupby(lines, lambda x: x==''):
+
+        if not key:
+            data={}
+            for item in list(group):
+                field,value=item.split(':')
+                value=value.strip()
+                data[field]=value
+
+            cpu = CPU(vendor_id=data['vendor_id'],
+                      model_name=data['model name'],
+                      arch=architectures[data['vendor_id']],
+                      model=data['model'],
+                      speed=data['cpu MHz'],
+                      fpu= data['fpu'] == 'yes',
+                      cores=int(data['cpu cores']),
+                      cache=data['cache size'],
+                      flags=data['flags'])
+            cpu.physical_id = int(data['physical id'])
+            cpu.siblings = int(data['siblings'])
+            cpu.stepping = int(data['stepping'])
+            cpu.microcode = data['microcode']
+            cpu.fpu_exception = data['fpu_exception'] == 'yes'
+            cpu.wp = data['wp'] == 'yes'
+            cpu.bogomips = data['bogomips']
+            cpus.append(cpu)
+
+    return cpus
+
+def get_cpuinfo_node(testbed, node):
+    """
+    Given a testbed of type linux and a node, it is able to connect to it
+    and retrieve the necessary information of the cpu_info of the node.
+
+    In returns the cpu information in the form of a list of CPU objects
+    """
+
+    try:
+        if node in testbed.nodes and not node.disabled:
+            command = "ssh"
+            params = [node.name, "'cat", "/proc/cpuinfo'"]
+
+            if Testbed.protocol_local == testbed.protocol:
+                cpu_info = shell.execute_command(command=command, params=params)
+            elif testbed.protocol in (Testbed.protocol_ssh, Testbed.protocol_simulated):
+                cpu_info = shell.execute_command(command=command,
+                                                 server=testbed.endpoint,
+                                                 params=params)
+            else:
+                logging.info("Tesbed protocol: %s not supported to get node information",
+                    testbed.protocol)
+                return []
+
+            return parse_cpu_info(cpu_info)
+        else:
+            return []
+    except subprocess.CalledProcessError:
+        logging.error("Exception trying to get the node cpu info")
+        return []
+
+def cpuinfo_digest(output):
+    """
+    It returns the digest of the output of /proc/cpuinfo
+    """
+
+    return hashlib.sha1(output).hexdigest()
+
+def get_cpuinfo_nodes(testbed, nodes):
+    """
+    Batch version of get_cpuinfo_node, it retrieves the cpu information
+    of several nodes of a testbed doing one single call to the testbed.
+    The login node connects to CPUINFO_PARALLEL nodes at the same time.
+
+    It returns a dict with the list of CPU objects of each node name,
+    the list is empty if it was not possible to get the node info. The
+    reason of the failure of each node is logged.
+    """
+
+    return { name: probe.cpus or [] for name, probe in probe_cpuinfo_nodes(testbed, nodes).items() }
+
+def probe_cpuinfo_nodes(testbed, nodes, digests={}):
+    """
+    It does the same as get_cpuinfo_nodes but it returns a CpuinfoProbe
+    per node name. The output of the nodes whose digest is the same as
+    the one given in digests is not parsed.
+    """
+
+    return { name: probe_cpuinfo(name, output, digests.get(name)) for name, output in fetch_cpuinfo_nodes(testbed, nodes).items() }
+
+def probe_cpuinfo(name, output, digest=None):
+    """
+    It returns the CpuinfoProbe of the cpuinfo output of a node, None
+    if the output could not be retrieved. The output is not parsed if
+    it has the given digest.
+    """
+
+    if output is None:
+        return CpuinfoProbe(None, [])
+
+    new_digest = cpuinfo_digest(output)
+
+    if new_digest == digest:
+        return CpuinfoProbe(digest, None)
+
+    try:
+        return CpuinfoProbe(new_digest, parse_cpu_info(output))
+    except (KeyError, ValueError):
+        logging.error("Impossible to parse the cpu info of node: %s", name)
+        return CpuinfoProbe(None, [])
+
+def fetch_cpuinfo_nodes(testbed, nodes):
+    """
+    It returns the output of /proc/cpuinfo of the enabled nodes of a
+    testbed, doing one single call to the testbed. The login node
+    connects to CPUINFO_PARALLEL nodes at the same time.
+
+    The output is None for the nodes that could not be reached, the
+    reason of the failure of each node is logged.
+    """
+
+    nodes = [ node for node in nodes if not node.disabled ]
+    commands = [ ("ssh", NODE_SSH_OPTIONS + [node.name, "'cat", "/proc/cpuinfo'"]) for node in nodes ]
+
+    if Testbed.protocol_local == testbed.protocol:
+        server = ''
+    elif testbed.protocol in (Testbed.protocol_ssh, Testbed.protocol_simulated):
+        server = testbed.endpoint
+    else:
+        logging.info("Tesbed protocol: %s not supported to get node information",
+            testbed.protocol)
+        return {}
+
+    outputs = {}
+
+    try:
+        results = shell.execute_batch(commands, server, parallel=CPUINFO_PARALLEL)
+    except subprocess.CalledProcessError:
+        logging.error("Exception trying to get the nodes cpu info")
+        results = None
+
+    for node, result in itertools.zip_longest(nodes, results or []):
+        outputs[node.name] = None
+
+        if results is None:
+            continue
+        elif result is None or result.returncode is None:
+            logging.error("Impossible to get the cpu info of node: %s, the command was interrupted", node.name)
+        elif result.returncode != 0:
+            logging.error("Impossible to get the cpu info of node: %s, exit code %d: %s",
+                node.name, result.returncode, result.error.decode('utf-8', 'replace').strip())
+        else:
+            outputs[node.name] = result.output
+
+    return outputs
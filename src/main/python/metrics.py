@@ -0,0 +1,193 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# In-process metrics of the commands executed by the shell module and the
+# HTTP method that exposes them
+#
+
+import bisect
+import collections
+import threading
+import time
+from flask import Blueprint, jsonify, request
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = [ 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600 ]
+RECENT_INVOCATIONS = 256
+SLOWEST_INVOCATIONS = 10
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+class Histogram():
+    """
+    Fixed buckets histogram, the last bucket counts all the values
+    bigger than the last bound
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        """Initializes an empty histogram"""
+
+        self.bounds = bounds
+        self.buckets = [ 0 ] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        """
+        It adds a value to the histogram
+        """
+
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile):
+        """
+        It returns an estimation of the given percentile (0-100)
+        interpolating inside the bucket where it falls
+        """
+
+        if self.count == 0:
+            return None
+
+        rank = percentile / 100.0 * self.count
+        accumulated = 0
+
+        for i, bucket in enumerate(self.buckets):
+            if bucket == 0 or accumulated + bucket < rank:
+                accumulated += bucket
+                continue
+
+            lower = self.bounds[i - 1] if i > 0 else 0.0
+            upper = self.bounds[i] if i < len(self.bounds) else self.max
+            upper = min(upper, self.max)
+            lower = min(lower, upper)
+
+            return lower + (upper - lower) * (rank - accumulated) / bucket
+
+        return self.max
+
+    def summary(self):
+        """
+        It returns the count, mean, max and p50, p95 and p99 values
+        """
+
+        return { 'count': self.count,
+                 'mean': self.sum / self.count if self.count > 0 else None,
+                 'max': self.max,
+                 'p50': self.percentile(50),
+                 'p95': self.percentile(95),
+                 'p99': self.percentile(99) }
+
+class ShellMetrics():
+    """
+    It records the wall time, exit status, volume of data and endpoint
+    of each command executed by the shell module, aggregated by the
+    name of the command (sinfo, sacct, squeue, scontrol, scp...)
+    """
+
+    def __init__(self, recent=RECENT_INVOCATIONS, clock=time.time):
+        """Initializes the metrics without any command"""
+
+        self.commands = {}
+        self.recent = collections.deque(maxlen=recent)
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def record(self, command, endpoint, wall_time, status, bytes_out=0, bytes_in=0):
+        """
+        It records an invocation of a command. Status is the exit code
+        of the command or a string like timeout when it did not finish
+        """
+
+        with self.lock:
+            entry = self.commands.get(command)
+
+            if entry is None:
+                entry = { 'histogram': Histogram(),
+                          'statuses': {},
+                          'errors': 0,
+                          'bytes_out': 0,
+                          'bytes_in': 0,
+                          'endpoints': {} }
+                self.commands[command] = entry
+
+            entry['histogram'].add(wall_time)
+            entry['statuses'][str(status)] = entry['statuses'].get(str(status), 0) + 1
+            entry['bytes_out'] += bytes_out
+            entry['bytes_in'] += bytes_in
+            entry['endpoints'][endpoint] = entry['endpoints'].get(endpoint, 0) + 1
+
+            if status != 0:
+                entry['errors'] += 1
+
+            self.recent.append({ 'command': command,
+                                 'endpoint': endpoint,
+                                 'wall_time': wall_time,
+                                 'status': status,
+                                 'bytes_out': bytes_out,
+                                 'bytes_in': bytes_in,
+                                 'time': self.clock() })
+
+    def slowest(self, limit=SLOWEST_INVOCATIONS):
+        """
+        It returns the slowest of the recent invocations
+        """
+
+        with self.lock:
+            recent = list(self.recent)
+
+        return sorted(recent, key=lambda invocation: invocation['wall_time'], reverse=True)[:limit]
+
+    def summary(self, limit=SLOWEST_INVOCATIONS):
+        """
+        It returns the statistics of each command and the slowest
+        recent invocations
+        """
+
+        with self.lock:
+            commands = { command: { 'wall_time': entry['histogram'].summary(),
+                                    'statuses': dict(entry['statuses']),
+                                    'errors': entry['errors'],
+                                    'bytes_out': entry['bytes_out'],
+                                    'bytes_in': entry['bytes_in'],
+                                    'endpoints': dict(entry['endpoints']) } for command, entry in self.commands.items() }
+
+        return { 'commands': commands, 'slowest': self.slowest(limit) }
+
+    def clear(self):
+        """
+        It removes all the recorded invocations
+        """
+
+        with self.lock:
+            self.commands.clear()
+            self.recent.clear()
+
+shell = ShellMetrics()
+
+@metrics_blueprint.route('/shell', methods=['GET'])
+def get_shell_metrics():
+    """
+    It returns the metrics of the commands executed by the shell module
+    """
+
+    limit = request.args.get('limit', SLOWEST_INVOCATIONS, type=int)
+
+    return jsonify(shell.summary(limit))
@@ -325,6 +325,12 @@ class Node(db.Model):
     information_retrieved = db.Column(db.Boolean)
     disabled = db.Column(db.Boolean)
     state = db.Column(db.String)
+    # BootTime reported by SLURM and digests of the last hardware probes,
+    # the hardware information is only rewritten when they change
+    boot_time = db.Column(db.String)
+    hardware_digest = db.Column(db.String)
+    cpuinfo_digest = db.Column(db.String)
+    cpuinfo_boot_time = db.Column(db.String)
     testbed_id = db.Column(db.Integer, db.ForeignKey('testbeds.id'))
     testbed = db.relationship("Testbed", back_populates="nodes")
     cpus = db.relationship("CPU", order_by=CPU.id, back_populates="node")
@@ -417,6 +423,7 @@ class Testbed(db.Model):
     slurm_category = 'SLURM'
     protocol_local = 'LOCAL'
     protocol_ssh = 'SSH'
+    protocol_simulated = 'SIMULATED'
 
     # SQLAlchemy mapping code
     __tablename__ = 'testbeds'
@@ -0,0 +1,263 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Module that decides, for each polling task and testbed, when the testbed
+# is polled again. The scheduler calls run(task_id) every few seconds and
+# only the testbeds whose next run arrived are polled:
+#
+#   - A testbed where something changed is polled faster, down to the
+#     minimum interval of the task, a quiet one slower, up to its maximum.
+#   - A submission (sbatch, srun, enqueue_compss) nudges the testbed, so it
+#     is polled in the next tick.
+#   - Two runs of the same task never overlap and the runs that were
+#     missed while a testbed was behind are coalesced into one.
+#
+# The function of a task is called with the names of the due testbeds and
+# returns the number of changes of each one of them.
+#
+
+import logging
+import threading
+import time
+from apscheduler.util import ref_to_obj
+from flask import Blueprint, jsonify
+from models import db, Testbed
+
+# Seconds between two calls to run by the scheduler
+TICK_SECONDS = 5
+# The interval of a quiet testbed is multiplied by this factor after each run
+BACKOFF = 1.5
+
+polling_blueprint = Blueprint('polling', __name__)
+
+class AdaptiveTask():
+    """
+    Polling task whose interval is adapted, for each testbed, to the
+    changes found in it
+    """
+
+    def __init__(self, id, function, seconds, min_seconds=None, max_seconds=None, backoff=BACKOFF, clock=time.monotonic):
+        """Initializes the task without any testbed"""
+
+        self.id = id
+        self.function = function
+        self.seconds = seconds
+        self.min_seconds = seconds if min_seconds is None else min_seconds
+        self.max_seconds = seconds if max_seconds is None else max_seconds
+        self.backoff = backoff
+        self.clock = clock
+        self.states = {}
+        self.runs = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+        self.running = threading.Lock()
+
+    def _state(self, name, endpoint, now):
+        """
+        It returns the state of a testbed, a new testbed is due now
+        """
+
+        state = self.states.get(name)
+
+        if state is None:
+            state = { 'endpoint': endpoint,
+                      'interval': self.seconds,
+                      'next_run': now,
+                      'last_run': None,
+                      'last_duration': None,
+                      'last_changes': None,
+                      'runs': 0,
+                      'coalesced': 0,
+                      'nudged': False }
+            self.states[name] = state
+
+        state['endpoint'] = endpoint
+
+        return state
+
+    def due(self, testbeds):
+        """
+        It returns the names of the testbeds, given as (name, endpoint),
+        whose next run arrived. The runs missed by a testbed that fell
+        behind are counted as coalesced.
+        """
+
+        now = self.clock()
+        due = []
+
+        with self.lock:
+            for name, endpoint in testbeds:
+                state = self._state(name, endpoint, now)
+
+                if state['next_run'] <= now:
+                    state['coalesced'] += int((now - state['next_run']) // state['interval'])
+                    state['nudged'] = False
+                    due.append(name)
+
+            # The testbeds that are not polled anymore are forgotten
+            names = set(name for name, endpoint in testbeds)
+            for name in set(self.states) - names:
+                del self.states[name]
+
+        return due
+
+    def _reschedule(self, state, changes, end):
+        """
+        It sets the interval and next run of a testbed after a run
+        """
+
+        if state['nudged']:
+            state['interval'] = self.min_seconds
+            state['next_run'] = end
+        elif changes > 0:
+            state['interval'] = max(self.min_seconds, min(state['interval'], self.seconds) / 2)
+            state['next_run'] = end + state['interval']
+        else:
+            state['interval'] = min(self.max_seconds, state['interval'] * self.backoff)
+            state['next_run'] = end + state['interval']
+
+    def run(self, testbeds):
+        """
+        It calls the function of the task with the due testbeds and
+        reschedules them. It returns the changes of each polled testbed,
+        or None if the previous run of the task did not finish yet.
+        """
+
+        if not self.running.acquire(blocking=False):
+            self.skipped += 1
+            return None
+
+        try:
+            due = self.due(testbeds)
+
+            if len(due) == 0:
+                return {}
+
+            start = self.clock()
+
+            try:
+                changes = self.function(due) or {}
+            except Exception:
+                logging.exception("Error polling the testbeds of task: " + self.id)
+                changes = {}
+
+            end = self.clock()
+
+            with self.lock:
+                self.runs += 1
+
+                for name in due:
+                    state = self.states.get(name)
+
+                    if state is None:
+                        continue
+
+                    state['runs'] += 1
+                    state['last_run'] = end
+                    state['last_duration'] = end - start
+                    state['last_changes'] = changes.get(name, 0)
+                    self._reschedule(state, state['last_changes'], end)
+
+            return changes
+        finally:
+            self.running.release()
+
+    def nudge(self, endpoint):
+        """
+        It polls the testbeds of an endpoint in the next tick, at the
+        minimum interval of the task
+        """
+
+        with self.lock:
+            for state in self.states.values():
+                if state['endpoint'] == endpoint:
+                    state['interval'] = self.min_seconds
+                    state['next_run'] = min(state['next_run'], self.clock())
+                    state['nudged'] = True
+
+    def summary(self):
+        """
+        It returns the intervals of the task and the effective interval
+        and next run, in seconds from now, of each testbed
+        """
+
+        now = self.clock()
+
+        with self.lock:
+            testbeds = { name: { 'endpoint': state['endpoint'],
+                                 'interval': state['interval'],
+                                 'next_run_in': max(0.0, state['next_run'] - now),
+                                 'last_run_ago': None if state['last_run'] is None else now - state['last_run'],
+                                 'last_duration': state['last_duration'],
+                                 'last_changes': state['last_changes'],
+                                 'runs': state['runs'],
+                                 'coalesced': state['coalesced'] } for name, state in self.states.items() }
+
+        return { 'id': self.id,
+                 'seconds': self.seconds,
+                 'min_seconds': self.min_seconds,
+                 'max_seconds': self.max_seconds,
+                 'running': self.running.locked(),
+                 'runs': self.runs,
+                 'skipped': self.skipped,
+                 'testbeds': testbeds }
+
+tasks = {}
+
+def configure(jobs, clock=time.monotonic):
+    """
+    It creates the polling tasks from their configuration: id, func as
+    'module:function', seconds, min_seconds and max_seconds
+    """
+
+    tasks.clear()
+
+    for job in jobs:
+        tasks[job['id']] = AdaptiveTask(job['id'],
+                                        ref_to_obj(job['func']) if isinstance(job['func'], str) else job['func'],
+                                        job['seconds'],
+                                        job.get('min_seconds'),
+                                        job.get('max_seconds'),
+                                        job.get('backoff', BACKOFF),
+                                        clock)
+
+def run(task_id):
+    """
+    It polls the on-line testbeds of a task whose next run arrived, it is
+    called by the scheduler every TICK_SECONDS
+    """
+
+    testbeds = [ (testbed.name, testbed.endpoint) for testbed in db.session.query(Testbed.name, Testbed.endpoint).filter(Testbed.on_line == True) ]
+
+    return tasks[task_id].run(testbeds)
+
+def nudge(endpoint):
+    """
+    It polls the testbed of the endpoint in the next tick of every task,
+    it is called after submitting a job to it
+    """
+
+    for task in list(tasks.values()):
+        task.nudge(endpoint)
+
+@polling_blueprint.route('', methods=['GET'])
+def get_polling():
+    """
+    It returns the effective polling interval of each task and testbed
+    """
+
+    return jsonify([ tasks[task_id].summary() for task_id in sorted(tasks) ])
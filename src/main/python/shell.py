@@ -18,12 +18,240 @@
 # Module that encapsulates the ssh commands
 #
 
+import asyncio
+import collections
+import io
+import shlex
 import subprocess
+import uuid
 import logging
+import hashlib
+import metrics
+import os
+import signal
+import threading
+import time
+import weakref
 
-def _execute_command(command):
+SSH_CONTROL_FOLDER = '/tmp/alde-ssh'
+SSH_IDLE_TIMEOUT = 300
+DEFAULT_ENDPOINT_CONCURRENCY = 8
+
+endpoint_concurrency = {}
+backends = {}
+_semaphores = weakref.WeakKeyDictionary()
+
+BatchResult = collections.namedtuple('BatchResult', ['command', 'output', 'error', 'returncode'])
+
+DEFAULT_COMMAND_TIMEOUT = 600
+CANCEL_POLL_INTERVAL = 0.5
+
+# Seconds each type of command can run before it is killed, None
+# means the command has no deadline (container builds, file copies...)
+COMMAND_TIMEOUTS = {
+    'sinfo': 60,
+    'scontrol': 60,
+    'squeue': 60,
+    'sacct': 60,
+    'scancel': 60,
+    'ssh': 60,
+    'batch': 120,
+    'scp': None,
+    'singularity': None,
+    'sudo': None
+}
+
+timeouts = {}
+_timeouts_lock = threading.Lock()
+
+class CommandTimeout(subprocess.TimeoutExpired):
+    """
+    Exception raised when a command does not finish before its
+    deadline. When it is raised the whole process group of the
+    command has been already killed.
+    """
+
+    def __init__(self, cmd, timeout, server='', output=None):
+        super().__init__(cmd, timeout, output)
+        self.server = server
+
+    def __str__(self):
+        return "Command '%s' at server '%s' timed out after %s seconds" % (self.cmd, self.server, self.timeout)
+
+class CommandCancelled(subprocess.SubprocessError):
+    """
+    Exception raised when a command is cancelled before it finishes
+    """
+
+    def __init__(self, cmd, server=''):
+        super().__init__(cmd, server)
+        self.cmd = cmd
+        self.server = server
+
+    def __str__(self):
+        return "Command '%s' at server '%s' was cancelled" % (self.cmd, self.server)
+
+class ConnectionPool():
     """
-    It just executes the give command and returns the output
+    It keeps track of the long-lived OpenSSH master connections
+    (ControlMaster) opened against each testbed endpoint, so consecutive
+    ssh and scp invocations to the same endpoint reuse the same TCP
+    connection instead of doing a full handshake each time.
+
+    The endpoint is the same string used as server in execute_command,
+    including the user@host:port form.
+    """
+
+    def __init__(self, control_folder=SSH_CONTROL_FOLDER, idle_timeout=SSH_IDLE_TIMEOUT):
+        """Initializes the pool without any connection"""
+
+        self.enabled = True
+        self.control_folder = control_folder
+        self.idle_timeout = idle_timeout
+        self.connections = {}
+        self.opened = 0
+        self.reused = 0
+        self.evicted = 0
+        self.lock = threading.Lock()
+
+    def control_path(self, server):
+        """
+        It returns the control socket path used for an endpoint. A hash
+        is used since unix sockets paths are limited in length
+        """
+
+        digest = hashlib.sha1(server.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.control_folder, digest)
+
+    def ssh_options(self, server):
+        """
+        It returns the options to be added to an ssh or scp command so it
+        goes through the master connection of the endpoint. It also
+        registers the use of the connection.
+        """
+
+        if not self.enabled:
+            return []
+
+        os.makedirs(self.control_folder, mode=0o700, exist_ok=True)
+
+        with self.lock:
+            now = time.time()
+            connection = self.connections.get(server)
+
+            if connection is None:
+                connection = { 'endpoint': server,
+                               'created': now,
+                               'last_used': now,
+                               'uses': 0 }
+                self.connections[server] = connection
+                self.opened += 1
+            else:
+                self.reused += 1
+
+            connection['last_used'] = now
+            connection['uses'] += 1
+
+        return [ '-o', 'ControlMaster=auto',
+                 '-o', 'ControlPath=' + self.control_path(server),
+                 '-o', 'ControlPersist=' + str(self.idle_timeout) ]
+
+    def _control_command(self, server, operation):
+        """
+        It sends a control operation (check, exit) to the master
+        connection of an endpoint, it returns True if it succeeded
+        """
+
+        host, port = _split_endpoint(server)
+
+        params = [ 'ssh', '-O', operation, '-o', 'ControlPath=' + self.control_path(server) ]
+        if port:
+            params.extend([ '-p', port ])
+        params.append(host)
+
+        try:
+            return subprocess.call(params,
+                                   stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL) == 0
+        except OSError as e:
+            logging.error('Error: %s', str(e))
+            return False
+
+    def check(self, server):
+        """
+        It checks if the master connection of an endpoint it is still
+        alive, if not it is removed from the pool
+        """
+
+        alive = self._control_command(server, 'check')
+
+        if not alive:
+            with self.lock:
+                if self.connections.pop(server, None) is not None:
+                    self.evicted += 1
+
+        return alive
+
+    def evict(self, server):
+        """
+        It closes the master connection of an endpoint
+        """
+
+        with self.lock:
+            if self.connections.pop(server, None) is None:
+                return
+
+            self.evicted += 1
+
+        logging.info("Closing ssh master connection to: " + server)
+        self._control_command(server, 'exit')
+
+    def evict_idle(self):
+        """
+        It closes all the master connections that have not been used
+        for more than idle_timeout seconds
+        """
+
+        limit = time.time() - self.idle_timeout
+
+        with self.lock:
+            idle = [ server for server, connection in self.connections.items() if connection['last_used'] < limit ]
+
+        for server in idle:
+            self.evict(server)
+
+        return idle
+
+    def stats(self):
+        """
+        It returns the statistics of the pool
+        """
+
+        with self.lock:
+            return { 'enabled': self.enabled,
+                     'opened': self.opened,
+                     'reused': self.reused,
+                     'evicted': self.evicted,
+                     'connections': [ dict(connection) for connection in self.connections.values() ] }
+
+connection_pool = ConnectionPool()
+
+def _split_endpoint(server):
+    """
+    It splits an endpoint in the form user@host:port into the
+    user@host part and the port, port is None if not present
+    """
+
+    if ":" in server:
+        connection = server.split(":")
+        return connection[0], connection[1]
+    else:
+        return server, None
+
+def _command_line(command):
+    """
+    It joins the different parts of a command into the string
+    that it is passed to the shell
     """
 
     cmd = ""
@@ -34,74 +262,247 @@ def _execute_command(command):
         for cmd_part in command:
             cmd = cmd + " " + str(cmd_part)
 
-    logging.info("Executing:" + cmd)
+    return cmd
+
+def _command_name(command):
+    """
+    It returns the type of a command, the name of its executable or
+    batch for the multiline scripts of execute_batch
+    """
+
+    if '\n' in command:
+        return 'batch'
+
+    parts = command.split()
+
+    if len(parts) == 0:
+        return ''
+
+    return os.path.basename(parts[0])
+
+def command_timeout(command, timeout=None):
+    """
+    It returns the deadline in seconds of a command, if no timeout
+    is given it is the one configured for its type of command
+    """
+
+    if timeout is not None:
+        return timeout
+
+    return COMMAND_TIMEOUTS.get(_command_name(command), DEFAULT_COMMAND_TIMEOUT)
+
+def _kill_process_group(process):
+    """
+    It kills the process of a command and all its children, the
+    commands run in their own session so ssh and everything started
+    by the shell are in the same process group
+    """
 
     try:
-        output = subprocess.check_output(cmd, shell=True)
-        return output
-    except subprocess.CalledProcessError as e:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+def _record_timeout(server, command, timeout):
+    """
+    It keeps track of the commands that timed out per endpoint,
+    so slow endpoints can be spotted
+    """
+
+    name = _command_name(command)
+
+    with _timeouts_lock:
+        entry = timeouts.setdefault(server, { 'endpoint': server, 'count': 0, 'last': None, 'commands': {} })
+        entry['count'] += 1
+        entry['last'] = time.time()
+        entry['commands'][name] = entry['commands'].get(name, 0) + 1
+
+    logging.warning("Command %s at server %s timed out after %s seconds", name, server, timeout)
+
+class _Invocation():
+    """
+    Context manager that measures the wall time, exit status and
+    bytes sent and received by one invocation of a command and
+    records them in the shell metrics when it finishes
+    """
+
+    def __init__(self, command, server, command_line):
+        """It starts measuring the invocation"""
+
+        self.name = _command_name(command)
+        self.server = server
+        self.bytes_out = len(_command_line(command_line))
+        self.bytes_in = 0
+        self.start = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None or exc_type is GeneratorExit:
+            status = 0
+        elif isinstance(exc, CommandTimeout):
+            status = 'timeout'
+        elif isinstance(exc, (CommandCancelled, asyncio.CancelledError)):
+            status = 'cancelled'
+        elif isinstance(exc, subprocess.CalledProcessError):
+            status = exc.returncode
+            self.bytes_in += len(exc.output or b'')
+        else:
+            status = 'error'
+
+        metrics.shell.record(self.name,
+                             self.server,
+                             time.monotonic() - self.start,
+                             status,
+                             self.bytes_out,
+                             self.bytes_in)
+
+        return False
+
+def register_backend(server, backend):
+    """
+    It makes the commands of a server to be executed by a backend, like
+    the SLURM simulator, instead of via ssh. The backend needs an
+    execute(command_line) and an execute_batch(command_lines) methods
+    that return (returncode, stdout, stderr) tuples.
+    """
+
+    backends[server] = backend
+
+def unregister_backend(server):
+    """
+    It makes the commands of a server to be executed via ssh again
+    """
+
+    backends.pop(server, None)
+
+def _execute_backend(backend, command):
+    """
+    It executes a command in a backend and returns the output, it
+    fails in the same way as _execute_command
+    """
+
+    cmd = _command_line(command)
+
+    logging.info("Executing:" + cmd)
+
+    returncode, output, error = backend.execute(cmd)
+
+    if returncode != 0:
+        e = subprocess.CalledProcessError(returncode=returncode, cmd=cmd, output=output, stderr=error)
         logging.error("Trying to execute command: " + str(cmd))
         logging.error('Error: %s', str(e))
         logging.error(e.stdout)
         raise e
 
-def execute_command(command, server='', params=[]):
+    return output
+
+def _execute_command(command, timeout=None, cancel=None):
     """
-    It executes a command, if server variable it is set, it will try to
-    execute the command via ssh. It is not able to input user and password
-    it is exected it is possible to connect to the server without it
+    It just executes the give command and returns the output.
+
+    If the command does not finish in timeout seconds or the cancel
+    event is set, the command is killed and CommandTimeout or
+    CommandCancelled is raised.
     """
 
-    try:
-        params.insert(0, command)
+    cmd = _command_line(command)
 
-        if server != '':
-            command = ""
-            for param in params:
-                command = command + " " + param
+    logging.info("Executing:" + cmd)
 
-            params = []
-            params.append('ssh')
+    process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, start_new_session=True)
+    deadline = None if timeout is None else time.monotonic() + timeout
 
-            if ":" in server:
-                connection = server.split(":")
-                server = connection[0]
-                port = connection[1]
+    while True:
+        wait = CANCEL_POLL_INTERVAL if cancel is not None else None
 
-                params.append('-p')
-                params.append(port)
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0)
+            wait = remaining if wait is None else min(wait, remaining)
 
-            params.append(server)
+        try:
+            output, _ = process.communicate(timeout=wait)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.is_set():
+                _kill_process_group(process)
+                process.communicate()
+                raise CommandCancelled(cmd)
 
-            command = command[1:]
-            params.append(command)
+            if deadline is not None and time.monotonic() >= deadline:
+                _kill_process_group(process)
+                output, _ = process.communicate()
+                raise CommandTimeout(cmd, timeout, output=output)
 
-        if len(params) == 1:
-            output = _execute_command(params[0])
-        else:
-            output = _execute_command(params)
+    if process.returncode != 0:
+        e = subprocess.CalledProcessError(returncode=process.returncode, cmd=cmd, output=output)
+        logging.error("Trying to execute command: " + str(cmd))
+        logging.error('Error: %s', str(e))
+        logging.error(e.stdout)
+        raise e
 
-        return output
+    return output
 
-    except subprocess.CalledProcessError as e:
-        logging.error("Trying to execute command at server " + server)
-        raise e
+def _build_command(command, server='', params=[]):
+    """
+    It builds the command to execute, wrapping it into an ssh call
+    if a server is given
+    """
+
+    params = [ command ] + list(params)
+
+    if server != '':
+        command = ""
+        for param in params:
+            command = command + " " + param
+
+        params = []
+        params.append('ssh')
+        params.extend(connection_pool.ssh_options(server))
+
+        host, port = _split_endpoint(server)
+
+        if port:
+            params.append('-p')
+            params.append(port)
 
-def scp_file(local_filename, server, remote_filename='', upload=True):
+        params.append(host)
+
+        command = command[1:]
+        params.append(command)
+
+    if len(params) == 1:
+        return params[0]
+    else:
+        return params
+
+def remote_command_line(command, server=''):
     """
-    It copies a file to a remote server. 
-    The local_filename should be the complete path of the file
+    It returns the command line that executes a shell command at a
+    server through its pooled ssh connection, so it can be used as
+    part of a local pipeline. Without server the command is returned
+    as it is.
+    """
+
+    if server == '':
+        return command
+
+    return _command_line(_build_command(shlex.quote(command), server))[1:]
+
+def _build_scp_command(local_filename, server, remote_filename='', upload=True):
+    """
+    It builds the scp command to copy a file from or to a server
     """
 
-    # Building the command
     params = []
     params.append('scp')
+    params.extend(connection_pool.ssh_options(server))
 
-    if ":" in server:
-        connection = server.split(":")
-        server = connection[0]
-        port = connection[1]
+    host, port = _split_endpoint(server)
+    server = host
 
+    if port:
         params.append('-P')
         params.append(port)
 
@@ -112,4 +513,468 @@ def scp_file(local_filename, server, remote_filename='', upload=True):
         params.append(server + ':' + remote_filename)
         params.append(local_filename)
 
-    output = _execute_command(params)
+    return params
+
+def _execute_command_stream(command, timeout=None):
+    """
+    It executes the given command and yields the decoded lines of
+    its output as they arrive. If the command does not finish in
+    timeout seconds it is killed and CommandTimeout is raised.
+    """
+
+    cmd = _command_line(command)
+
+    logging.info("Executing:" + cmd)
+
+    process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, start_new_session=True)
+    completed = False
+    expired = threading.Event()
+    timer = None
+
+    if timeout is not None:
+        def expire():
+            expired.set()
+            _kill_process_group(process)
+
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+
+    try:
+        for line in io.TextIOWrapper(process.stdout, encoding='utf-8'):
+            yield line.rstrip('\n')
+
+        completed = True
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+        if not completed:
+            _kill_process_group(process)
+
+        process.stdout.close()
+        returncode = process.wait()
+
+    if expired.is_set():
+        raise CommandTimeout(cmd, timeout)
+
+    if returncode != 0:
+        e = subprocess.CalledProcessError(returncode=returncode, cmd=cmd)
+        logging.error("Trying to execute command: " + str(cmd))
+        logging.error('Error: %s', str(e))
+        raise e
+
+def execute_command(command, server='', params=[], timeout=None, cancel=None):
+    """
+    It executes a command, if server variable it is set, it will try to
+    execute the command via ssh. It is not able to input user and password
+    it is exected it is possible to connect to the server without it
+
+    The command is killed if it runs for more than timeout seconds, by
+    default the timeout configured for its type of command, raising
+    CommandTimeout. It is also killed, raising CommandCancelled, if the
+    optional cancel threading.Event is set while it runs.
+    """
+
+    timeout = command_timeout(command, timeout)
+    backend = backends.get(server)
+    command_line = _build_command(command, server if backend is None else '', params)
+
+    try:
+        with _Invocation(command, server, command_line) as invocation:
+            if backend is None:
+                output = _execute_command(command_line, timeout, cancel)
+            else:
+                output = _execute_backend(backend, command_line)
+
+            invocation.bytes_in = len(output)
+            return output
+
+    except CommandTimeout as e:
+        e.server = server
+        _record_timeout(server, command, timeout)
+        raise e
+
+    except CommandCancelled as e:
+        e.server = server
+        raise e
+
+    except subprocess.CalledProcessError as e:
+        logging.error("Trying to execute command at server " + server)
+        raise e
+
+def execute_command_stream(command, server='', params=[], timeout=None):
+    """
+    Streaming version of execute_command, instead of returning the
+    whole output it returns a generator of its decoded lines, so big
+    outputs never need to be completely in memory.
+
+    If the command fails the exception is raised after the last line.
+    """
+
+    timeout = command_timeout(command, timeout)
+    backend = backends.get(server)
+    command_line = _build_command(command, server if backend is None else '', params)
+
+    try:
+        with _Invocation(command, server, command_line) as invocation:
+            if backend is None:
+                lines = _execute_command_stream(command_line, timeout)
+            else:
+                lines = iter_lines(_execute_backend(backend, command_line).rstrip(b'\n'))
+
+            for line in lines:
+                invocation.bytes_in += len(line) + 1
+                yield line
+
+    except CommandTimeout as e:
+        e.server = server
+        _record_timeout(server, command, timeout)
+        raise e
+
+    except subprocess.CalledProcessError as e:
+        logging.error("Trying to execute command at server " + server)
+        raise e
+
+def iter_lines(output):
+    """
+    It iterates over the decoded lines of the output of a command
+    without splitting it into a new list. If the output is already
+    an iterable of lines, like the one returned by
+    execute_command_stream, it is iterated as it is.
+    """
+
+    if not isinstance(output, bytes):
+        for line in output:
+            yield line
+        return
+
+    start = 0
+    while True:
+        end = output.find(b'\n', start)
+
+        if end == -1:
+            yield output[start:].decode('utf-8')
+            return
+
+        yield output[start:end].decode('utf-8')
+        start = end + 1
+
+def _file_size(filename):
+    """
+    It returns the size of a local file, 0 if it does not exist
+    """
+
+    if os.path.isfile(filename):
+        return os.path.getsize(filename)
+
+    return 0
+
+def scp_file(local_filename, server, remote_filename='', upload=True, timeout=None):
+    """
+    It copies a file to a remote server. 
+    The local_filename should be the complete path of the file
+    """
+
+    timeout = command_timeout('scp', timeout)
+    backend = backends.get(server)
+
+    if backend is None:
+        command_line = _build_scp_command(local_filename, server, remote_filename, upload)
+    else:
+        command_line = [ 'scp', local_filename, server + ':' + remote_filename ]
+
+    try:
+        with _Invocation('scp', server, command_line) as invocation:
+            if upload:
+                invocation.bytes_out += _file_size(local_filename)
+
+            if backend is None:
+                output = _execute_command(command_line, timeout)
+            else:
+                output = _execute_backend(backend, command_line)
+
+            if not upload:
+                invocation.bytes_in += _file_size(local_filename)
+
+    except CommandTimeout as e:
+        e.server = server
+        _record_timeout(server, 'scp', timeout)
+        raise e
+
+def _batch_script(commands, marker):
+    """
+    It creates the shell script that executes several commands one
+    after the other, framing the stdout, stderr and exit code of each
+    one of them between marker lines
+    """
+
+    script = 'alde_err=$(mktemp)\n'
+
+    for i, command in enumerate(commands):
+        script += "printf '%s\\n' '" + marker + ":O:" + str(i) + "'\n"
+        script += '( ' + command + '\n) </dev/null 2>"$alde_err"\n'
+        script += 'alde_rc=$?\n'
+        script += "printf '\\n%s\\n' '" + marker + ":E:" + str(i) + "'\n"
+        script += 'cat "$alde_err"\n'
+        script += "printf '\\n%s\\n' \"" + marker + ":R:" + str(i) + ":$alde_rc\"\n"
+
+    script += 'rm -f "$alde_err"\n'
+
+    return script
+
+def _parallel_batch_script(commands, marker, parallel):
+    """
+    It creates the shell script that executes several commands in
+    groups of parallel commands at the same time. The stdout, stderr
+    and exit code of each command are kept in files and printed at the
+    end, in the same order and framing as _batch_script.
+    """
+
+    script = 'alde_dir=$(mktemp -d)\n'
+
+    for i, command in enumerate(commands):
+        files = '"$alde_dir/' + str(i)
+        script += '{ ( ' + command + '\n) </dev/null >' + files + '.out" 2>' + files + '.err"; echo $? >' + files + '.rc"; } &\n'
+
+        if (i + 1) % parallel == 0:
+            script += 'wait\n'
+
+    script += 'wait\n'
+
+    for i, command in enumerate(commands):
+        files = '"$alde_dir/' + str(i)
+        script += "printf '%s\\n' '" + marker + ":O:" + str(i) + "'\n"
+        script += 'cat ' + files + '.out"\n'
+        script += "printf '\\n%s\\n' '" + marker + ":E:" + str(i) + "'\n"
+        script += 'cat ' + files + '.err"\n'
+        script += "printf '\\n%s\\n' \"" + marker + ":R:" + str(i) + ":$(cat " + files + ".rc\" 2>/dev/null || echo 255)\"\n"
+
+    script += 'rm -rf "$alde_dir"\n'
+
+    return script
+
+def _parse_batch_output(commands, marker, output):
+    """
+    It splits the output of a batch script into one BatchResult
+    per command
+    """
+
+    results = []
+    marker = marker.encode('utf-8')
+    position = 0
+
+    for i, command in enumerate(commands):
+        index = str(i).encode('utf-8')
+        out_mark = marker + b':O:' + index + b'\n'
+        err_mark = b'\n' + marker + b':E:' + index + b'\n'
+        rc_mark = b'\n' + marker + b':R:' + index + b':'
+
+        start = output.find(out_mark, position)
+        middle = output.find(err_mark, start)
+        end = output.find(rc_mark, middle)
+
+        if start == -1 or middle == -1 or end == -1:
+            # The batch was interrupted before this command finished
+            results.append(BatchResult(command, b'', b'', None))
+            position = len(output)
+            continue
+
+        rc_end = output.find(b'\n', end + len(rc_mark))
+        if rc_end == -1:
+            rc_end = len(output)
+
+        results.append(BatchResult(command,
+                                   output[start + len(out_mark):middle],
+                                   output[middle + len(err_mark):end],
+                                   int(output[end + len(rc_mark):rc_end])))
+        position = rc_end
+
+    return results
+
+def execute_batch(commands, server='', timeout=None, cancel=None, parallel=1):
+    """
+    It executes a list of commands in a single shell, via ssh if a
+    server is given, so all of them cost only one round trip.
+
+    Each command can be a string or a tuple (command, params).
+    It returns a list of BatchResult with the stdout, stderr and
+    exit code of each command, in the same order.
+
+    If parallel is bigger than one, that number of commands run at the
+    same time in the remote shell, for example the ssh to each one of
+    the nodes from the login node.
+
+    The timeout applies to the whole batch.
+    """
+
+    commands = [ command if type(command) is str else _command_line([ command[0] ] + list(command[1]))[1:] for command in commands ]
+
+    if len(commands) == 0:
+        return []
+
+    if server in backends:
+        results = backends[server].execute_batch(commands)
+        return [ BatchResult(command, output, error, returncode) for command, (returncode, output, error) in zip(commands, results) ]
+
+    marker = 'ALDE-' + uuid.uuid4().hex
+    if parallel > 1:
+        script = _parallel_batch_script(commands, marker, parallel)
+    else:
+        script = _batch_script(commands, marker)
+
+    if server != '':
+        output = execute_command(shlex.quote(script), server, timeout=timeout, cancel=cancel)
+    else:
+        output = execute_command(script, timeout=timeout, cancel=cancel)
+
+    return _parse_batch_output(commands, marker, output)
+
+def set_endpoint_concurrency(server, limit):
+    """
+    It sets the maximum number of commands that the asyncio engine
+    runs at the same time against an endpoint
+    """
+
+    endpoint_concurrency[server] = limit
+
+def _endpoint_semaphore(server):
+    """
+    It returns the semaphore that limits the concurrent commands
+    against an endpoint. Semaphores are kept per event loop.
+    """
+
+    loop = asyncio.get_event_loop()
+    semaphores = _semaphores.setdefault(loop, {})
+
+    if server not in semaphores:
+        limit = endpoint_concurrency.get(server, DEFAULT_ENDPOINT_CONCURRENCY)
+        semaphores[server] = asyncio.Semaphore(limit)
+
+    return semaphores[server]
+
+async def _execute_command_async(command, timeout=None):
+    """
+    Asyncio version of _execute_command, the command runs as a
+    subprocess without blocking the event loop. If the task is
+    cancelled or times out the command is killed.
+    """
+
+    cmd = _command_line(command)
+
+    logging.info("Executing:" + cmd)
+
+    process = await asyncio.create_subprocess_shell(cmd, stdout=subprocess.PIPE, start_new_session=True)
+
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill_process_group(process)
+        await process.wait()
+        raise CommandTimeout(cmd, timeout)
+    except asyncio.CancelledError:
+        _kill_process_group(process)
+        raise
+
+    if process.returncode != 0:
+        e = subprocess.CalledProcessError(returncode=process.returncode, cmd=cmd, output=output)
+        logging.error("Trying to execute command: " + str(cmd))
+        logging.error('Error: %s', str(e))
+        logging.error(e.stdout)
+        raise e
+
+    return output
+
+async def execute_command_async(command, server='', params=[], timeout=None):
+    """
+    Asyncio version of execute_command. The number of commands
+    running at the same time against the same server it is limited
+    by its endpoint concurrency.
+    """
+
+    timeout = command_timeout(command, timeout)
+    backend = backends.get(server)
+    command_line = _build_command(command, server if backend is None else '', params)
+
+    async with _endpoint_semaphore(server):
+        try:
+            with _Invocation(command, server, command_line) as invocation:
+                if backend is None:
+                    output = await _execute_command_async(command_line, timeout)
+                else:
+                    output = await asyncio.get_event_loop().run_in_executor(None, _execute_backend, backend, command_line)
+
+                invocation.bytes_in = len(output)
+                return output
+
+        except CommandTimeout as e:
+            e.server = server
+            _record_timeout(server, command, timeout)
+            raise e
+
+        except subprocess.CalledProcessError as e:
+            logging.error("Trying to execute command at server " + server)
+            raise e
+
+async def scp_file_async(local_filename, server, remote_filename='', upload=True):
+    """
+    Asyncio version of scp_file
+    """
+
+    async with _endpoint_semaphore(server):
+        await _execute_command_async(_build_scp_command(local_filename, server, remote_filename, upload),
+                                     command_timeout('scp'))
+
+def execute_commands(commands):
+    """
+    It executes a list of commands concurrently using the asyncio
+    engine. Each command is a dict with the keys command, server
+    (optional), params (optional) and timeout (optional).
+
+    It returns a list with the output of each command in the same
+    order, or the exception raised by the command if it failed.
+    """
+
+    async def gather():
+        return await asyncio.gather(*[ execute_command_async(command['command'],
+                                                            command.get('server', ''),
+                                                            command.get('params', []),
+                                                            command.get('timeout')) for command in commands ],
+                                    return_exceptions=True)
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(gather())
+    finally:
+        loop.close()
+
+def maintain_connection_pool():
+    """
+    It health-checks the pooled ssh master connections and closes
+    the ones that have been idle for too long
+    """
+
+    for server in connection_pool.evict_idle():
+        logging.info("Evicted idle ssh connection to: " + server)
+
+    for connection in connection_pool.stats()['connections']:
+        if not connection_pool.check(connection['endpoint']):
+            logging.info("Removed dead ssh connection to: " + connection['endpoint'])
+
+def get_connection_pool_stats():
+    """
+    It returns the statistics of the ssh connection pool
+    """
+
+    return connection_pool.stats()
+
+def get_timeout_stats():
+    """
+    It returns, per endpoint, how many commands timed out
+    """
+
+    with _timeouts_lock:
+        return [ { 'endpoint': entry['endpoint'],
+                   'count': entry['count'],
+                   'last': entry['last'],
+                   'commands': dict(entry['commands']) } for entry in timeouts.values() ]
@@ -0,0 +1,729 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Local stand-in of a SLURM cluster. Testbeds with the SIMULATED protocol
+# execute their commands (sinfo, scontrol, squeue, sacct, sbatch, srun,
+# scancel, enqueue_compss...) against a synthetic cluster instead of
+# connecting to a real one, so ALDE can be load tested without a cluster.
+#
+
+import collections
+import hostlist
+import itertools
+import logging
+import random
+import shell
+import shlex
+import threading
+import time
+from models import Testbed
+
+# Default configuration of a simulated cluster, it can be changed for each
+# testbed with the 'simulator' dict of its extra_config
+DEFAULT_CONFIG = {
+    'nodes': 16,
+    'partitions': [ 'bullx' ],
+    'node_prefix': 'nd',
+    'sockets': 2,
+    'cores_per_socket': 8,
+    'memory': 64000,
+    'gpus_per_node': 0,
+    'gpu_type': 'tesla2075',
+    'arrival_rate': 0.0,
+    'job_duration': 300,
+    'max_job_nodes': 4,
+    'failure_rate': 0.0,
+    'latency': 0.0,
+    'history': 10000,
+    'seed': None
+}
+
+SQUEUE_HEADER = '             JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)'
+SQUEUE_STATES = { 'PENDING': 'PD', 'RUNNING': 'R' }
+SACCT_WIDTHS = { 'JobID': 12, 'JobName': 10, 'NNodes': 8, 'State': 10, 'ExitCode': 8,
+                 'DerivedExitcode': 15, 'DerivedExitCode': 15, 'Comment': 14 }
+
+clusters = {}
+
+def _duration(seconds):
+    """
+    It formats seconds in the squeue TIME format
+    """
+
+    seconds = int(seconds)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+
+    if hours > 0:
+        return '%d:%02d:%02d' % (hours, minutes, seconds)
+
+    return '%d:%02d' % (minutes, seconds)
+
+class SimulatedCluster():
+    """
+    Synthetic SLURM cluster. Jobs submitted by ALDE and background jobs,
+    arriving at arrival_rate jobs per second, run for an exponentially
+    distributed time with mean job_duration seconds and fail with a
+    probability of failure_rate. Each command takes latency seconds.
+    """
+
+    def __init__(self, config={}, clock=time.time):
+        """Initializes the cluster with all its nodes idle"""
+
+        self.config = dict(DEFAULT_CONFIG)
+        self.config.update(config)
+        self.clock = clock
+        self.random = random.Random(self.config['seed'])
+        self.lock = threading.RLock()
+        self.boot_time = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(clock()))
+
+        self.nodes = collections.OrderedDict()
+        partitions = self.config['partitions']
+
+        for i in range(1, self.config['nodes'] + 1):
+            name = self.config['node_prefix'] + str(i)
+            self.nodes[name] = { 'name': name,
+                                 'partition': partitions[(i - 1) * len(partitions) // self.config['nodes']],
+                                 'job': None,
+                                 'drain': False,
+                                 'reason': None }
+
+        self.idle = collections.OrderedDict((name, True) for name in self.nodes)
+        self.jobs = collections.OrderedDict()
+        self.running = {}
+        self.pending = collections.deque()
+        self.next_job_id = 1000
+        self.last_update = clock()
+        self.next_arrival = self._next_arrival(self.last_update)
+
+    def _next_arrival(self, now):
+        """
+        It returns when the next background job arrives
+        """
+
+        if self.config['arrival_rate'] <= 0:
+            return None
+
+        return now + self.random.expovariate(self.config['arrival_rate'])
+
+    def _cpus(self):
+        """
+        It returns the number of cpus of each node
+        """
+
+        return self.config['sockets'] * self.config['cores_per_socket']
+
+    def submit(self, nodes=1, name='job', user='alde', partition=None):
+        """
+        It submits a new job and returns its id
+        """
+
+        with self.lock:
+            self._update()
+
+            self.next_job_id += 1
+            job = { 'id': self.next_job_id,
+                    'name': name,
+                    'user': user,
+                    'partition': partition or self.config['partitions'][0],
+                    'num_nodes': max(1, min(int(nodes), len(self.nodes))),
+                    'nodes': [],
+                    'state': 'PENDING',
+                    'exit_code': '0:0',
+                    'submit': self.clock(),
+                    'start': None,
+                    'end': None }
+
+            self.jobs[job['id']] = job
+            self.pending.append(job['id'])
+            self._schedule(self.clock())
+
+            while len(self.jobs) > self.config['history']:
+                oldest = next(iter(self.jobs))
+                if self.jobs[oldest]['state'] in ('PENDING', 'RUNNING'):
+                    break
+                del self.jobs[oldest]
+
+            return job['id']
+
+    def cancel(self, job_id):
+        """
+        It cancels a job, it returns False if the job does not exist
+        """
+
+        with self.lock:
+            self._update()
+            job = self.jobs.get(int(job_id))
+
+            if job is None:
+                return False
+
+            if job['state'] in ('PENDING', 'RUNNING'):
+                self._finish(job, 'CANCELLED', '0:15', self.clock())
+                self._schedule(self.clock())
+
+            return True
+
+    def _finish(self, job, state, exit_code, now):
+        """
+        It finishes a job and frees its nodes
+        """
+
+        if job['state'] == 'PENDING':
+            self.pending.remove(job['id'])
+
+        self.running.pop(job['id'], None)
+
+        job['state'] = state
+        job['exit_code'] = exit_code
+        job['end'] = now
+
+        for name in job['nodes']:
+            node = self.nodes[name]
+            node['job'] = None
+            if not node['drain']:
+                self.idle[name] = True
+
+    def _schedule(self, now):
+        """
+        It starts the pending jobs, in order, while there are idle nodes
+        """
+
+        while len(self.pending) > 0:
+            job = self.jobs[self.pending[0]]
+
+            if job['num_nodes'] > len(self.idle):
+                return
+
+            self.pending.popleft()
+            names = list(itertools.islice(self.idle, job['num_nodes']))
+
+            for name in names:
+                del self.idle[name]
+                self.nodes[name]['job'] = job['id']
+
+            job['nodes'] = names
+            self.running[job['id']] = job
+            job['state'] = 'RUNNING'
+            job['start'] = now
+            job['duration'] = self.random.expovariate(1.0 / self.config['job_duration'])
+
+    def _update(self):
+        """
+        It advances the state of the cluster until now, finishing the
+        jobs that ended and submitting the background jobs that arrived
+        """
+
+        now = self.clock()
+
+        while self.next_arrival is not None and self.next_arrival <= now:
+            self.next_job_id += 1
+            job = { 'id': self.next_job_id,
+                    'name': 'background',
+                    'user': 'sim',
+                    'partition': self.random.choice(self.config['partitions']),
+                    'num_nodes': self.random.randint(1, self.config['max_job_nodes']),
+                    'nodes': [],
+                    'state': 'PENDING',
+                    'exit_code': '0:0',
+                    'submit': self.next_arrival,
+                    'start': None,
+                    'end': None }
+            self.jobs[job['id']] = job
+            self.pending.append(job['id'])
+            self._finish_ended(self.next_arrival)
+            self._schedule(self.next_arrival)
+            self.next_arrival = self._next_arrival(self.next_arrival)
+
+        self._finish_ended(now)
+        self._schedule(now)
+        self.last_update = now
+
+    def _finish_ended(self, now):
+        """
+        It finishes the running jobs that reached their end time
+        """
+
+        for job in list(self.running.values()):
+            if job['start'] + job['duration'] <= now:
+                if self.random.random() < self.config['failure_rate']:
+                    self._finish(job, 'FAILED', '1:0', job['start'] + job['duration'])
+                else:
+                    self._finish(job, 'COMPLETED', '0:0', job['start'] + job['duration'])
+
+    def _node_state(self, node):
+        """
+        It returns the scontrol state of a node
+        """
+
+        state = 'ALLOCATED' if node['job'] is not None else 'IDLE'
+
+        if node['drain']:
+            state = state + '+DRAIN'
+
+        return state
+
+    def _sinfo_state(self, node):
+        """
+        It returns the sinfo state of a node
+        """
+
+        if node['drain']:
+            return 'drng' if node['job'] is not None else 'drain'
+
+        return 'alloc' if node['job'] is not None else 'idle'
+
+    def sinfo(self, args):
+        """
+        sinfo: one line per partition and node state
+        """
+
+        lines = [ 'PARTITION AVAIL  TIMELIMIT  NODES  STATE NODELIST' ]
+        groups = collections.OrderedDict()
+
+        for node in self.nodes.values():
+            groups.setdefault((node['partition'], self._sinfo_state(node)), []).append(node['name'])
+
+        for (partition, state), names in groups.items():
+            lines.append('%-9s %5s %10s %6d %6s %s' % (partition, 'up', 'infinite', len(names), state, hostlist.compress(names)))
+
+        return 0, '\n'.join(lines) + '\n', ''
+
+    def _gres(self):
+        """
+        It returns the Gres field of the nodes
+        """
+
+        if self.config['gpus_per_node'] > 0:
+            return 'gpu:' + self.config['gpu_type'] + ':' + str(self.config['gpus_per_node'])
+
+        return '(null)'
+
+    def scontrol(self, args):
+        """
+        scontrol show node and scontrol update NodeName=... State=...
+        """
+
+        if 'update' in args:
+            fields = dict(arg.split('=', 1) for arg in args if '=' in arg)
+            node = self.nodes.get(fields.get('NodeName', fields.get('nodename')))
+
+            if node is None:
+                return 1, '', 'scontrol: error: Invalid node name specified\n'
+
+            state = fields.get('State', fields.get('state', '')).upper()
+
+            if state in ('DRAIN', 'DOWN'):
+                node['drain'] = True
+                node['reason'] = fields.get('Reason', fields.get('reason', 'simulated'))
+                self.idle.pop(node['name'], None)
+            elif state in ('IDLE', 'RESUME'):
+                node['drain'] = False
+                node['reason'] = None
+                if node['job'] is None:
+                    self.idle[node['name']] = True
+                self._schedule(self.clock())
+
+            return 0, '', ''
+
+        cpus = self._cpus()
+        lines = []
+
+        for node in self.nodes.values():
+            allocated = cpus if node['job'] is not None else 0
+            line = ('NodeName=%s Arch=x86_64 CoresPerSocket=%d CPUAlloc=%d CPUErr=0 CPUTot=%d CPULoad=%.2f '
+                    'Features=(null) Gres=%s NodeAddr=%s NodeHostName=%s Version=17.02 OS=Linux '
+                    'RealMemory=%d AllocMem=0 Sockets=%d Boards=1 State=%s ThreadsPerCore=1 TmpDisk=0 Weight=1 '
+                    'Partitions=%s BootTime=%s SlurmdStartTime=%s CurrentWatts=n/s LowestJoules=n/s '
+                    'ConsumedJoules=n/s ExtSensorsJoules=n/s ExtSensorsWatts=0 ExtSensorsTemp=n/s') % (
+                    node['name'], self.config['cores_per_socket'], allocated, cpus, allocated * 0.9,
+                    self._gres(), node['name'], node['name'], self.config['memory'], self.config['sockets'],
+                    self._node_state(node), node['partition'], self.boot_time, self.boot_time)
+
+            if node['reason']:
+                line = line + ' Reason=' + node['reason']
+
+            lines.append(line)
+
+        return 0, '\n'.join(lines) + '\n', ''
+
+    def _options(self, args):
+        """
+        It parses the command options into a dict, -o X and --opt=X forms
+        """
+
+        options = {}
+        positional = []
+        i = 0
+
+        while i < len(args):
+            arg = args[i]
+
+            if arg.startswith('--') and '=' in arg:
+                key, value = arg[2:].split('=', 1)
+                options[key] = value
+            elif arg.startswith('-') and len(arg) > 2 and arg[1] != '-':
+                options[arg[1]] = arg[2:].strip()
+            elif arg in ('-j', '-o', '-N', '-n') and i + 1 < len(args):
+                options[arg[1]] = args[i + 1]
+                i += 1
+            elif arg.startswith('-'):
+                options[arg.lstrip('-')] = True
+            else:
+                positional.append(arg)
+
+            i += 1
+
+        return options, positional
+
+    def _job_ids(self, value):
+        """
+        It returns the list of job ids of a -j option
+        """
+
+        return [ int(job_id.split('.')[0]) for job_id in str(value).split(',') if job_id.strip() ]
+
+    def squeue(self, args):
+        """
+        squeue with the -j, --name, -h and -o %N / %A options
+        """
+
+        options, _ = self._options(args)
+        jobs = [ job for job in self.jobs.values() if job['state'] in ('PENDING', 'RUNNING') ]
+
+        if 'j' in options:
+            ids = self._job_ids(options['j'])
+            jobs = [ job for job in jobs if job['id'] in ids ]
+
+            if len(jobs) == 0:
+                return 1, '', 'slurm_load_jobs error: Invalid job id specified\n'
+
+        if 'name' in options:
+            jobs = [ job for job in jobs if job['name'] == options['name'] ]
+
+        output_format = options.get('o', None)
+        if output_format is not None:
+            output_format = output_format.strip('"\'')
+
+        lines = []
+        now = self.clock()
+
+        if output_format == '%N':
+            if 'h' not in options:
+                lines.append('NODELIST')
+            lines.extend(hostlist.compress(job['nodes']) for job in jobs)
+        elif output_format == '%A':
+            if 'h' not in options:
+                lines.append('JOBID')
+            lines.extend(str(job['id']) for job in jobs)
+        else:
+            if 'h' not in options:
+                lines.append(SQUEUE_HEADER)
+            for job in jobs:
+                running = now - job['start'] if job['start'] is not None else 0
+                nodelist = hostlist.compress(job['nodes']) if job['nodes'] else '(Resources)'
+                lines.append('%18d %9s %8s %8s %2s %10s %6d %s' % (job['id'], job['partition'], job['name'][:8], job['user'][:8],
+                                                                  SQUEUE_STATES[job['state']], _duration(running),
+                                                                  job['num_nodes'], nodelist))
+
+        return 0, ''.join(line + '\n' for line in lines), ''
+
+    def sacct(self, args):
+        """
+        sacct -j ids -o fields, with the --parsable2 and -n/--noheader options
+        """
+
+        options, _ = self._options(args)
+        fields = str(options.get('o', options.get('format', 'JobID,JobName,State,ExitCode'))).strip('"\'').split(',')
+        parsable = 'P' in options or 'parsable2' in options
+        ids = self._job_ids(options['j']) if 'j' in options else list(self.jobs.keys())
+        rows = []
+
+        for job_id in ids:
+            job = self.jobs.get(job_id)
+
+            if job is None:
+                continue
+
+            values = { 'JobID': str(job['id']),
+                       'JobName': job['name'],
+                       'NNodes': str(job['num_nodes']),
+                       'State': job['state'],
+                       'ExitCode': job['exit_code'],
+                       'DerivedExitcode': job['exit_code'],
+                       'DerivedExitCode': job['exit_code'],
+                       'Comment': '' }
+            rows.append([ values.get(field, '') for field in fields ])
+
+            if job['state'] not in ('PENDING', 'RUNNING'):
+                values['JobID'] = str(job['id']) + '.batch'
+                values['JobName'] = 'batch'
+                rows.append([ values.get(field, '') if field not in ('DerivedExitcode', 'DerivedExitCode') else '' for field in fields ])
+
+        lines = []
+
+        if parsable:
+            if 'n' not in options and 'noheader' not in options:
+                lines.append('|'.join(fields))
+            lines.extend('|'.join(row) for row in rows)
+        else:
+            widths = [ SACCT_WIDTHS.get(field, 10) for field in fields ]
+            if 'n' not in options and 'noheader' not in options:
+                lines.append(' '.join(field.rjust(width) for field, width in zip(fields, widths)) + ' ')
+                lines.append(' '.join('-' * width for width in widths) + ' ')
+            lines.extend(' '.join(value.ljust(width) if i == 0 else value.rjust(width)
+                                  for i, (value, width) in enumerate(zip(row, widths))) + ' ' for row in rows)
+
+        return 0, ''.join(line + '\n' for line in lines), ''
+
+    def sbatch(self, args):
+        """
+        sbatch script: the job always uses one node
+        """
+
+        options, positional = self._options(args)
+        name = positional[0].split('/')[-1] if len(positional) > 0 else 'sbatch'
+        job_id = self.submit(options.get('N', 1), name=name)
+
+        return 0, 'Submitted batch job ' + str(job_id) + '\n', ''
+
+    def srun(self, args):
+        """
+        srun -N nodes ...: it is launched in background by ALDE
+        """
+
+        options, positional = self._options(args)
+        self.submit(options.get('N', 1), name=positional[0].split('/')[-1] if len(positional) > 0 else 'srun')
+
+        return 0, '', ''
+
+    def scancel(self, args):
+        """
+        scancel ids
+        """
+
+        for job_id in args:
+            if not self.cancel(job_id):
+                return 1, '', 'scancel: error: Kill job error on job id ' + job_id + ': Invalid job id specified\n'
+
+        return 0, '', ''
+
+    def enqueue_compss(self, args):
+        """
+        enqueue_compss --num_nodes=N ...: it prints the COMPSs banner and
+        the id of the submitted job
+        """
+
+        options, _ = self._options(args)
+        job_id = self.submit(options.get('num_nodes', 1), name='COMPSs')
+
+        return 0, ('SC Configuration:          default.cfg\n'
+                   'Queue:                     default\n'
+                   'Num Nodes:                 ' + str(options.get('num_nodes', 1)) + '\n'
+                   'Exec-Time:                 ' + str(options.get('exec_time', 0)) + '\n'
+                   'Submitted batch job ' + str(job_id) + '\n'), ''
+
+    def adapt_compss_resources(self, args):
+        """
+        adapt_compss_resources master_node job_id CREATE|REMOVE SLURM-Cluster ...
+        """
+
+        if len(args) < 3 or self.jobs.get(int(args[1])) is None:
+            return 1, '', 'Error: no such COMPSs job\n'
+
+        if args[2] == 'CREATE':
+            name = 'compss-' + args[1] + '-' + str(self.next_job_id + 1)
+            self.submit(1, name=name)
+            ack = '[Adaptation] Read ACK ' + name
+        else:
+            node = self.nodes.get(args[-1])
+            if node is not None and node['job'] is not None and node['job'] != int(args[1]):
+                self.cancel(node['job'])
+            ack = '[Adaptation] Read ACK'
+
+        return 0, ('[Adaptation] writting command ' + ' '.join(args[2:]) + ' on command_pipe\n'
+                   '[Adaptation] Reading result result_pipe\n' + ack + '\n'), ''
+
+    def ssh(self, args):
+        """
+        ssh node command: only /proc/cpuinfo is emulated
+        """
+
+        while len(args) > 1 and args[0] == '-o':
+            args = args[2:]
+
+        if len(args) == 0 or args[0] not in self.nodes:
+            return 255, '', 'ssh: Could not resolve hostname\n'
+
+        if not any('cpuinfo' in arg for arg in args[1:]):
+            return 0, '', ''
+
+        processors = []
+        for processor in range(self._cpus()):
+            processors.append('processor\t: %d\n'
+                              'vendor_id\t: GenuineIntel\n'
+                              'cpu family\t: 6\n'
+                              'model\t\t: 79\n'
+                              'model name\t: Intel(R) Xeon(R) CPU E5-2620 v4 @ 2.10GHz\n'
+                              'stepping\t: 1\n'
+                              'microcode\t: 0xb00001f\n'
+                              'cpu MHz\t\t: 2100.000\n'
+                              'cache size\t: 20480 KB\n'
+                              'physical id\t: %d\n'
+                              'siblings\t: %d\n'
+                              'core id\t\t: %d\n'
+                              'cpu cores\t: %d\n'
+                              'fpu\t\t: yes\n'
+                              'fpu_exception\t: yes\n'
+                              'wp\t\t: yes\n'
+                              'flags\t\t: fpu vme de pse tsc msr pae mce\n'
+                              'bogomips\t: 4200.00\n' % (processor,
+                                                         processor // self.config['cores_per_socket'],
+                                                         self.config['cores_per_socket'],
+                                                         processor % self.config['cores_per_socket'],
+                                                         self.config['cores_per_socket']))
+
+        return 0, '\n'.join(processors) + '\n', ''
+
+    def _run(self, args):
+        """
+        It runs one simple command, the commands that are not emulated
+        (source, sleep, mkdir...) just succeed
+        """
+
+        if len(args) == 0:
+            return 0, '', ''
+
+        command = args[0].split('/')[-1]
+
+        if command in ('sinfo', 'scontrol', 'squeue', 'sacct', 'sbatch', 'srun', 'scancel',
+                       'enqueue_compss', 'adapt_compss_resources', 'ssh'):
+            return getattr(self, command)(args[1:])
+
+        return 0, '', ''
+
+    def _wait(self):
+        """
+        It waits the configured latency of a round trip to the cluster
+        """
+
+        if self.config['latency'] > 0:
+            time.sleep(self.random.uniform(0.5, 1.5) * self.config['latency'])
+
+    def execute(self, command_line):
+        """
+        It executes a command line, with several commands separated by ;
+        && || | or &, and returns its exit code, stdout and stderr as bytes
+        """
+
+        self._wait()
+
+        return self._execute(command_line)
+
+    def execute_batch(self, command_lines):
+        """
+        It executes several command lines in one single round trip
+        """
+
+        self._wait()
+
+        return [ self._execute(command_line) for command_line in command_lines ]
+
+    def _execute(self, command_line):
+        """
+        It executes a command line without waiting for the latency
+        """
+
+        lexer = shlex.shlex(command_line, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        tokens = list(lexer)
+
+        output = ''
+        error = ''
+        returncode = 0
+        args = []
+        tokens.append(';')
+        i = 0
+
+        with self.lock:
+            self._update()
+
+            while i < len(tokens):
+                token = tokens[i]
+
+                if token in (';', '&&', '||', '|', '&', ';;'):
+                    if token == '|' or (token == '&&' and returncode != 0) or (token == '||' and returncode == 0):
+                        args = []
+                    elif len(args) > 0:
+                        returncode, out, err = self._run(args)
+                        output += out
+                        error += err
+                    args = []
+                elif token in ('(', ')'):
+                    pass
+                elif token in ('>', '>>', '<', '>&', '&>', '>|'):
+                    if len(args) > 0 and args[-1].isdigit():
+                        args.pop()
+                    i += 1
+                else:
+                    args.append(token)
+
+                i += 1
+
+        return returncode, output.encode('utf-8'), error.encode('utf-8')
+
+def register(endpoint, config={}):
+    """
+    It creates a simulated cluster for an endpoint and makes the
+    shell module send it the commands of that endpoint
+    """
+
+    cluster = SimulatedCluster(config)
+    clusters[endpoint] = cluster
+    shell.register_backend(endpoint, cluster)
+
+    return cluster
+
+def unregister(endpoint):
+    """
+    It removes the simulated cluster of an endpoint
+    """
+
+    clusters.pop(endpoint, None)
+    shell.unregister_backend(endpoint)
+
+def register_testbed(testbed):
+    """
+    It registers the simulated cluster of a SIMULATED testbed, if it
+    is not already registered. The cluster is configured with the
+    'simulator' dict of the extra_config of the testbed.
+    """
+
+    if testbed.protocol != Testbed.protocol_simulated or testbed.endpoint in clusters:
+        return
+
+    extra_config = testbed.extra_config or {}
+    logging.info("Simulating SLURM cluster for testbed: " + testbed.name)
+    register(testbed.endpoint, extra_config.get('simulator', {}))
+
+def load_testbeds():
+    """
+    It registers the simulated clusters of all the SIMULATED testbeds
+    """
+
+    for testbed in Testbed.query.filter_by(protocol=Testbed.protocol_simulated).all():
+        register_testbed(testbed)
@@ -1,418 +1,743 @@
-#
-# Copyright 2018 Atos Research and Innovation
-#
-# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
-# use this file except in compliance with the License. You may obtain a copy of
-# the License at
-#
-# https://www.gnu.org/licenses/agpl-3.0.txt
-#
-# Unless required by applicable law or agreed to in writing, software
-# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
-# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
-# License for the specific language governing permissions and limitations under
-# the License.
-# 
-# This is being developed for the TANGO Project: http://tango-project.eu
-#
-# Module that has all the logic to talk with SLURM
-#
-
-import re
-import shell
-import copy
-import query
-import logging
-import linux_probes.cpu_info_parser as parser
-import inventory
-from models import db, Testbed, Node, CPU, GPU, Memory
-
-def is_node_idle(nodes, node_name):
-    """
-    For a list of nodes checks if the nodle is idle
-    """
-    node = next(filter(lambda node: node['node_name'] == node_name, nodes), None)
-    
-    if node and node['partition_state'] == 'idle' :
-        return True
-    else :
-        return False
-
-def parse_sinfo_partitions(command_output):
-    """
-    It parses an text in the following format:
-    PARTITION    AVAIL  TIMELIMIT  NODES  STATE NODELIST
-    bullx           up   infinite      1  drain nd15
-    bullx           up   infinite      9   idle nd[10-14,16-19]
-
-    into a list with a struct per node
-    """
-
-    nodes = []
-    lines = command_output.decode('utf-8').split('\n')
-
-    for line in lines:
-
-        if not line.startswith("PARTITION") and line:
-            line = re.sub(' +', ' ', line)
-            words = line.split(' ')
-
-            partition = words[0]
-            avail = words[1]
-            timelimit = words[2]
-            state = words[4]
-            nodes_string = words[5]
-
-            if '[' not in nodes_string:
-                node = { 'partition': partition,
-                         'partition_avail': avail,
-                         'partition_timelimit': timelimit,
-                         'partition_state': state,
-                         'node_name': nodes_string}
-
-                nodes.append(node)
-
-            else:
-                node_start_name = nodes_string.split('[')[0]
-                boundaries = nodes_string.split('[')[1].split(']')[0].split(',')
-                for boundarie in boundaries:
-                    if '-' not in boundarie:
-                        node_name = node_start_name + boundarie
-                        node = { 'partition': partition,
-                                 'partition_avail': avail,
-                                 'partition_timelimit': timelimit,
-                                 'partition_state': state,
-                                 'node_name': node_name}
-
-                        nodes.append(node)
-                    else:
-                        limits = boundarie.split('-')
-                        start = int(limits[0])
-                        end = int(limits[1]) + 1
-
-                        for number in range(start,end):
-                            node_name = node_start_name + str(number)
-                            node = { 'partition': partition,
-                                     'partition_avail': avail,
-                                     'partition_timelimit': timelimit,
-                                     'partition_state': state,
-                                     'node_name': node_name}
-
-                            nodes.append(node)
-
-    return nodes
-
-def get_nodes_testbed(testbed):
-    """
-    This function gets the testbed object information, from that information
-    it determines if the testbed it is of the category SLURM.
-
-    If it is SLURM, it will determine if it connects via ssh.
-
-        If it connects via ssh it will get the node info executing the command
-        via ssh
-
-        If it is not ssh, it will execute directly the sinfo command in console.
-
-    If it is not type SLURM it will just return an empty list
-    """
-
-    command = "sinfo"
-    params = ["-a"]
-
-    if testbed.category == Testbed.slurm_category:
-        if testbed.protocol == Testbed.protocol_local:
-            output = shell.execute_command(command=command, params=params)
-        elif testbed.protocol == Testbed.protocol_ssh:
-            output = shell.execute_command(command=command,
-                                           server=testbed.endpoint,
-                                           params=params)
-        else:
-            return []
-
-        return parse_sinfo_partitions(output)
-    else:
-        return []
-
-def check_nodes_in_db_for_on_line_testbeds():
-    """
-    This function it is going to get all the nodes in the db that are:
-        on-line
-        Type slurm
-
-    To each node it is going to get the nodes and it is going to compare the
-    information with the information in the db. It can happen two things:
-        * If the node is in the db, info it is updated if necessary
-        * If the node is not in the db, it is added
-
-    After that, the method it is going to verify if there is a node that it is
-    in the db but it is not in the list provided. If that happens, the node
-    it is changed to dissabled
-    """
-
-    testbeds = query.get_slurm_online_testbeds()
-
-    for testbed in testbeds:
-        logging.info("Checking node info for testbed: " + testbed.name)
-
-        nodes_from_slurm = get_nodes_testbed(testbed)
-        nodes_names_from_slurm = [x['node_name'] for x in nodes_from_slurm]
-        nodes_names_from_db = []
-        nodes_ids = []
-        for node in testbed.nodes:
-            nodes_names_from_db.append(node.name)
-            nodes_ids.append({'name' : node.name, 'id': node.id})
-
-        nodes_in_slurm_and_db = set(nodes_names_from_slurm).intersection(set(nodes_names_from_db))
-        nodes_in_slurm_and_not_in_db = set(nodes_names_from_slurm).difference(set(nodes_names_from_db))
-        nodes_in_db_and_not_in_slurm = set(nodes_names_from_db).difference(set(nodes_names_from_slurm))
-
-        # We add new nodes if not previously present in the db
-        for node in nodes_in_slurm_and_not_in_db:
-            logging.info("Adding a new node: " + node + " to testbed: " + testbed.name)
-            new_node = Node(name = node, information_retrieved = True)
-            testbed.add_node(new_node)
-            db.session.commit()
-
-        # We check that the nodes in the db are updated if necessary
-        for node in nodes_in_slurm_and_db:
-            interested_nodes = [d for d in nodes_ids if d['name'] == node]
-
-            for node_id in interested_nodes:
-                node_from_db = db.session.query(Node).filter_by(id=node_id['id']).first()
-                if node_from_db.disabled:
-                    logging.info("Enabling node: " + node)
-                    node_from_db.disabled = False
-                    db.session.commit()
-
-        # We check that the nodes not returned by slurm are set to 0
-        for node in nodes_in_db_and_not_in_slurm:
-            interested_nodes = [d for d in nodes_ids if d['name'] == node]
-
-            for node_id in interested_nodes:
-                node_from_db = db.session.query(Node).filter_by(id=node_id['id']).first()
-
-                if not node_from_db.disabled:
-                    logging.info("Disabling node: " + node)
-                    node_from_db.disabled = True
-                    db.session.commit()
-
-def parse_scontrol_information(command_output):
-    """
-    This function will parse all info of the command
-    scontrol -o  --all show node
-
-    This will be used to get information and live stats of the status_code
-    of the node
-    """
-
-    nodes_info = []
-    lines = command_output.decode('utf-8').split('\n')
-
-    r = re.compile(r'(\w+)=([^=]+\s|$)')
-    for line in lines:
-        new_dict = {}
-        for k,v in r.findall(line):
-            new_dict[k] = v.strip()
-
-        nodes_info.append(new_dict)
-
-    return nodes_info
-
-def  update_cpu_node_information():
-    """
-    This method updates the CPU information of nodes in case of
-    on-line SLURM testbeds.
-
-    It is going to try to ssh into the node, if the node is enabled, if an
-    error occours it keeps the node information as it is. If no error occours
-    updates the entries in the db deleting the old CPU information first.
-    """
-
-    testbeds = query.get_slurm_online_testbeds()
-
-    for testbed in testbeds:
-        for node in testbed.nodes:
-            if not node.disabled:
-                cpus = parser.get_cpuinfo_node(testbed, node)
-
-                if cpus != []:
-                    logging.info("Updating CPU info for node: " + node.name)
-                    db.session.query(CPU).filter_by(node_id=node.id).delete()
-                    node.cpus = cpus
-                    db.session.commit()
-                else:
-                    logging.error("Impossible to update CPU info for node: " + node.name)
-
-def get_node_information(testbed):
-    """
-    This function gets the nodes object information, from that information
-    it determines if the testbed it is of the category SLURM.
-
-    If it is SLURM, it will determine if it connects via ssh.
-
-        If it connects via ssh it will get the node info executing the command
-        via ssh
-
-        If it is not ssh, it will execute directly the sinfo command in console.
-
-    If it is not type SLURM it will just return an empty list
-
-    The command to be executed is:
-
-    scontrol -o  --all show node
-    """
-
-    command = "scontrol"
-    params = ["-o", "--all", "show", "node"]
-
-    if testbed.category == Testbed.slurm_category:
-
-        if testbed.protocol == Testbed.protocol_local:
-            output = shell.execute_command(command=command, params=params)
-        elif testbed.protocol == Testbed.protocol_ssh:
-            output = shell.execute_command(command=command,
-                                           server=testbed.endpoint,
-                                           params=params)
-        else:
-            return []
-
-        return parse_scontrol_information(output)
-
-    else:
-        return []
-
-
-def update_node_information():
-    """
-    This function gets all the testbed that are SLURM and have been
-    configured to retrieve all information automatically and
-    update the node information if necessary
-    """
-
-    testbeds = query.get_slurm_online_testbeds()
-
-    for testbed in testbeds:
-
-        nodes_info = get_node_information(testbed)
-
-        for node_info in nodes_info:
-
-            if 'NodeName' in node_info:
-                node = db.session.query(Node).filter_by(
-                            testbed_id=testbed.id,
-                            name=node_info['NodeName']).first()
-
-                if node and 'State' in node_info:
-                    logging.info("Updating information for node: " + node.name + " if necessary")
-                    node.state = node_info['State']
-                    db.session.commit()
-
-                if node and 'RealMemory' in node_info:
-                    logging.info("Updating memory information for node: " + node.name)
-                    db.session.query(Memory).filter_by(node_id=node.id).delete()
-                    memory = Memory(size=node_info['RealMemory'], units=Memory.MEGABYTE)
-                    node.memories = [ memory ]
-                    db.session.commit()
-
-                if node and 'Gres' in node_info:
-                    resources = parse_gre_field_info(node_info['Gres'])
-                    if 'gpu' in resources:
-                        db.session.query(GPU).filter_by(node_id=node.id).delete()
-                        logging.info("Updating gpu information for node: " + node.name)
-                        node.gpus = resources['gpu']
-                        db.session.commit()
-
-def parse_gre_field_info(gre):
-    """
-    This function will parse the GRE field of the scontrol output to know
-    if this specific node of slurm has any kind of special hardware attached
-    to it such as GPUs, Xeon Phis, etc...
-
-    gre field has format like this: gpu:tesla2050:2,bandwidth:lustre:no_consume:4G
-
-    This function will return a dictionary with the relevant information
-    """
-
-    resources = {}
-
-    for resource in gre.split(','):
-
-        resource_info = resource.split(':')
-
-        if resource_info[0] == 'gpu':
-            gpu_model = inventory.find_gpu_slurm(resource_info[1])
-
-            if gpu_model:
-
-                if 'gpu' in resources:
-                    gpus = resources['gpu']
-                else:
-                    gpus = []
-
-                if len(resource_info) == 3:
-                    for i in range(int(resource_info[2])):
-                        gpus.append(copy.deepcopy(gpu_model))
-                else:
-                    gpus.append(gpu_model)
-
-                resources['gpu'] = gpus
-
-    return resources
-
-def execute_srun(testbed, execution_configuration, executable, deployment, singularity=False):
-    """
-    This will execute an slurm application and return the output
-    """
-
-	# Preparing the command to be executed
-    command = "("
-    endpoint = testbed.endpoint
-    params = []
-    params.append("srun")
-    if execution_configuration.num_nodes:
-        params.append("-N")
-        params.append(str(execution_configuration.num_nodes))
-    if execution_configuration.num_gpus_per_node:
-        params.append("--gres=gpu:" + str(execution_configuration.num_gpus_per_node))
-    params.append("-n")
-    params.append(str(execution_configuration.num_cpus_per_node))
-    if execution_configuration.srun_config:
-        params.append(execution_configuration.srun_config)
-    if singularity :
-        params.append('singularity')
-        params.append('run')
-        params.append(deployment.path)
-    else :
-        params.append(executable.executable_file)
-        params.append(execution_configuration.command)
-    params.append(">")
-    params.append("allout.txt")
-    params.append("2>&1")
-    params.append("&")
-    params.append(")")
-    params.append(";")
-    params.append("sleep")
-    params.append("1;")
-    params.append("squeue")
-    
-    logging.info("Launching execution of application: command: " + command + " | endpoint: " + endpoint + " | params: " + str(params))
-    
-    output = shell.execute_command(command, endpoint, params)
-    
-    return output
-
-def stop_execution(execution_id, endpoint):
-    """
-    This will use scontrol to stop an execution
-
-    scontrol suspend 7993
-    """
-
-    command="scontrol"
-    params=["suspend", str(execution_id)]
-
-    if endpoint:
-        shell.execute_command(command=command, server=endpoint, params=params)
-    else :
-        shell.execute_command(command=command, params=params)
\ No newline at end of file
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+# 
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Module that has all the logic to talk with SLURM
+#
+
+import collections
+import functools
+import hashlib
+import re
+import fanout
+import polling
+import hostlist
+import shell
+import command_cache
+import copy
+import query
+import logging
+import linux_probes.cpu_info_parser as parser
+import inventory
+from models import db, Testbed, Node, CPU, GPU, Memory
+from sqlalchemy import orm
+
+# Maximum number of values of an IN clause, SQLite supports 999 variables
+SQL_IN_CHUNK = 500
+
+def is_node_idle(nodes, node_name):
+    """
+    For a list of nodes checks if the nodle is idle
+    """
+    node = next(filter(lambda node: node['node_name'] == node_name, nodes), None)
+    
+    if node and node['partition_state'] == 'idle' :
+        return True
+    else :
+        return False
+
+def parse_sinfo_partitions(command_output):
+    """
+    It parses an text in the following format:
+    PARTITION    AVAIL  TIMELIMIT  NODES  STATE NODELIST
+    bullx           up   infinite      1  drain nd15
+    bullx           up   infinite      9   idle nd[10-14,16-19]
+
+    into a list with a struct per node
+    """
+
+    return list(iter_sinfo_partitions(command_output))
+
+def iter_sinfo_partitions(command_output):
+    """
+    Generator version of parse_sinfo_partitions, it yields the struct
+    of each node while the output is read. The output can be the
+    bytes of the command or an iterable of lines.
+    """
+
+    for line in shell.iter_lines(command_output):
+
+        if not line.startswith("PARTITION") and line:
+            line = re.sub(' +', ' ', line)
+            words = line.split(' ')
+
+            partition = words[0]
+            avail = words[1]
+            timelimit = words[2]
+            state = words[4]
+            nodes_string = words[5]
+
+            for node_name in hostlist.expand(nodes_string):
+                node = { 'partition': partition,
+                         'partition_avail': avail,
+                         'partition_timelimit': timelimit,
+                         'partition_state': state,
+                         'node_name': node_name}
+
+                yield node
+
+def get_nodes_testbed(testbed):
+    """
+    This function gets the testbed object information, from that information
+    it determines if the testbed it is of the category SLURM.
+
+    If it is SLURM, it will determine if it connects via ssh.
+
+        If it connects via ssh it will get the node info executing the command
+        via ssh
+
+        If it is not ssh, it will execute directly the sinfo command in console.
+
+    If it is not type SLURM it will just return an empty list
+
+    The result is cached for a few seconds, so the different scheduler
+    jobs share it.
+    """
+
+    command = "sinfo"
+    params = ["-a"]
+
+    if testbed.category == Testbed.slurm_category:
+        if testbed.protocol == Testbed.protocol_local:
+            return command_cache.cached('', command, params,
+                lambda: list(iter_sinfo_partitions(shell.execute_command_stream(command=command, params=params))))
+        elif testbed.protocol in (Testbed.protocol_ssh, Testbed.protocol_simulated):
+            return command_cache.cached(testbed.endpoint, command, params,
+                lambda: list(iter_sinfo_partitions(shell.execute_command_stream(command=command,
+                                                                                server=testbed.endpoint,
+                                                                                params=params))))
+        else:
+            return []
+    else:
+        return []
+
+def check_nodes_in_db_for_on_line_testbeds():
+    """
+    This function it is going to get all the nodes in the db that are:
+        on-line
+        Type slurm
+
+    To each node it is going to get the nodes and it is going to compare the
+    information with the information in the db. It can happen two things:
+        * If the node is in the db, info it is updated if necessary
+        * If the node is not in the db, it is added
+
+    After that, the method it is going to verify if there is a node that it is
+    in the db but it is not in the list provided. If that happens, the node
+    it is changed to dissabled
+
+    The nodes of a testbed are loaded in one query, the new ones inserted in
+    bulk and the disabled flag changed with one UPDATE per state, all of it
+    in a single transaction per testbed.
+
+    The sinfo command of all the testbeds is executed at the same time, the
+    db is updated from this thread as each testbed answers.
+
+    If the testbed does not answer in time it is skipped until the next run
+    """
+
+    testbeds = [ fanout.remote_testbed(testbed) for testbed in query.get_slurm_online_testbeds() ]
+
+    for testbed, future in fanout.each(get_nodes_testbed, testbeds):
+        logging.info("Checking node info for testbed: " + testbed.name)
+
+        try:
+            nodes_from_slurm = future.result()
+        except shell.CommandTimeout:
+            logging.error("Timeout checking node info for testbed: " + testbed.name)
+            continue
+
+        update_testbed_nodes(testbed, [ x['node_name'] for x in nodes_from_slurm ])
+
+def update_testbed_nodes(testbed, node_names):
+    """
+    It adds the new nodes of a testbed, enables the nodes in the list of
+    names returned by sinfo and disables the other ones, in a single
+    transaction
+    """
+
+    # A node appears once per partition, the order of sinfo is kept
+    nodes_names_from_slurm = list(collections.OrderedDict.fromkeys(node_names))
+    nodes_in_slurm = set(nodes_names_from_slurm)
+
+    nodes_from_db = {}
+    for node_id, name, disabled in db.session.query(Node.id, Node.name, Node.disabled).filter_by(testbed_id=testbed.id):
+        nodes_from_db.setdefault(name, []).append((node_id, disabled))
+
+    # We add new nodes if not previously present in the db
+    new_nodes = []
+    for name in nodes_names_from_slurm:
+        if name not in nodes_from_db:
+            logging.info("Adding a new node: " + name + " to testbed: " + testbed.name)
+            new_nodes.append({ 'name': name, 'information_retrieved': True, 'testbed_id': testbed.id })
+
+    if new_nodes:
+        db.session.bulk_insert_mappings(Node, new_nodes)
+
+    # We enable the nodes returned by slurm and disable the other ones
+    nodes_to_enable = []
+    nodes_to_disable = []
+
+    for name in sorted(nodes_from_db):
+        for node_id, disabled in nodes_from_db[name]:
+            if name in nodes_in_slurm and disabled:
+                logging.info("Enabling node: " + name)
+                nodes_to_enable.append(node_id)
+            elif name not in nodes_in_slurm and not disabled:
+                logging.info("Disabling node: " + name)
+                nodes_to_disable.append(node_id)
+
+    _update_nodes_disabled(nodes_to_enable, False)
+    _update_nodes_disabled(nodes_to_disable, True)
+
+    db.session.commit()
+
+def _update_nodes_disabled(node_ids, disabled):
+    """
+    It sets the disabled flag of the given nodes. The ids are sent in
+    groups so the query does not go over the SQLite variables limit.
+    """
+
+    for i in range(0, len(node_ids), SQL_IN_CHUNK):
+        db.session.query(Node).filter(Node.id.in_(node_ids[i:i + SQL_IN_CHUNK])).update({ Node.disabled: disabled },
+                                                                                         synchronize_session=False)
+
+class ScontrolNode():
+    """
+    Information of a node from the output of scontrol -o show node. The
+    fields not requested to the parser are None.
+
+    state keeps the text printed by SLURM (IDLE+DRAIN), base_state and
+    state_flags have it split (IDLE and ('DRAIN',)). gres is a tuple of
+    GresEntry and fields has, as text, the requested fields that do not
+    have an attribute.
+    """
+
+    __slots__ = ('name', 'state', 'base_state', 'state_flags', 'real_memory', 'cpu_total', 'cpu_alloc',
+                 'free_memory', 'gres', 'boot_time', 'reason', 'fields')
+
+    def __init__(self, name):
+        """Initializes the record of a node without any field"""
+
+        self.name = name
+        self.state = None
+        self.base_state = None
+        self.state_flags = ()
+        self.real_memory = None
+        self.cpu_total = None
+        self.cpu_alloc = None
+        self.free_memory = None
+        self.gres = None
+        self.boot_time = None
+        self.reason = None
+        self.fields = {}
+
+    def __repr__(self):
+        return 'ScontrolNode(' + self.name + ')'
+
+GresEntry = collections.namedtuple('GresEntry', ['name', 'type', 'count'])
+
+# Fields needed by update_node_information
+NODE_INFORMATION_FIELDS = ('State', 'RealMemory', 'Gres', 'BootTime')
+
+# Symbols SLURM appends to the state of a node
+_state_suffixes = { '*': 'NOT_RESPONDING', '~': 'POWERED_DOWN', '#': 'POWERING_UP', '%': 'POWERING_DOWN',
+                    '!': 'POWER_DOWN', '$': 'MAINTENANCE', '@': 'REBOOT', '^': 'REBOOT_ISSUED', '-': 'PLANNED' }
+_gres_multipliers = { 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4 }
+
+# A field starts with a space followed by its name and =, the values can
+# have spaces: Reason=Node unexpectedly rebooted [slurm@2016-09-14T08:37:00]
+_scontrol_separator = re.compile(r' +(?=\w+=)')
+_scontrol_field = re.compile(r'(\w+)=(\S*(?: +(?!\w+=)\S+)*)')
+
+def _integer(value):
+    """
+    It converts a numeric field, fields like N/A are returned as None
+    """
+
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+def _set_state(record, value):
+    """
+    It stores the state of a node and its flags in a record
+    """
+
+    record.state = value
+    suffixes = []
+
+    while value and value[-1] in _state_suffixes:
+        suffixes.insert(0, _state_suffixes[value[-1]])
+        value = value[:-1]
+
+    flags = value.split('+')
+    record.base_state = flags[0]
+    record.state_flags = tuple(flags[1:] + suffixes)
+
+def _set_gres(record, value):
+    """
+    It stores the parsed Gres of a node in a record
+    """
+
+    record.gres = parse_gres(value)
+
+def _set_attribute(attribute, conversion=None):
+    """
+    It returns the function that stores a converted field in a record
+    """
+
+    if conversion is None:
+        return lambda record, value: setattr(record, attribute, value)
+
+    return lambda record, value: setattr(record, attribute, conversion(value))
+
+_scontrol_attributes = { 'State': _set_state,
+                         'RealMemory': _set_attribute('real_memory', _integer),
+                         'CPUTot': _set_attribute('cpu_total', _integer),
+                         'CPUAlloc': _set_attribute('cpu_alloc', _integer),
+                         'FreeMem': _set_attribute('free_memory', _integer),
+                         'Gres': _set_gres,
+                         'BootTime': _set_attribute('boot_time'),
+                         'Reason': _set_attribute('reason') }
+
+@functools.lru_cache(maxsize=1024)
+def parse_gres(gres):
+    """
+    It parses the Gres field of scontrol into a tuple of GresEntry:
+
+    gpu:tesla2075:2,bandwidth:lustre:no_consume:4G -> (GresEntry('gpu', 'tesla2075', 2),
+                                                       GresEntry('bandwidth', 'lustre', 4294967296))
+
+    Entries without count count as 1. The nodes of a cluster share a
+    few different Gres, so the results are cached.
+    """
+
+    if not gres or gres == '(null)':
+        return ()
+
+    entries = []
+
+    for resource in re.sub(r'\([^)]*\)', '', gres).split(','):
+        parts = [ part for part in resource.split(':') if part != 'no_consume' ]
+
+        if not parts[0]:
+            continue
+
+        count = 1
+        match = re.match(r'^(\d+)([KMGT]?)$', parts[-1]) if len(parts) > 1 else None
+
+        if match:
+            count = int(match.group(1)) * _gres_multipliers.get(match.group(2), 1)
+            parts = parts[:-1]
+
+        entries.append(GresEntry(parts[0], parts[1] if len(parts) > 1 else None, count))
+
+    return tuple(entries)
+
+def parse_scontrol_information(command_output, fields=None):
+    """
+    This function will parse all info of the command
+    scontrol -o  --all show node
+
+    This will be used to get information and live stats of the status_code
+    of the node. It returns a ScontrolNode per node, with only the given
+    fields parsed, all of them if fields is None.
+    """
+
+    return list(iter_scontrol_information(command_output, fields))
+
+def iter_scontrol_information(command_output, fields=None):
+    """
+    Generator version of parse_scontrol_information, it yields the
+    information of each node while the output is read. The output can
+    be the bytes of the command or an iterable of lines.
+
+    When all the fields are requested each line is split once by the
+    start of its fields. Otherwise only the requested fields are looked
+    for and converted.
+    """
+
+    if fields is not None:
+        setters = [ (' ' + key + '=', key, _scontrol_attributes.get(key)) for key in fields if key != 'NodeName' ]
+
+    for line in shell.iter_lines(command_output):
+        if not line.startswith('NodeName='):
+            continue
+
+        if fields is None:
+            values = dict(_scontrol_field.findall(line))
+            record = ScontrolNode(values.pop('NodeName'))
+
+            for key, setter in _scontrol_attributes.items():
+                if key in values:
+                    setter(record, values.pop(key))
+
+            record.fields = values
+        else:
+            end = line.find(' ')
+            record = ScontrolNode(line[9:end] if end > 0 else line[9:].strip())
+
+            for prefix, key, setter in setters:
+                start = line.find(prefix)
+
+                if start < 0:
+                    continue
+
+                start += len(prefix)
+                match = _scontrol_separator.search(line, start)
+                value = line[start:match.start()] if match else line[start:].rstrip()
+
+                if setter is not None:
+                    setter(record, value)
+                else:
+                    record.fields[key] = value
+
+        yield record
+
+def  update_cpu_node_information():
+    """
+    This method updates the CPU information of nodes in case of
+    on-line SLURM testbeds.
+
+    It is going to try to ssh into the enabled nodes, all of them in one
+    single call to the testbed, if an error occours it keeps the node
+    information as it is. If no error occours
+    updates the entries in the db deleting the old CPU information first.
+
+    Only the nodes that were never probed or that rebooted since the last
+    probe, according to the BootTime of SLURM, are probed again. If the
+    digest of their cpuinfo did not change it is not parsed nor written.
+
+    All the testbeds are called at the same time, the db is updated from
+    this thread as each testbed answers.
+    """
+
+    testbeds = []
+
+    for testbed in query.get_slurm_online_testbeds():
+        nodes = cpuinfo_outdated_nodes(testbed)
+        digests = { node.name: node.cpuinfo_digest for node in nodes if node.cpuinfo_digest is not None }
+        boot_times = { node.id: node.boot_time for node in nodes }
+        testbeds.append((fanout.remote_testbed(testbed), fanout.remote_nodes(nodes), digests, boot_times))
+
+    for (testbed, nodes, digests, boot_times), future in fanout.each(lambda item: parser.probe_cpuinfo_nodes(*item[:3]), testbeds):
+
+        try:
+            probes = future.result()
+        except shell.CommandTimeout:
+            logging.error("Timeout updating CPU info for testbed: " + testbed.name)
+            continue
+
+        update_cpu_information(nodes, probes, boot_times)
+
+def update_cpu_information(nodes, probes, boot_times):
+    """
+    It writes the CPUs of the probed nodes of a testbed in a single
+    transaction. probes has the CpuinfoProbe of each node name and
+    boot_times the BootTime of each node id when it was probed.
+    """
+
+    for node in nodes:
+        probe = probes.get(node.name, parser.CpuinfoProbe(None, []))
+
+        if probe.digest is None or probe.cpus == []:
+            logging.error("Impossible to update CPU info for node: " + node.name)
+            continue
+
+        if probe.cpus is not None:
+            logging.info("Updating CPU info for node: " + node.name)
+            db.session.query(CPU).filter_by(node_id=node.id).delete()
+            for cpu in probe.cpus:
+                cpu.node_id = node.id
+                db.session.add(cpu)
+
+        db.session.query(Node).filter_by(id=node.id).update({ Node.cpuinfo_digest: probe.digest,
+                                                              Node.cpuinfo_boot_time: boot_times.get(node.id) },
+                                                            synchronize_session=False)
+
+    db.session.commit()
+
+def cpuinfo_outdated_nodes(testbed):
+    """
+    It returns the enabled nodes of a testbed whose cpuinfo has to be
+    probed
+    """
+
+    return [ node for node in testbed.nodes if not node.disabled and _cpuinfo_outdated(node) ]
+
+def _cpuinfo_outdated(node):
+    """
+    It returns True if the cpuinfo of a node was never probed or the node
+    rebooted after it was probed. Nodes without BootTime are always
+    probed.
+    """
+
+    return node.cpuinfo_digest is None or node.boot_time is None or node.boot_time != node.cpuinfo_boot_time
+
+def get_node_information(testbed, fields=None):
+    """
+    This function gets the nodes object information, from that information
+    it determines if the testbed it is of the category SLURM.
+
+    If it is SLURM, it will determine if it connects via ssh.
+
+        If it connects via ssh it will get the node info executing the command
+        via ssh
+
+        If it is not ssh, it will execute directly the sinfo command in console.
+
+    If it is not type SLURM it will just return an empty list
+
+    The command to be executed is:
+
+    scontrol -o  --all show node
+
+    Only the given fields are parsed, all of them if fields is None. The
+    result is cached for a few seconds, so the different scheduler jobs
+    share it.
+    """
+
+    command = "scontrol"
+    params = ["-o", "--all", "show", "node"]
+    cache_key = params if fields is None else params + [ ','.join(sorted(fields)) ]
+
+    if testbed.category == Testbed.slurm_category:
+
+        if testbed.protocol == Testbed.protocol_local:
+            return command_cache.cached('', command, cache_key,
+                lambda: list(iter_scontrol_information(shell.execute_command_stream(command=command, params=params), fields)))
+        elif testbed.protocol in (Testbed.protocol_ssh, Testbed.protocol_simulated):
+            return command_cache.cached(testbed.endpoint, command, cache_key,
+                lambda: list(iter_scontrol_information(shell.execute_command_stream(command=command,
+                                                                                    server=testbed.endpoint,
+                                                                                    params=params), fields)))
+        else:
+            return []
+
+    else:
+        return []
+
+
+def update_node_information():
+    """
+    This function gets all the testbed that are SLURM and have been
+    configured to retrieve all information automatically and
+    update the node information if necessary
+
+    The nodes of each testbed are loaded in one query and only the state,
+    memory and GPUs that changed are written, in one transaction per
+    testbed. The memories and GPUs are only compared for the nodes whose
+    RealMemory and Gres digest changed. It returns the number of rows
+    changed per testbed name.
+
+    The scontrol command of all the testbeds is executed at the same time,
+    the db is updated from this thread as each testbed answers.
+    """
+
+    testbeds = [ fanout.remote_testbed(testbed) for testbed in query.get_slurm_online_testbeds() ]
+    changes = {}
+
+    for testbed, future in fanout.each(lambda testbed: get_node_information(testbed, NODE_INFORMATION_FIELDS), testbeds):
+
+        try:
+            nodes_info = future.result()
+        except shell.CommandTimeout:
+            logging.error("Timeout updating node information for testbed: " + testbed.name)
+            continue
+
+        changes[testbed.name] = update_testbed_node_information(testbed, nodes_info)
+
+    return changes
+
+def update_testbed_node_information(testbed, nodes_info):
+    """
+    It writes the state, BootTime, memory and GPUs of the nodes of a
+    testbed that changed, in a single transaction. It returns the number
+    of rows changed.
+    """
+
+    nodes = { node.name: node for node in db.session.query(Node).filter_by(testbed_id=testbed.id) }
+    nodes_info = [ (nodes[node_info.name], node_info, _hardware_digest(node_info)) for node_info in nodes_info if node_info.name in nodes ]
+    _load_hardware([ node.id for node, node_info, digest in nodes_info if node.hardware_digest != digest ])
+    gpus_by_gres = {}
+    changed_rows = 0
+
+    for node, node_info, digest in nodes_info:
+        state = node_info.state if node_info.state is not None else node.state
+
+        if node.state != state or node.boot_time != node_info.boot_time:
+            logging.info("Updating information for node: " + node.name)
+            node.state = state
+            node.boot_time = node_info.boot_time
+            changed_rows += 1
+
+        if node.hardware_digest == digest:
+            continue
+
+        if node_info.real_memory is not None and [ (memory.size, memory.units) for memory in node.memories ] != [ (node_info.real_memory, Memory.MEGABYTE) ]:
+            logging.info("Updating memory information for node: " + node.name)
+            changed_rows += _replace_rows(node, 'memories', [ Memory(size=node_info.real_memory, units=Memory.MEGABYTE) ])
+
+        if node_info.gres is not None:
+            # The nodes share a few Gres, their GPU models are searched once
+            if node_info.gres not in gpus_by_gres:
+                gpus_by_gres[node_info.gres] = [ (gpu.vendor_id, gpu.model_name) for gpu in parse_gre_field_info(node_info.gres).get('gpu', []) ]
+
+            gpus = gpus_by_gres[node_info.gres]
+
+            if gpus and sorted((gpu.vendor_id, gpu.model_name) for gpu in node.gpus) != sorted(gpus):
+                logging.info("Updating gpu information for node: " + node.name)
+                changed_rows += _replace_rows(node, 'gpus', [ GPU(vendor_id, model_name) for vendor_id, model_name in gpus ])
+
+        node.hardware_digest = digest
+
+    db.session.commit()
+
+    logging.info("Node information of testbed: " + testbed.name + " updated, " + str(changed_rows) + " rows changed")
+
+    return changed_rows
+
+def _hardware_digest(node_info):
+    """
+    It returns the digest of the RealMemory and Gres of a node
+    """
+
+    return hashlib.sha1(repr((node_info.real_memory, node_info.gres)).encode('utf-8')).hexdigest()
+
+def _load_hardware(node_ids):
+    """
+    It loads in a few queries the memories and GPUs of the given nodes,
+    so they are not loaded node by node
+    """
+
+    for i in range(0, len(node_ids), SQL_IN_CHUNK):
+        db.session.query(Node).filter(Node.id.in_(node_ids[i:i + SQL_IN_CHUNK])).options(
+            orm.selectinload(Node.memories), orm.selectinload(Node.gpus)).all()
+
+def _replace_rows(node, relationship, rows):
+    """
+    It deletes the rows of a relationship of a node and adds the new
+    ones, it returns the number of rows written
+    """
+
+    old_rows = list(getattr(node, relationship))
+
+    for row in old_rows:
+        db.session.delete(row)
+
+    setattr(node, relationship, rows)
+
+    return len(old_rows) + len(rows)
+
+def parse_gre_field_info(gre):
+    """
+    This function will parse the GRE field of the scontrol output to know
+    if this specific node of slurm has any kind of special hardware attached
+    to it such as GPUs, Xeon Phis, etc...
+
+    gre field has format like this: gpu:tesla2050:2,bandwidth:lustre:no_consume:4G
+
+    This function will return a dictionary with the relevant information.
+    The field can also be given already parsed by parse_gres.
+    """
+
+    if isinstance(gre, str):
+        gre = parse_gres(gre)
+
+    resources = {}
+
+    for entry in gre:
+
+        if entry.name == 'gpu' and entry.type is not None:
+            gpu_model = inventory.find_gpu_slurm(entry.type)
+
+            if gpu_model:
+
+                if 'gpu' in resources:
+                    gpus = resources['gpu']
+                else:
+                    gpus = []
+
+                gpus.append(gpu_model)
+                for i in range(entry.count - 1):
+                    gpus.append(copy.deepcopy(gpu_model))
+
+                resources['gpu'] = gpus
+
+    return resources
+
+def execute_srun(testbed, execution_configuration, executable, deployment, singularity=False):
+    """
+    This will execute an slurm application and return the output
+    """
+
+	# Preparing the command to be executed
+    command = "("
+    endpoint = testbed.endpoint
+    params = []
+    params.append("srun")
+    if execution_configuration.num_nodes:
+        params.append("-N")
+        params.append(str(execution_configuration.num_nodes))
+    if execution_configuration.num_gpus_per_node:
+        params.append("--gres=gpu:" + str(execution_configuration.num_gpus_per_node))
+    params.append("-n")
+    params.append(str(execution_configuration.num_cpus_per_node))
+    if execution_configuration.srun_config:
+        params.append(execution_configuration.srun_config)
+    if singularity :
+        params.append('singularity')
+        params.append('run')
+        params.append(deployment.path)
+    else :
+        params.append(executable.executable_file)
+        params.append(execution_configuration.command)
+    params.append(">")
+    params.append("allout.txt")
+    params.append("2>&1")
+    params.append("&")
+    params.append(")")
+    params.append(";")
+    params.append("sleep")
+    params.append("1;")
+    params.append("squeue")
+    
+    logging.info("Launching execution of application: command: " + command + " | endpoint: " + endpoint + " | params: " + str(params))
+    
+    output = shell.execute_command(command, endpoint, params)
+    command_cache.invalidate(endpoint)
+    polling.nudge(endpoint)
+    
+    return output
+
+def stop_execution(execution_id, endpoint):
+    """
+    This will use scontrol to stop an execution
+
+    scontrol suspend 7993
+    """
+
+    command="scontrol"
+    params=["suspend", str(execution_id)]
+
+    if endpoint:
+        shell.execute_command(command=command, server=endpoint, params=params)
+        command_cache.invalidate(endpoint)
+    else :
+        shell.execute_command(command=command, params=params)
+        command_cache.invalidate('')
\ No newline at end of file
@@ -0,0 +1,275 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Module that takes, in one cycle, an immutable snapshot of each SLURM
+# testbed (sinfo, scontrol and the cpuinfo of the nodes that need to be
+# probed) and hands it to the consumers that update the db. The latest
+# snapshot of each testbed is served by HTTP without reading the db.
+#
+
+import collections
+import logging
+import subprocess
+import threading
+import time
+import types
+import fanout
+import query
+import shell
+import slurm
+import linux_probes.cpu_info_parser as parser
+from flask import Blueprint, jsonify
+from models import db, Node
+
+snapshot_blueprint = Blueprint('snapshot', __name__)
+
+SinfoEntry = collections.namedtuple('SinfoEntry', [ 'partition', 'avail', 'timelimit', 'state', 'node_name' ])
+NodeInformation = collections.namedtuple('NodeInformation', [ 'name', 'state', 'real_memory', 'gres', 'boot_time' ])
+
+# Information of a testbed at a given time. partitions has the entries of
+# sinfo, nodes the information of scontrol and cpuinfo the output of
+# /proc/cpuinfo of each probed node (None if it could not be read). Each
+# one of them is None if its command failed.
+ClusterSnapshot = collections.namedtuple('ClusterSnapshot', [ 'testbed', 'time', 'duration', 'partitions', 'nodes', 'cpuinfo' ])
+
+_latest = {}
+_lock = threading.Lock()
+
+def _fetch(name, testbed, function):
+    """
+    It returns the result of the function, None if its command failed
+    """
+
+    try:
+        return function()
+    except (shell.CommandTimeout, subprocess.CalledProcessError):
+        logging.error("Impossible to get the " + name + " of testbed: " + testbed.name)
+        return None
+
+def gather(testbed, cpuinfo_nodes, clock=time.time):
+    """
+    It executes the commands that take the snapshot of a testbed and
+    returns it. It only reads from the testbed, so it can run outside of
+    the thread of the db session.
+    """
+
+    start = clock()
+
+    partitions = _fetch('sinfo', testbed, lambda: tuple(SinfoEntry(entry['partition'], entry['partition_avail'],
+                                                                   entry['partition_timelimit'], entry['partition_state'],
+                                                                   entry['node_name']) for entry in slurm.get_nodes_testbed(testbed)))
+    nodes = _fetch('scontrol', testbed, lambda: tuple(NodeInformation(node.name, node.state, node.real_memory, node.gres, node.boot_time)
+                                                      for node in slurm.get_node_information(testbed, slurm.NODE_INFORMATION_FIELDS)))
+    cpuinfo = _fetch('cpuinfo', testbed, lambda: types.MappingProxyType(parser.fetch_cpuinfo_nodes(testbed, cpuinfo_nodes)))
+
+    end = clock()
+
+    return ClusterSnapshot(testbed, end, end - start, partitions, nodes, cpuinfo)
+
+def summary(snapshot):
+    """
+    It returns the figures of a snapshot: nodes by state, GPUs, memory
+    and cpuinfo probes
+    """
+
+    nodes = snapshot.nodes or ()
+    cpuinfo = snapshot.cpuinfo or {}
+
+    return { 'testbed': snapshot.testbed.name,
+             'time': snapshot.time,
+             'duration': snapshot.duration,
+             'complete': None not in (snapshot.partitions, snapshot.nodes, snapshot.cpuinfo),
+             'partitions': sorted(set(entry.partition for entry in snapshot.partitions or ())),
+             'nodes': len(set(entry.node_name for entry in snapshot.partitions or ()) | set(node.name for node in nodes)),
+             'states': dict(collections.Counter(node.state for node in nodes if node.state is not None)),
+             'gpus': sum(entry.count for node in nodes for entry in node.gres or () if entry.name == 'gpu'),
+             'memory': sum(node.real_memory for node in nodes if node.real_memory is not None),
+             'cpuinfo_probed': len(cpuinfo),
+             'cpuinfo_failed': sum(1 for output in cpuinfo.values() if output is None) }
+
+def to_dict(snapshot):
+    """
+    It returns the JSON representation of a snapshot, the cpuinfo of
+    each node is given as its digest
+    """
+
+    return { 'testbed': snapshot.testbed._asdict(),
+             'time': snapshot.time,
+             'duration': snapshot.duration,
+             'partitions': None if snapshot.partitions is None else [ entry._asdict() for entry in snapshot.partitions ],
+             'nodes': None if snapshot.nodes is None else [ { 'name': node.name,
+                                                              'state': node.state,
+                                                              'real_memory': node.real_memory,
+                                                              'gres': None if node.gres is None else [ entry._asdict() for entry in node.gres ],
+                                                              'boot_time': node.boot_time } for node in snapshot.nodes ],
+             'cpuinfo': None if snapshot.cpuinfo is None else { name: None if output is None else parser.cpuinfo_digest(output)
+                                                                for name, output in snapshot.cpuinfo.items() } }
+
+def publish(snapshot):
+    """
+    It keeps the snapshot, and its summary, as the latest one of its
+    testbed
+    """
+
+    with _lock:
+        _latest[snapshot.testbed.name] = (snapshot, summary(snapshot))
+
+def latest(testbed_name):
+    """
+    It returns the latest snapshot of a testbed, None if there is none
+    """
+
+    with _lock:
+        entry = _latest.get(testbed_name)
+
+    return None if entry is None else entry[0]
+
+def clear():
+    """
+    It removes all the published snapshots
+    """
+
+    with _lock:
+        _latest.clear()
+
+def update_nodes(snapshot):
+    """
+    It adds, enables and disables the nodes of the testbed
+    """
+
+    if snapshot.partitions is not None:
+        slurm.update_testbed_nodes(snapshot.testbed, [ entry.node_name for entry in snapshot.partitions ])
+
+def update_node_information(snapshot):
+    """
+    It updates the state, BootTime, memory and GPUs of the nodes
+    """
+
+    if snapshot.nodes is not None:
+        slurm.update_testbed_node_information(snapshot.testbed, snapshot.nodes)
+
+def update_cpu_information(snapshot):
+    """
+    It updates the CPUs of the probed nodes, the cpuinfo that did not
+    change since the last probe is not parsed
+    """
+
+    if not snapshot.cpuinfo:
+        return
+
+    nodes = [ node for node in db.session.query(Node.id, Node.name, Node.cpuinfo_digest).filter_by(testbed_id=snapshot.testbed.id)
+              if node.name in snapshot.cpuinfo ]
+    boot_times = { node.name: node.boot_time for node in snapshot.nodes or () }
+    probes = { node.name: parser.probe_cpuinfo(node.name, snapshot.cpuinfo[node.name], node.cpuinfo_digest) for node in nodes }
+
+    slurm.update_cpu_information(nodes, probes, { node.id: boot_times.get(node.name) for node in nodes })
+
+# Functions called with each snapshot, in order, from the thread that
+# writes in the db
+consumers = [ publish, update_nodes, update_node_information, update_cpu_information ]
+
+def register_consumer(consumer):
+    """
+    It adds a function that is called with each new snapshot
+    """
+
+    consumers.append(consumer)
+
+def update_snapshots(testbed_names=None):
+    """
+    It takes the snapshot of all the on-line SLURM testbeds, or of the
+    given ones, at the same time and gives each one of them to the
+    consumers as it arrives. It returns the list of snapshots.
+
+    An error in a consumer is logged and its changes in the db rolled
+    back, the other consumers still get the snapshot.
+    """
+
+    online = query.get_slurm_online_testbeds()
+    testbeds = [ (fanout.remote_testbed(testbed), fanout.remote_nodes(slurm.cpuinfo_outdated_nodes(testbed)))
+                 for testbed in online if testbed_names is None or testbed.name in testbed_names ]
+    snapshots = []
+
+    for (testbed, nodes), future in fanout.each(lambda item: gather(*item), testbeds):
+
+        try:
+            snapshot = future.result()
+        except Exception:
+            logging.exception("Impossible to take the snapshot of testbed: " + testbed.name)
+            continue
+
+        for consumer in consumers:
+            try:
+                consumer(snapshot)
+            except Exception:
+                logging.exception("Error processing the snapshot of testbed: " + testbed.name)
+                db.session.rollback()
+
+        snapshots.append(snapshot)
+
+    # The snapshots of the testbeds that are not on-line anymore are removed
+    names = set(testbed.name for testbed in online)
+
+    with _lock:
+        for name in set(_latest) - names:
+            del _latest[name]
+
+    return snapshots
+
+def changed(previous, snapshot):
+    """
+    It returns True if the partitions or nodes of a testbed changed
+    since its previous snapshot, or the cpuinfo of a node was probed
+    """
+
+    return previous is None or (previous.partitions, previous.nodes) != (snapshot.partitions, snapshot.nodes) or bool(snapshot.cpuinfo)
+
+def poll(testbed_names):
+    """
+    It updates the snapshots of the given testbeds and returns, for each
+    one of them, 1 if it changed and 0 if not. It is the function of the
+    adaptive polling of the snapshots.
+    """
+
+    previous = { name: latest(name) for name in testbed_names }
+
+    return { snapshot.testbed.name: int(changed(previous.get(snapshot.testbed.name), snapshot))
+             for snapshot in update_snapshots(testbed_names) }
+
+@snapshot_blueprint.route('', methods=['GET'])
+def get_snapshots():
+    """
+    It returns the summary of the latest snapshot of each testbed
+    """
+
+    with _lock:
+        summaries = [ _latest[name][1] for name in sorted(_latest) ]
+
+    return jsonify(summaries)
+
+@snapshot_blueprint.route('/<testbed_name>', methods=['GET'])
+def get_snapshot(testbed_name):
+    """
+    It returns the latest snapshot of a testbed
+    """
+
+    snapshot = latest(testbed_name)
+
+    if snapshot is None:
+        return jsonify({ 'error': 'No snapshot of testbed: ' + testbed_name }), 404
+
+    return jsonify(to_dict(snapshot))
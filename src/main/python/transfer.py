@@ -0,0 +1,310 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Module that transfers big files, like singularity images, to and from the
+# testbeds. Files are moved in chunks, several of them in parallel over the
+# pooled ssh connections, so interrupted transfers can be resumed and files
+# already present in the testbed are not sent again.
+#
+
+import collections
+import hashlib
+import logging
+import os
+import shell
+import shlex
+import subprocess
+import threading
+import time
+
+BLOCK_SIZE = 1024 * 1024
+CHUNK_BLOCKS = 64
+REMOTE_IMAGES_FOLDER = 'alde_images'
+CHECKSUM_SUFFIX = '.sha256'
+PART_SUFFIX = '.part'
+
+# Seconds that calculating the checksums of a big file can take
+CHECKSUM_TIMEOUT = 600
+
+TransferResult = collections.namedtuple('TransferResult', ['path', 'size', 'transferred', 'seconds', 'skipped'])
+
+_checksums = {}
+_checksums_lock = threading.Lock()
+
+class TransferError(Exception):
+    """
+    Exception raised when a transferred file does not match the
+    checksum of the original one
+    """
+
+    pass
+
+def _chunk_size():
+    """
+    It returns the size in bytes of each chunk
+    """
+
+    return BLOCK_SIZE * CHUNK_BLOCKS
+
+def _number_of_chunks(size):
+    """
+    It returns the number of chunks of a file of the given size
+    """
+
+    return (size + _chunk_size() - 1) // _chunk_size()
+
+def file_checksums(filename, cache=True):
+    """
+    It returns the sha256 of a local file and the sha256 of each one
+    of its chunks, reading the file only once. The result is cached
+    by path, size and modification time.
+    """
+
+    stat = os.stat(filename)
+    key = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns, _chunk_size())
+
+    if cache:
+        with _checksums_lock:
+            if key in _checksums:
+                return _checksums[key]
+
+    whole = hashlib.sha256()
+    chunk = hashlib.sha256()
+    chunks = []
+    read = 0
+
+    with open(filename, 'rb') as f:
+        while True:
+            block = f.read(BLOCK_SIZE)
+
+            if not block:
+                break
+
+            whole.update(block)
+            chunk.update(block)
+            read += len(block)
+
+            if read == _chunk_size():
+                chunks.append(chunk.hexdigest())
+                chunk = hashlib.sha256()
+                read = 0
+
+    if read > 0:
+        chunks.append(chunk.hexdigest())
+
+    result = (whole.hexdigest(), chunks)
+
+    if cache:
+        with _checksums_lock:
+            _checksums[key] = result
+
+    return result
+
+def file_checksum(filename):
+    """
+    It returns the sha256 of a local file
+    """
+
+    return file_checksums(filename)[0]
+
+def _complete_chunks(part_size, size):
+    """
+    It returns how many chunks of a partial file of part_size bytes
+    could be already complete
+    """
+
+    if part_size == size:
+        return _number_of_chunks(size)
+
+    return min(part_size // _chunk_size(), _number_of_chunks(size))
+
+def _remote_chunk_checksums(server, filename, chunks):
+    """
+    It returns the sha256 of the first chunks of a file of a
+    testbed, all of them calculated in one single round trip
+    """
+
+    commands = [ 'dd if=' + shlex.quote(filename) + ' bs=' + str(BLOCK_SIZE) + ' skip=' + str(i * CHUNK_BLOCKS) +
+                 ' count=' + str(CHUNK_BLOCKS) + ' 2>/dev/null | sha256sum' for i in range(chunks) ]
+
+    return [ _first_word(result) for result in shell.execute_batch(commands, server, CHECKSUM_TIMEOUT) ]
+
+def _first_word(result):
+    """
+    It returns the first word of the output of a BatchResult, None
+    if the command failed
+    """
+
+    if result.returncode != 0 or len(result.output.split()) == 0:
+        return None
+
+    return result.output.split()[0].decode('utf-8')
+
+def _run_chunks(commands):
+    """
+    It executes the commands that transfer each chunk in parallel
+    """
+
+    outputs = shell.execute_commands([ { 'command': command } for command in commands ])
+
+    for output in outputs:
+        if isinstance(output, Exception):
+            raise output
+
+def _chunk_bytes(chunks, size):
+    """
+    It returns the number of bytes of the given chunks of a file
+    """
+
+    return sum(min(_chunk_size(), size - i * _chunk_size()) for i in chunks)
+
+def _log_transfer(operation, filename, server, result):
+    """
+    It logs the throughput of a transfer
+    """
+
+    seconds = max(result.seconds, 0.001)
+    logging.info("%s %s, server %s: %d of %d bytes transferred in %.1f s (%.2f MB/s)",
+                 operation, filename, server, result.transferred, result.size, result.seconds,
+                 result.transferred / seconds / 1000000)
+
+def upload_file(local_filename, server, remote_filename):
+    """
+    It uploads a file to a testbed. If the remote file has the same
+    checksum the upload is skipped and, if a previous upload was
+    interrupted, only the missing chunks are sent.
+
+    It returns a TransferResult with the bytes transferred and the
+    seconds that it took.
+    """
+
+    start = time.monotonic()
+    size = os.path.getsize(local_filename)
+    checksum, chunk_checksums = file_checksums(local_filename)
+    part = remote_filename + PART_SUFFIX
+
+    results = shell.execute_batch([ 'mkdir -p ' + shlex.quote(os.path.dirname(remote_filename) or '.'),
+                                    'cat ' + shlex.quote(remote_filename + CHECKSUM_SUFFIX),
+                                    'stat -c %s ' + shlex.quote(remote_filename),
+                                    'stat -c %s ' + shlex.quote(part) ],
+                                  server)
+
+    if results[0].returncode != 0:
+        raise subprocess.CalledProcessError(results[0].returncode, results[0].command, results[0].error)
+
+    remote_size = _first_word(results[2])
+
+    if _first_word(results[1]) == checksum and remote_size == str(size):
+        logging.info("Skipping upload of %s to %s, the remote copy is identical", local_filename, server)
+        return TransferResult(remote_filename, size, 0, time.monotonic() - start, True)
+
+    pending = list(range(len(chunk_checksums)))
+    part_size = _first_word(results[3])
+
+    if part_size is not None and int(part_size) <= size:
+        remote_chunks = _remote_chunk_checksums(server, part, _complete_chunks(int(part_size), size))
+        pending = [ i for i in pending if i >= len(remote_chunks) or remote_chunks[i] != chunk_checksums[i] ]
+
+    _run_chunks([ 'dd if=' + shlex.quote(local_filename) + ' bs=' + str(BLOCK_SIZE) + ' skip=' + str(i * CHUNK_BLOCKS) +
+                  ' count=' + str(CHUNK_BLOCKS) + ' 2>/dev/null | ' +
+                  shell.remote_command_line('dd of=' + shlex.quote(part) + ' bs=' + str(BLOCK_SIZE) + ' seek=' +
+                                            str(i * CHUNK_BLOCKS) + ' conv=notrunc 2>/dev/null', server) for i in pending ])
+
+    # The file is only moved to its final location if it is complete
+    results = shell.execute_batch([ 'truncate -s ' + str(size) + ' ' + shlex.quote(part) +
+                                    ' && test "$(sha256sum < ' + shlex.quote(part) + ' | cut -d" " -f1)" = ' + checksum +
+                                    ' && mv -f ' + shlex.quote(part) + ' ' + shlex.quote(remote_filename) +
+                                    ' && echo ' + checksum + ' > ' + shlex.quote(remote_filename + CHECKSUM_SUFFIX) ],
+                                  server, CHECKSUM_TIMEOUT)
+
+    if results[0].returncode != 0:
+        shell.execute_batch([ 'rm -f ' + shlex.quote(part) ], server)
+        raise TransferError("Checksum of " + remote_filename + " at " + server + " does not match " + local_filename)
+
+    result = TransferResult(remote_filename, size, _chunk_bytes(pending, size), time.monotonic() - start, False)
+    _log_transfer("Uploaded", local_filename, server, result)
+
+    return result
+
+def download_file(local_filename, server, remote_filename):
+    """
+    It downloads a file from a testbed. If the local file has the same
+    checksum the download is skipped and, if a previous download was
+    interrupted, only the missing chunks are received.
+
+    It returns a TransferResult with the bytes transferred and the
+    seconds that it took.
+    """
+
+    start = time.monotonic()
+
+    results = shell.execute_batch([ 'stat -c %s ' + shlex.quote(remote_filename),
+                                    'sha256sum ' + shlex.quote(remote_filename) ],
+                                  server, CHECKSUM_TIMEOUT)
+
+    for result in results:
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, result.command, result.error)
+
+    size = int(_first_word(results[0]))
+    checksum = _first_word(results[1])
+    part = local_filename + PART_SUFFIX
+
+    if os.path.isfile(local_filename) and os.path.getsize(local_filename) == size and file_checksums(local_filename, False)[0] == checksum:
+        logging.info("Skipping download of %s from %s, the local copy is identical", remote_filename, server)
+        return TransferResult(local_filename, size, 0, time.monotonic() - start, True)
+
+    pending = list(range(_number_of_chunks(size)))
+
+    if os.path.isfile(part) and os.path.getsize(part) <= size:
+        complete = _complete_chunks(os.path.getsize(part), size)
+        local_chunks = file_checksums(part, False)[1][:complete]
+        remote_chunks = _remote_chunk_checksums(server, remote_filename, complete)
+        pending = [ i for i in pending if i >= complete or local_chunks[i] != remote_chunks[i] ]
+
+    _run_chunks([ shell.remote_command_line('dd if=' + shlex.quote(remote_filename) + ' bs=' + str(BLOCK_SIZE) + ' skip=' +
+                                            str(i * CHUNK_BLOCKS) + ' count=' + str(CHUNK_BLOCKS) + ' 2>/dev/null', server) +
+                  ' | dd of=' + shlex.quote(part) + ' bs=' + str(BLOCK_SIZE) + ' seek=' + str(i * CHUNK_BLOCKS) +
+                  ' conv=notrunc 2>/dev/null' for i in pending ])
+
+    # The file is only moved to its final location if it is complete
+    open(part, 'ab').close()
+    os.truncate(part, size)
+
+    if file_checksums(part, False)[0] != checksum:
+        os.remove(part)
+        raise TransferError("Checksum of " + local_filename + " does not match " + remote_filename + " at " + server)
+
+    os.replace(part, local_filename)
+
+    result = TransferResult(local_filename, size, _chunk_bytes(pending, size), time.monotonic() - start, False)
+    _log_transfer("Downloaded", remote_filename, server, result)
+
+    return result
+
+def upload_image(local_filename, server):
+    """
+    It uploads a singularity image to a testbed, storing it in a folder
+    named after its checksum, so the same image is only uploaded once.
+    It returns the path of the image in the testbed.
+    """
+
+    remote_filename = os.path.join(REMOTE_IMAGES_FOLDER, file_checksum(local_filename), os.path.basename(local_filename))
+
+    upload_file(local_filename, server, remote_filename)
+
+    return remote_filename
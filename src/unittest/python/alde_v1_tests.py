@@ -26,6 +26,9 @@ import alde
 import json
 import unittest.mock as mock
 import executor
+import metrics
+import fanout
+import snapshot
 
 class AldeV1Tests(TestCase):
     """
@@ -1175,4 +1178,47 @@ class AldeV1Tests(TestCase):
         self.assertEquals(201, response.status_code)
         application = response.json
         self.assertEquals('app_name', application['name'])
-        self.assertEquals('MOULDABLE', application['application_type'])
\ No newline at end of file
+        self.assertEquals('MOULDABLE', application['application_type'])
+
+    def test_get_shell_metrics(self):
+        """
+        It checks the metrics of the shell commands are returned
+        """
+
+        metrics.shell.clear()
+        metrics.shell.record('sinfo', 'user@host', 0.2, 0, 20, 1000)
+        metrics.shell.record('squeue', 'user@host', 1.5, 1, 20, 0)
+
+        response = self.client.get("/api/v1/metrics/shell")
+
+        self.assertEquals(200, response.status_code)
+        self.assertEquals(1, response.json['commands']['sinfo']['wall_time']['count'])
+        self.assertAlmostEqual(0.199, response.json['commands']['sinfo']['wall_time']['p99'])
+        self.assertEquals(1000, response.json['commands']['sinfo']['bytes_in'])
+        self.assertEquals([ 'squeue', 'sinfo' ], [ invocation['command'] for invocation in response.json['slowest'] ])
+
+        response = self.client.get("/api/v1/metrics/shell?limit=1")
+        self.assertEquals(1, len(response.json['slowest']))
+
+        metrics.shell.clear()
+
+    def test_get_snapshots(self):
+        """
+        It checks the latest snapshots of the testbeds are returned
+        """
+
+        snapshot.clear()
+        testbed = fanout.RemoteTestbed(1, 'name_1', Testbed.slurm_category, Testbed.protocol_ssh, 'user@host')
+        snapshot.publish(snapshot.ClusterSnapshot(testbed, 100.0, 2.0, (), (), {}))
+
+        response = self.client.get("/api/v1/snapshots")
+
+        self.assertEquals(200, response.status_code)
+        self.assertEquals([ 'name_1' ], [ summary['testbed'] for summary in response.json ])
+
+        response = self.client.get("/api/v1/snapshots/name_1")
+
+        self.assertEquals(200, response.status_code)
+        self.assertEquals('user@host', response.json['testbed']['endpoint'])
+
+        snapshot.clear()
@@ -38,3 +38,4 @@ class AppTests(unittest.TestCase):
         self.assertEquals(["RIGID", "MOULDABLE", "CHECKPOINTABLE", "MALLEABLE"], conf['APP_TYPES'])
         self.assertEquals('/tmp/comparator', conf['COMPARATOR_PATH'])
         self.assertEquals('comparator_file.csv', conf['COMPARATOR_FILE'])
+        self.assertEquals(8, conf['TESTBED_WORKERS'])
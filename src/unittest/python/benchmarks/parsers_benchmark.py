@@ -0,0 +1,227 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Throughput and peak memory of the parsers of the SLURM command outputs,
+# for clusters from 100 to 50,000 nodes. The results are stored as JSON so
+# two runs can be compared:
+#
+#   python -m benchmarks.parsers_benchmark --output before.json
+#   python -m benchmarks.parsers_benchmark --output after.json --compare before.json
+#
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+import executor
+import slurm
+import linux_probes.cpu_info_parser as cpu_info_parser
+from benchmarks import synthetic
+
+DEFAULT_NODES = [ 100, 1000, 10000, 50000 ]
+DEFAULT_JOBS = 10000
+DEFAULT_REPEAT = 3
+
+# The cpuinfo of each node is parsed separately, it is enough to parse
+# the cpuinfo of some nodes to know the throughput
+CPUINFO_NODES = 1000
+
+def parser_cases(outputs, nodes, jobs):
+    """
+    It returns, for each parser, the function that parses the outputs
+    of the cluster and the number of items (nodes or jobs) it parses
+    """
+
+    gres = re.findall(r' Gres=(\S+)', outputs['scontrol'].decode('utf-8'))
+    cpuinfo_nodes = min(nodes, CPUINFO_NODES)
+
+    return [ ('sinfo', nodes, lambda: slurm.parse_sinfo_partitions(outputs['sinfo'])),
+             ('scontrol', nodes, lambda: slurm.parse_scontrol_information(outputs['scontrol'])),
+             ('scontrol_fields', nodes, lambda: slurm.parse_scontrol_information(outputs['scontrol'], slurm.NODE_INFORMATION_FIELDS)),
+             ('gres', nodes, lambda: [ slurm.parse_gre_field_info(field) for field in gres ]),
+             ('cpuinfo', cpuinfo_nodes, lambda: [ cpu_info_parser.parse_cpu_info(outputs['cpuinfo']) for i in range(cpuinfo_nodes) ]),
+             ('squeue', jobs, lambda: executor.__extract_id_from_squeue__(outputs['squeue'])),
+             ('sbatch', jobs, lambda: [ executor.__extract_id_from_sbatch__(output) for output in outputs['sbatch'] ]),
+             ('sacct', jobs, lambda: executor.__parse_sacct_table__(outputs['sacct'])) ]
+
+def measure(function, repeat=DEFAULT_REPEAT):
+    """
+    It returns the best wall time of several executions of a function
+    and the peak of memory allocated by one execution of it. The memory
+    is traced in a different execution so it does not slow down the
+    timed ones.
+    """
+
+    seconds = None
+
+    for i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return seconds, peak_memory
+
+def _input_bytes(output):
+    """
+    It returns the size of an output or a list of outputs
+    """
+
+    if isinstance(output, list):
+        return sum(len(item) for item in output)
+
+    return len(output)
+
+def run(sizes=DEFAULT_NODES, jobs=DEFAULT_JOBS, repeat=DEFAULT_REPEAT, parsers=None):
+    """
+    It benchmarks the parsers for each cluster size and returns the list
+    of results
+    """
+
+    results = []
+
+    for nodes in sizes:
+        outputs = synthetic.generate_outputs(nodes, jobs)
+
+        for parser, items, function in parser_cases(outputs, nodes, jobs):
+            if parsers is not None and parser not in parsers:
+                continue
+
+            seconds, peak_memory = measure(function, repeat)
+            input_name = 'scontrol' if parser in ('gres', 'scontrol_fields') else parser
+
+            results.append({ 'parser': parser,
+                             'nodes': nodes,
+                             'jobs': jobs,
+                             'items': items,
+                             'input_bytes': _input_bytes(outputs[input_name]),
+                             'seconds': seconds,
+                             'items_per_second': items / seconds if seconds > 0 else None,
+                             'peak_memory': peak_memory })
+
+    return results
+
+def _revision():
+    """
+    It returns the git revision of the code being benchmarked, if known
+    """
+
+    try:
+        return subprocess.check_output([ 'git', 'rev-parse', '--short', 'HEAD' ], stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def report(results, sizes, jobs, repeat):
+    """
+    It returns the JSON document with the results and the information
+    needed to compare them with other runs
+    """
+
+    return { 'benchmark': 'parsers',
+             'revision': _revision(),
+             'date': datetime.datetime.utcnow().isoformat(),
+             'python': platform.python_version(),
+             'platform': platform.platform(),
+             'sizes': sizes,
+             'jobs': jobs,
+             'repeat': repeat,
+             'results': results }
+
+def compare(previous, current):
+    """
+    It returns the lines of a table with the change of throughput and
+    peak memory of each parser between two reports
+    """
+
+    old = { (result['parser'], result['nodes']): result for result in previous['results'] }
+    lines = [ '%-16s %8s %14s %14s %8s %12s %12s' % ('parser', 'nodes', 'old items/s', 'new items/s', 'speedup', 'old memory', 'new memory') ]
+
+    for result in current['results']:
+        before = old.get((result['parser'], result['nodes']))
+
+        if before is None or not before['items_per_second'] or not result['items_per_second']:
+            continue
+
+        lines.append('%-16s %8d %14.0f %14.0f %7.2fx %12d %12d' % (result['parser'], result['nodes'],
+                                                                  before['items_per_second'], result['items_per_second'],
+                                                                  result['items_per_second'] / before['items_per_second'],
+                                                                  before['peak_memory'], result['peak_memory']))
+
+    return lines
+
+def main(args=None):
+    """
+    It runs the benchmark from the command line
+    """
+
+    arguments = argparse.ArgumentParser(description='Benchmark of the parsers of the SLURM command outputs')
+    arguments.add_argument('--nodes', default=','.join(str(size) for size in DEFAULT_NODES),
+                           help='comma separated sizes of the clusters')
+    arguments.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='number of jobs of each cluster')
+    arguments.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='executions of each parser, the best one is kept')
+    arguments.add_argument('--parsers', default=None, help='comma separated parsers to run, all of them by default')
+    arguments.add_argument('--output', default=None, help='JSON file where the results are stored')
+    arguments.add_argument('--compare', default=None, help='JSON file of a previous run to compare with')
+    arguments = arguments.parse_args(args)
+
+    sizes = [ int(size) for size in arguments.nodes.split(',') ]
+    parsers = arguments.parsers.split(',') if arguments.parsers else None
+
+    results = run(sizes, arguments.jobs, arguments.repeat, parsers)
+    document = report(results, sizes, arguments.jobs, arguments.repeat)
+
+    for result in results:
+        print('%-16s %8d nodes %8d items %10.4f s %14.0f items/s %12d bytes peak' % (result['parser'], result['nodes'], result['items'],
+                                                                                    result['seconds'], result['items_per_second'] or 0,
+                                                                                    result['peak_memory']))
+
+    if arguments.output:
+        directory = os.path.dirname(arguments.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(arguments.output, 'w') as output_file:
+            json.dump(document, output_file, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as previous_file:
+            previous = json.load(previous_file)
+
+        print()
+        for line in compare(previous, document):
+            print(line)
+
+    return document
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Synthetic SLURM command outputs for the benchmarks, generated with the
+# simulated cluster so they have the same format ALDE parses in production
+#
+
+import random
+import simulator
+
+# The clock of the synthetic clusters is stopped, so the outputs of the
+# same sizes and seed are always the same
+START_TIME = 1500000000.0
+
+SACCT_FIELDS = 'JobID,NNodes,State,ExitCode,DerivedExitcode,Comment'
+
+def build_cluster(nodes, jobs, seed=1):
+    """
+    It returns a simulated cluster with the given number of nodes and
+    jobs. A third of the jobs is cancelled and 1% of the nodes drained,
+    so the nodes of each state are not contiguous and sinfo needs
+    several lines and ranges per partition.
+    """
+
+    cluster = simulator.SimulatedCluster({ 'nodes': nodes,
+                                           'partitions': [ 'bullx', 'gpus', 'phi', 'debug' ],
+                                           'gpus_per_node': 2,
+                                           'arrival_rate': 0,
+                                           'history': jobs + 1,
+                                           'seed': seed },
+                                         lambda: START_TIME)
+    rand = random.Random(seed)
+
+    ids = [ cluster.submit(rand.randint(1, 4), 'bench' + str(i)) for i in range(jobs) ]
+
+    for job_id in rand.sample(ids, jobs // 3):
+        cluster.cancel(job_id)
+
+    for name in rand.sample(list(cluster.nodes), max(1, nodes // 100)):
+        cluster.execute('scontrol update NodeName=' + name + ' State=drain Reason=benchmark')
+
+    return cluster
+
+def generate_outputs(nodes, jobs, seed=1):
+    """
+    It returns the outputs of the commands whose parsers are benchmarked
+    for a cluster of the given size
+    """
+
+    cluster = build_cluster(nodes, jobs, seed)
+    job_ids = list(cluster.jobs.keys())
+
+    return { 'sinfo': cluster.execute('sinfo -a')[1],
+             'scontrol': cluster.execute('scontrol -o --all show node')[1],
+             'cpuinfo': cluster.execute("ssh nd1 'cat /proc/cpuinfo'")[1],
+             'squeue': cluster.execute('squeue')[1],
+             'sbatch': [ ('Submitted batch job ' + str(job_id) + '\n').encode('utf-8') for job_id in job_ids ],
+             'sacct': cluster.execute('sacct -j ' + ','.join(str(job_id) for job_id in job_ids) + ' --parsable2 --noheader -o ' + SACCT_FIELDS)[1] }
@@ -0,0 +1,106 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE command cache module
+#
+
+import unittest
+import unittest.mock as mock
+import command_cache
+
+class TTLCacheTests(unittest.TestCase):
+    """
+    Unittests for the cache of results of SLURM commands
+    """
+
+    def setUp(self):
+        """ It creates a cache with a fake clock """
+
+        self.now = 100.0
+        self.cache = command_cache.TTLCache(max_entries=3,
+                                            ttls={ 'sinfo': 30, 'squeue': 0 },
+                                            default_ttl=10,
+                                            clock=lambda: self.now)
+
+    def test_expiration(self):
+        """
+        It checks that entries expire after the TTL of its command
+        """
+
+        self.cache.put('user@host', 'sinfo', [ '-a' ], 'nodes')
+        self.cache.put('user@host', 'sacct', [ '-j', 1 ], 'RUNNING')
+
+        self.assertEquals((True, 'nodes'), self.cache.get('user@host', 'sinfo', [ '-a' ]))
+        self.assertEquals((True, 'RUNNING'), self.cache.get('user@host', 'sacct', [ '-j', '1' ]))
+
+        self.now += 15
+        self.assertEquals((True, 'nodes'), self.cache.get('user@host', 'sinfo', [ '-a' ]))
+        self.assertEquals((False, None), self.cache.get('user@host', 'sacct', [ '-j', 1 ]))
+
+        self.now += 20
+        self.assertEquals((False, None), self.cache.get('user@host', 'sinfo', [ '-a' ]))
+
+        # TTL 0 disables the cache for a command
+        self.cache.put('user@host', 'squeue', [], 'jobs')
+        self.assertEquals((False, None), self.cache.get('user@host', 'squeue', []))
+
+        stats = self.cache.stats()
+        self.assertEquals(3, stats['hits'])
+        self.assertEquals(3, stats['misses'])
+        self.assertEquals(0, stats['size'])
+
+    def test_lru_eviction(self):
+        """
+        It checks that the least recently used entry is evicted
+        when the cache is full
+        """
+
+        self.cache.put('host', 'sinfo', [ 1 ], 1)
+        self.cache.put('host', 'sinfo', [ 2 ], 2)
+        self.cache.put('host', 'sinfo', [ 3 ], 3)
+
+        # Entry 1 becomes the most recently used one
+        self.cache.get('host', 'sinfo', [ 1 ])
+        self.cache.put('host', 'sinfo', [ 4 ], 4)
+
+        self.assertEquals((True, 1), self.cache.get('host', 'sinfo', [ 1 ]))
+        self.assertEquals((False, None), self.cache.get('host', 'sinfo', [ 2 ]))
+        self.assertEquals((True, 3), self.cache.get('host', 'sinfo', [ 3 ]))
+        self.assertEquals((True, 4), self.cache.get('host', 'sinfo', [ 4 ]))
+        self.assertEquals(1, self.cache.stats()['evictions'])
+
+    def test_cached_and_invalidate(self):
+        """
+        It checks that the producer is only called on a miss and that
+        invalidation removes only the entries of the endpoint
+        """
+
+        producer = mock.MagicMock(return_value='output')
+
+        self.assertEquals('output', self.cache.cached('host1', 'sinfo', [], producer))
+        self.assertEquals('output', self.cache.cached('host1', 'sinfo', [], producer))
+        self.assertEquals('output', self.cache.cached('host2', 'sinfo', [], producer))
+        self.assertEquals(2, producer.call_count)
+
+        self.cache.invalidate('host1')
+
+        self.assertEquals((False, None), self.cache.get('host1', 'sinfo', []))
+        self.assertEquals((True, 'output'), self.cache.get('host2', 'sinfo', []))
+
+        self.cache.invalidate()
+        self.assertEquals(0, self.cache.stats()['size'])
+        self.assertEquals(2, self.cache.stats()['invalidations'])
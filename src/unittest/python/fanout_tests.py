@@ -0,0 +1,112 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE fanout module
+#
+
+import fanout
+import threading
+import time
+import unittest
+from models import Testbed, Node
+
+class FanoutTests(unittest.TestCase):
+    """
+    Unittests of the execution of the commands of several testbeds
+    at the same time
+    """
+
+    def tearDown(self):
+        """
+        It restores the default number of workers
+        """
+
+        fanout.set_max_workers(fanout.DEFAULT_MAX_WORKERS)
+
+    def test_each(self):
+        """
+        It verifies the calls run at the same time, the results are given
+        in the order of the items and the exceptions are raised by the
+        futures
+        """
+
+        def sleep(seconds):
+            time.sleep(seconds)
+            if seconds == 0.2:
+                raise ValueError(seconds)
+            return seconds * 10
+
+        start = time.perf_counter()
+        results = []
+
+        for seconds, future in fanout.each(sleep, [ 0.3, 0.1, 0.2, 0.3 ]):
+            try:
+                results.append((seconds, future.result()))
+            except ValueError:
+                results.append((seconds, None))
+
+        self.assertTrue(time.perf_counter() - start < 0.6)
+        self.assertEquals([ (0.3, 3.0), (0.1, 1.0), (0.2, None), (0.3, 3.0) ], results)
+        self.assertEquals([], list(fanout.each(sleep, [])))
+
+    def test_each_workers(self):
+        """
+        It verifies the pool is bounded by the maximum number of workers
+        and with one worker the calls are done in the calling thread
+        """
+
+        lock = threading.Lock()
+        running = [ 0, 0 ]
+
+        def count(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return threading.current_thread()
+
+        fanout.set_max_workers(2)
+        threads = [ future.result() for item, future in fanout.each(count, range(6)) ]
+
+        self.assertEquals(2, running[1])
+        self.assertNotIn(threading.current_thread(), threads)
+
+        fanout.set_max_workers(0)
+        self.assertEquals(1, fanout.max_workers)
+
+        threads = [ future.result() for item, future in fanout.each(count, range(3)) ]
+
+        self.assertEquals([ threading.current_thread() ] * 3, threads)
+
+    def test_remote_testbed_and_nodes(self):
+        """
+        It verifies the copies of the testbeds and nodes given to the
+        threads
+        """
+
+        testbed = Testbed("name1", True, Testbed.slurm_category, Testbed.protocol_ssh, "user@server", ['slurm'])
+        testbed.id = 3
+        node = Node()
+        node.id = 5
+        node.name = "nd1"
+        node.disabled = True
+
+        self.assertEquals(fanout.RemoteTestbed(3, "name1", Testbed.slurm_category, Testbed.protocol_ssh, "user@server"),
+                          fanout.remote_testbed(testbed))
+        self.assertEquals([ fanout.RemoteNode(5, "nd1", True) ], fanout.remote_nodes([ node ]))
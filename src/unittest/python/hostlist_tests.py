@@ -0,0 +1,89 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE hostlist module
+#
+
+import hostlist
+import unittest
+
+class HostlistTests(unittest.TestCase):
+    """
+    Unittests for the expansion and compression of SLURM hostlists
+    """
+
+    def test_expand(self):
+        """
+        It verifies the names are expanded in the same order as SLURM
+        """
+
+        self.assertEquals([ 'ns51' ], list(hostlist.expand('ns51')))
+        self.assertEquals([ 'ns51', 'ns52', 'ns53', 'ns55', 'ns34' ], list(hostlist.expand('ns[51-53,55],ns34')))
+        self.assertEquals([ 'nd001', 'nd002', 'nd003' ], list(hostlist.expand('nd[001-003]')))
+        self.assertEquals([ 'nd098', 'nd099', 'nd100' ], list(hostlist.expand('nd[098-100]')))
+        self.assertEquals([ 'rack1n01', 'rack1n02', 'rack2n01', 'rack2n02', 'login' ],
+                          list(hostlist.expand('rack[1-2]n[01-02],login')))
+        self.assertEquals([ 'nd1-ib', 'nd2-ib' ], list(hostlist.expand('nd[1-2]-ib')))
+        self.assertEquals([], list(hostlist.expand('')))
+
+        self.assertRaises(ValueError, hostlist.parse, 'nd[1-3')
+        self.assertRaises(ValueError, hostlist.parse, 'nd[3-1]')
+        self.assertRaises(ValueError, hostlist.parse, 'nd[a-b]')
+
+    def test_first_count_and_contains(self):
+        """
+        It verifies the hostlists are queried without expanding them
+        """
+
+        self.assertEquals('rack1n001', hostlist.first('rack[1-1000]n[001-100],login'))
+        self.assertIsNone(hostlist.first(''))
+
+        self.assertEquals(100001, hostlist.count('rack[1-1000]n[001-100],login'))
+        self.assertEquals(4, hostlist.count('ns[51-53,55]'))
+
+        self.assertTrue(hostlist.contains('rack[1-1000]n[001-100],login', 'rack500n050'))
+        self.assertTrue(hostlist.contains('rack[1-1000]n[001-100],login', 'login'))
+        self.assertFalse(hostlist.contains('rack[1-1000]n[001-100],login', 'rack500n50'))
+        self.assertFalse(hostlist.contains('rack[1-1000]n[001-100],login', 'rack1001n050'))
+        self.assertFalse(hostlist.contains('ns[51-53,55]', 'ns54'))
+
+    def test_compress(self):
+        """
+        It verifies node names are compressed keeping the zero padding
+        """
+
+        self.assertEquals('nd[1-3,7]', hostlist.compress([ 'nd1', 'nd2', 'nd3', 'nd7' ]))
+        self.assertEquals('nd1', hostlist.compress([ 'nd1' ]))
+        self.assertEquals('nd[1-2],login', hostlist.compress([ 'nd1', 'login', 'nd2', 'nd1' ]))
+        self.assertEquals('nd[001-003,007]', hostlist.compress([ 'nd007', 'nd001', 'nd002', 'nd003' ]))
+        self.assertEquals('nd[099-100]', hostlist.compress([ 'nd099', 'nd100' ]))
+        self.assertEquals('rack1n[01-02],rack2n01', hostlist.compress([ 'rack1n01', 'rack1n02', 'rack2n01' ]))
+        self.assertEquals('', hostlist.compress([]))
+
+    def test_round_trip(self):
+        """
+        It verifies that a 100k nodes hostlist is expanded and compressed
+        back to the same hostlist
+        """
+
+        names = [ 'nd' + str(i).zfill(6) for i in range(1, 100001) if i % 1000 != 0 ]
+
+        compressed = hostlist.compress(names)
+
+        self.assertEquals(99900, hostlist.count(compressed))
+        self.assertEquals(names, list(hostlist.expand(compressed)))
+        self.assertTrue(compressed.startswith('nd[000001-000999,001001-001999,'))
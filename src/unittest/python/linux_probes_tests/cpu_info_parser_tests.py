@@ -1,159 +1,267 @@
-#
-# Copyright 2018 Atos Research and Innovation
-#
-# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
-# use this file except in compliance with the License. You may obtain a copy of
-# the License at
-#
-# https://www.gnu.org/licenses/agpl-3.0.txt
-#
-# Unless required by applicable law or agreed to in writing, software
-# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
-# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
-# License for the specific language governing permissions and limitations under
-# the License.
-# 
-# This is being developed for the TANGO Project: http://tango-project.eu
-
-
-import unittest
-import unittest.mock as mock
-import shell
-import subprocess
-import linux_probes.cpu_info_parser as parser
-from models import Node, Testbed
-from testfixtures import LogCapture
-
-class CpuInfoParserTests(unittest.TestCase):
-    """Verifies the correct work of the funcions for parsing cpu info information"""
-
-    command_output=b'processor\t: 0\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 0\nsiblings\t: 4\ncore id\t\t: 0\ncpu cores\t: 4\napicid\t\t: 0\ninitial apicid\t: 0\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4533.65\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 1\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 0\nsiblings\t: 4\ncore id\t\t: 1\ncpu cores\t: 4\napicid\t\t: 2\ninitial apicid\t: 2\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4533.65\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 2\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 0\nsiblings\t: 4\ncore id\t\t: 2\ncpu cores\t: 4\napicid\t\t: 4\ninitial apicid\t: 4\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4533.65\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 3\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 0\nsiblings\t: 4\ncore id\t\t: 3\ncpu cores\t: 4\napicid\t\t: 6\ninitial apicid\t: 6\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4533.65\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 4\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 1\nsiblings\t: 4\ncore id\t\t: 0\ncpu cores\t: 4\napicid\t\t: 16\ninitial apicid\t: 16\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4532.67\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 5\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 1\nsiblings\t: 4\ncore id\t\t: 1\ncpu cores\t: 4\napicid\t\t: 18\ninitial apicid\t: 18\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4532.67\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 6\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 1\nsiblings\t: 4\ncore id\t\t: 2\ncpu cores\t: 4\napicid\t\t: 20\ninitial apicid\t: 20\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4532.67\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 7\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 1\nsiblings\t: 4\ncore id\t\t: 3\ncpu cores\t: 4\napicid\t\t: 22\ninitial apicid\t: 22\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4532.67\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\n'
-
-    def test_command_output(self):
-        """ It verifies that the function parse_cpu_info works as expected"""
-
-        cpus = parser.parse_cpu_info(self.command_output)
-
-        self.assertEquals(8, len(cpus))
-
-        i = 0
-        for cpu in cpus:
-            self.assertEquals('GenuineIntel', cpu.vendor_id)
-            self.assertEquals('Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz',
-                               cpu.model_name)
-            self.assertEquals('x86_64', cpu.arch)
-            self.assertEquals('26', cpu.model)
-            self.assertEquals('2267.000', cpu.speed)
-            self.assertTrue(cpu.fpu)
-            self.assertEquals(4, cpu.cores)
-            self.assertEquals('8192 KB', cpu.cache)
-            self.assertEquals('fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid',
-                               cpu.flags)
-            self.assertEquals(i // 4, cpu.physical_id)
-            self.assertEquals(4, cpu.siblings)
-            self.assertEquals(5, cpu.stepping)
-            self.assertEquals('17', cpu.microcode)
-            self.assertTrue(cpu.fpu_exception)
-            self.assertTrue(cpu.wp)
-            self.assertEquals('453', cpu.bogomips[0:3])
-            i = i + 1
-
-    @mock.patch("shell.execute_command")
-    def test_get_cpuinfo_node(self, mock_shell):
-        """
-        It verfies that given a testbed it is possible to get the cpuinfo
-        information of the node.
-        """
-
-        l = LogCapture() # we cature the logger
-
-        # When the testbed is local
-        testbed = Testbed("name1",
-                            True,
-                            Testbed.slurm_category,
-                            Testbed.protocol_local,
-                            "user@server",
-                            ['slurm'])
-
-        node_1 = Node() # We add some nodes to Testbed_1
-        node_1.name = "node_1"
-        node_1.information_retrieved = True
-        node_2 = Node()
-        node_2.name = "node_2"
-        node_2.information_retrieved = True
-        testbed.nodes = [ node_1, node_2]
-        node_1.disabled = True
-        node_3 = Node()
-        node_3.name = "node_3"
-        node_3.information_retrieved = True
-
-        # When the node does not belong to the testbed it should return empty list
-        cpus = parser.get_cpuinfo_node(testbed, node_3)
-
-        self.assertEquals(0, len(cpus))
-
-        # When the node is there, we have to get double CPU info
-        mock_shell.return_value = self.command_output
-
-        cpus = parser.get_cpuinfo_node(testbed, node_2)
-
-        self.assertEquals(8, len(cpus))
-        mock_shell.assert_called_with(command="ssh",
-                                      params=["node_2", "'cat", "/proc/cpuinfo'"])
-        self.assertEqual(mock_shell.call_count, 1)
-
-        # When the node is dissabled it should return an empty list
-        cpus = parser.get_cpuinfo_node(testbed, node_1)
-
-        self.assertEquals(0, len(cpus))
-        self.assertEqual(mock_shell.call_count, 1)
-
-        # When the testbed is using ssh protocol
-        testbed = Testbed("name1",
-                            True,
-                            Testbed.slurm_category,
-                            Testbed.protocol_ssh,
-                            "user@server",
-                            ['slurm'])
-        testbed.nodes = [node_2]
-
-        mock_shell.return_value = self.command_output
-
-        cpus = parser.get_cpuinfo_node(testbed, node_2)
-
-        self.assertEquals(8, len(cpus))
-        mock_shell.assert_called_with(command="ssh",
-                                      server=testbed.endpoint,
-                                      params=["node_2", "'cat", "/proc/cpuinfo'"])
-        self.assertEqual(mock_shell.call_count, 2)
-
-        # We simulate what happens if we get an exception executing the command
-        error = subprocess.CalledProcessError(returncode=255, cmd="ls")
-        mock_shell.side_effect = error
-
-        cpus = parser.get_cpuinfo_node(testbed, node_2)
-
-        self.assertEquals(0, len(cpus))
-        self.assertEqual(mock_shell.call_count, 3)
-
-        # When the testbed has an unknown protocol
-        testbed = Testbed("name1",
-                            True,
-                            Testbed.slurm_category,
-                            "xxx",
-                            "user@server",
-                            ['slurm'])
-        testbed.nodes = [node_2]
-
-        cpus = parser.get_cpuinfo_node(testbed, node_2)
-
-        self.assertEquals(0, len(cpus))
-        self.assertEqual(mock_shell.call_count, 3)
-
-        # We verify that we raised the right errors
-        # Checking that we are logging the correct messages
-        l.check(
-            ('root', 'ERROR', 'Exception trying to get the node cpu info'),
-            ('root', 'INFO', 'Tesbed protocol: xxx not supported to get node information')
-            )
-        l.uninstall() # We uninstall the capture of the logger
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+# 
+# This is being developed for the TANGO Project: http://tango-project.eu
+
+
+import unittest
+import unittest.mock as mock
+import shell
+import subprocess
+import linux_probes.cpu_info_parser as parser
+from models import Node, Testbed
+from testfixtures import LogCapture
+
+class CpuInfoParserTests(unittest.TestCase):
+    """Verifies the correct work of the funcions for parsing cpu info information"""
+
+    command_output=b'processor\t: 0\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 0\nsiblings\t: 4\ncore id\t\t: 0\ncpu cores\t: 4\napicid\t\t: 0\ninitial apicid\t: 0\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4533.65\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 1\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 0\nsiblings\t: 4\ncore id\t\t: 1\ncpu cores\t: 4\napicid\t\t: 2\ninitial apicid\t: 2\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4533.65\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 2\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 0\nsiblings\t: 4\ncore id\t\t: 2\ncpu cores\t: 4\napicid\t\t: 4\ninitial apicid\t: 4\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4533.65\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 3\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 0\nsiblings\t: 4\ncore id\t\t: 3\ncpu cores\t: 4\napicid\t\t: 6\ninitial apicid\t: 6\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4533.65\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 4\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 1\nsiblings\t: 4\ncore id\t\t: 0\ncpu cores\t: 4\napicid\t\t: 16\ninitial apicid\t: 16\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4532.67\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 5\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 1\nsiblings\t: 4\ncore id\t\t: 1\ncpu cores\t: 4\napicid\t\t: 18\ninitial apicid\t: 18\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4532.67\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 6\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 1\nsiblings\t: 4\ncore id\t\t: 2\ncpu cores\t: 4\napicid\t\t: 20\ninitial apicid\t: 20\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4532.67\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\nprocessor\t: 7\nvendor_id\t: GenuineIntel\ncpu family\t: 6\nmodel\t\t: 26\nmodel name\t: Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz\nstepping\t: 5\nmicrocode\t: 17\ncpu MHz\t\t: 2267.000\ncache size\t: 8192 KB\nphysical id\t: 1\nsiblings\t: 4\ncore id\t\t: 3\ncpu cores\t: 4\napicid\t\t: 22\ninitial apicid\t: 22\nfpu\t\t: yes\nfpu_exception\t: yes\ncpuid level\t: 11\nwp\t\t: yes\nflags\t\t: fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid\nbogomips\t: 4532.67\nclflush size\t: 64\ncache_alignment\t: 64\naddress sizes\t: 40 bits physical, 48 bits virtual\npower management:\n\n'
+
+    def test_command_output(self):
+        """ It verifies that the function parse_cpu_info works as expected"""
+
+        cpus = parser.parse_cpu_info(self.command_output)
+
+        self.assertEquals(8, len(cpus))
+
+        i = 0
+        for cpu in cpus:
+            self.assertEquals('GenuineIntel', cpu.vendor_id)
+            self.assertEquals('Intel(R) Xeon(R) CPU           E5520  @ 2.27GHz',
+                               cpu.model_name)
+            self.assertEquals('x86_64', cpu.arch)
+            self.assertEquals('26', cpu.model)
+            self.assertEquals('2267.000', cpu.speed)
+            self.assertTrue(cpu.fpu)
+            self.assertEquals(4, cpu.cores)
+            self.assertEquals('8192 KB', cpu.cache)
+            self.assertEquals('fpu vme de pse tsc msr pae mce cx8 apic sep mtrr pge mca cmov pat pse36 clflush dts acpi mmx fxsr sse sse2 ss ht tm pbe syscall nx rdtscp lm constant_tsc arch_perfmon pebs bts rep_good xtopology nonstop_tsc aperfmperf pni dtes64 monitor ds_cpl vmx est tm2 ssse3 cx16 xtpr pdcm dca sse4_1 sse4_2 popcnt lahf_lm ida dts tpr_shadow vnmi flexpriority ept vpid',
+                               cpu.flags)
+            self.assertEquals(i // 4, cpu.physical_id)
+            self.assertEquals(4, cpu.siblings)
+            self.assertEquals(5, cpu.stepping)
+            self.assertEquals('17', cpu.microcode)
+            self.assertTrue(cpu.fpu_exception)
+            self.assertTrue(cpu.wp)
+            self.assertEquals('453', cpu.bogomips[0:3])
+            i = i + 1
+
+    @mock.patch("shell.execute_command")
+    def test_get_cpuinfo_node(self, mock_shell):
+        """
+        It verfies that given a testbed it is possible to get the cpuinfo
+        information of the node.
+        """
+
+        l = LogCapture() # we cature the logger
+
+        # When the testbed is local
+        testbed = Testbed("name1",
+                            True,
+                            Testbed.slurm_category,
+                            Testbed.protocol_local,
+                            "user@server",
+                            ['slurm'])
+
+        node_1 = Node() # We add some nodes to Testbed_1
+        node_1.name = "node_1"
+        node_1.information_retrieved = True
+        node_2 = Node()
+        node_2.name = "node_2"
+        node_2.information_retrieved = True
+        testbed.nodes = [ node_1, node_2]
+        node_1.disabled = True
+        node_3 = Node()
+        node_3.name = "node_3"
+        node_3.information_retrieved = True
+
+        # When the node does not belong to the testbed it should return empty list
+        cpus = parser.get_cpuinfo_node(testbed, node_3)
+
+        self.assertEquals(0, len(cpus))
+
+        # When the node is there, we have to get double CPU info
+        mock_shell.return_value = self.command_output
+
+        cpus = parser.get_cpuinfo_node(testbed, node_2)
+
+        self.assertEquals(8, len(cpus))
+        mock_shell.assert_called_with(command="ssh",
+                                      params=["node_2", "'cat", "/proc/cpuinfo'"])
+        self.assertEqual(mock_shell.call_count, 1)
+
+        # When the node is dissabled it should return an empty list
+        cpus = parser.get_cpuinfo_node(testbed, node_1)
+
+        self.assertEquals(0, len(cpus))
+        self.assertEqual(mock_shell.call_count, 1)
+
+        # When the testbed is using ssh protocol
+        testbed = Testbed("name1",
+                            True,
+                            Testbed.slurm_category,
+                            Testbed.protocol_ssh,
+                            "user@server",
+                            ['slurm'])
+        testbed.nodes = [node_2]
+
+        mock_shell.return_value = self.command_output
+
+        cpus = parser.get_cpuinfo_node(testbed, node_2)
+
+        self.assertEquals(8, len(cpus))
+        mock_shell.assert_called_with(command="ssh",
+                                      server=testbed.endpoint,
+                                      params=["node_2", "'cat", "/proc/cpuinfo'"])
+        self.assertEqual(mock_shell.call_count, 2)
+
+        # We simulate what happens if we get an exception executing the command
+        error = subprocess.CalledProcessError(returncode=255, cmd="ls")
+        mock_shell.side_effect = error
+
+        cpus = parser.get_cpuinfo_node(testbed, node_2)
+
+        self.assertEquals(0, len(cpus))
+        self.assertEqual(mock_shell.call_count, 3)
+
+        # When the testbed has an unknown protocol
+        testbed = Testbed("name1",
+                            True,
+                            Testbed.slurm_category,
+                            "xxx",
+                            "user@server",
+                            ['slurm'])
+        testbed.nodes = [node_2]
+
+        cpus = parser.get_cpuinfo_node(testbed, node_2)
+
+        self.assertEquals(0, len(cpus))
+        self.assertEqual(mock_shell.call_count, 3)
+
+        # We verify that we raised the right errors
+        # Checking that we are logging the correct messages
+        l.check(
+            ('root', 'ERROR', 'Exception trying to get the node cpu info'),
+            ('root', 'INFO', 'Tesbed protocol: xxx not supported to get node information')
+            )
+        l.uninstall() # We uninstall the capture of the logger
+
+    @mock.patch('shell.execute_batch')
+    def test_get_cpuinfo_nodes(self, mock_batch):
+        """
+        It verifies that the cpu info of several nodes is retrieved
+        in one single call to the testbed
+        """
+
+        l = LogCapture() # we cature the logger
+
+        node_1 = Node()
+        node_1.name = "node_1"
+        node_1.disabled = True
+        node_2 = Node()
+        node_2.name = "node_2"
+        node_2.disabled = False
+        node_3 = Node()
+        node_3.name = "node_3"
+        node_3.disabled = False
+
+        testbed = Testbed("name1",
+                            True,
+                            Testbed.slurm_category,
+                            Testbed.protocol_ssh,
+                            "user@server",
+                            ['slurm'])
+        testbed.nodes = [node_1, node_2, node_3]
+
+        mock_batch.return_value = [ shell.BatchResult('ssh', self.command_output, b'', 0),
+                                    shell.BatchResult('ssh', b'', b'Connection refused', 255) ]
+
+        cpus = parser.get_cpuinfo_nodes(testbed, testbed.nodes)
+
+        self.assertEquals(8, len(cpus['node_2']))
+        self.assertEquals(0, len(cpus['node_3']))
+        self.assertFalse('node_1' in cpus)
+        mock_batch.assert_called_with([ ("ssh", parser.NODE_SSH_OPTIONS + ["node_2", "'cat", "/proc/cpuinfo'"]),
+                                        ("ssh", parser.NODE_SSH_OPTIONS + ["node_3", "'cat", "/proc/cpuinfo'"]) ],
+                                      "user@server", parallel=parser.CPUINFO_PARALLEL)
+
+        # The failures are reported per node, a node that can not be parsed
+        # does not affect the other ones
+        node_4 = Node()
+        node_4.name = "node_4"
+        node_4.disabled = False
+        node_5 = Node()
+        node_5.name = "node_5"
+        node_5.disabled = False
+        testbed.nodes = [node_1, node_2, node_3, node_4, node_5]
+
+        mock_batch.return_value = [ shell.BatchResult('ssh', self.command_output, b'', 0),
+                                    shell.BatchResult('ssh', b'', b'ssh: connect to host node_3: No route to host\n', 255),
+                                    shell.BatchResult('ssh', b'vendor_id : AuthenticAMD\n', b'', 0) ]
+
+        cpus = parser.get_cpuinfo_nodes(testbed, testbed.nodes)
+
+        self.assertEquals({ 'node_2': 8, 'node_3': 0, 'node_4': 0, 'node_5': 0 },
+                          { name: len(node_cpus) for name, node_cpus in cpus.items() })
+        testbed.nodes = [node_1, node_2, node_3]
+
+        # If the testbed is not reachable all nodes are empty
+        mock_batch.side_effect = subprocess.CalledProcessError(returncode=255, cmd="ssh")
+
+        cpus = parser.get_cpuinfo_nodes(testbed, testbed.nodes)
+
+        self.assertEquals({ 'node_2': [], 'node_3': [] }, cpus)
+
+        # Unknown protocol
+        testbed.protocol = "xxx"
+        self.assertEquals({}, parser.get_cpuinfo_nodes(testbed, testbed.nodes))
+        self.assertEqual(mock_batch.call_count, 3)
+
+        l.check(
+            ('root', 'ERROR', 'Impossible to get the cpu info of node: node_3, exit code 255: Connection refused'),
+            ('root', 'ERROR', 'Impossible to get the cpu info of node: node_3, exit code 255: ssh: connect to host node_3: No route to host'),
+            ('root', 'ERROR', 'Impossible to get the cpu info of node: node_5, the command was interrupted'),
+            ('root', 'ERROR', 'Impossible to parse the cpu info of node: node_4'),
+            ('root', 'ERROR', 'Exception trying to get the nodes cpu info'),
+            ('root', 'INFO', 'Tesbed protocol: xxx not supported to get node information')
+            )
+        l.uninstall() # We uninstall the capture of the logger
+
+    @mock.patch('shell.execute_batch')
+    @mock.patch('linux_probes.cpu_info_parser.parse_cpu_info')
+    def test_probe_cpuinfo_nodes(self, mock_parse, mock_batch):
+        """
+        It verifies that the cpuinfo of a node is not parsed if its
+        digest did not change
+        """
+
+        mock_parse.return_value = [ 'cpu' ]
+
+        testbed = Testbed("name1", True, Testbed.slurm_category, Testbed.protocol_ssh, "user@server", ['slurm'])
+        node_1 = type('Node', (), { 'name': 'node_1', 'disabled': False })
+        node_2 = type('Node', (), { 'name': 'node_2', 'disabled': False })
+        node_3 = type('Node', (), { 'name': 'node_3', 'disabled': False })
+
+        mock_batch.return_value = [ shell.BatchResult('ssh', b'cpuinfo 1', b'', 0),
+                                    shell.BatchResult('ssh', b'cpuinfo 2', b'', 0),
+                                    shell.BatchResult('ssh', b'', b'Connection refused', 255) ]
+
+        probes = parser.probe_cpuinfo_nodes(testbed, [ node_1, node_2, node_3 ],
+                                            { 'node_1': parser.cpuinfo_digest(b'cpuinfo 1'), 'node_2': parser.cpuinfo_digest(b'old') })
+
+        self.assertEquals(parser.CpuinfoProbe(parser.cpuinfo_digest(b'cpuinfo 1'), None), probes['node_1'])
+        self.assertEquals(parser.CpuinfoProbe(parser.cpuinfo_digest(b'cpuinfo 2'), [ 'cpu' ]), probes['node_2'])
+        self.assertEquals(parser.CpuinfoProbe(None, []), probes['node_3'])
+        mock_parse.assert_called_once_with(b'cpuinfo 2')
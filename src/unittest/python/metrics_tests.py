@@ -0,0 +1,102 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE metrics module
+#
+
+import unittest
+import metrics
+import shell
+import subprocess
+
+class MetricsTests(unittest.TestCase):
+    """
+    Unittests for the functions of the metrics file
+    """
+
+    def setUp(self):
+        """ Each test starts without any recorded command """
+
+        metrics.shell.clear()
+
+    def test_histogram(self):
+        """
+        It verifies the percentiles are estimated inside the bucket
+        where they fall
+        """
+
+        histogram = metrics.Histogram([ 1, 2, 4 ])
+
+        self.assertIsNone(histogram.percentile(50))
+
+        for value in [ 0.5 ] * 50 + [ 1.5 ] * 45 + [ 3 ] * 4 + [ 10 ]:
+            histogram.add(value)
+
+        self.assertEquals(100, histogram.count)
+        self.assertEquals(10, histogram.max)
+        self.assertEquals([ 50, 45, 4, 1 ], histogram.buckets)
+        self.assertEquals(1.0, histogram.percentile(50))
+        self.assertEquals(2.0, histogram.percentile(95))
+        self.assertEquals(4.0, histogram.percentile(99))
+        self.assertEquals(10, histogram.percentile(100))
+
+        summary = histogram.summary()
+        self.assertEquals(100, summary['count'])
+        self.assertAlmostEqual(1.145, summary['mean'])
+
+    def test_record(self):
+        """
+        It verifies the invocations are aggregated by command and the
+        slowest ones are returned first
+        """
+
+        metrics.shell.record('sinfo', 'user@host', 0.2, 0, 20, 1000)
+        metrics.shell.record('sinfo', 'user@host', 0.4, 1, 20, 10)
+        metrics.shell.record('sacct', 'other@host', 3.0, 'timeout', 30, 0)
+        metrics.shell.record('scp', '', 0.1, 0, 5000, 0)
+
+        summary = metrics.shell.summary(2)
+
+        sinfo = summary['commands']['sinfo']
+        self.assertEquals(2, sinfo['wall_time']['count'])
+        self.assertEquals(0.4, sinfo['wall_time']['max'])
+        self.assertEquals({ '0': 1, '1': 1 }, sinfo['statuses'])
+        self.assertEquals(1, sinfo['errors'])
+        self.assertEquals(40, sinfo['bytes_out'])
+        self.assertEquals(1010, sinfo['bytes_in'])
+        self.assertEquals({ 'user@host': 2 }, sinfo['endpoints'])
+        self.assertEquals({ 'timeout': 1 }, summary['commands']['sacct']['statuses'])
+
+        self.assertEquals([ 'sacct', 'sinfo' ], [ invocation['command'] for invocation in summary['slowest'] ])
+        self.assertEquals(0.4, summary['slowest'][1]['wall_time'])
+
+    def test_shell_commands_are_recorded(self):
+        """
+        It verifies that the shell module records each command it executes
+        """
+
+        shell.execute_command('echo', params=[ 'hello' ])
+        self.assertRaises(subprocess.CalledProcessError, shell.execute_command, 'exit 3')
+        self.assertEquals([ 'a' ], list(shell.execute_command_stream('echo a')))
+
+        commands = metrics.shell.summary()['commands']
+
+        self.assertEquals(2, commands['echo']['wall_time']['count'])
+        self.assertEquals({ '0': 2 }, commands['echo']['statuses'])
+        self.assertEquals(8, commands['echo']['bytes_in'])
+        self.assertEquals({ '3': 1 }, commands['exit']['statuses'])
+        self.assertEquals(1, commands['exit']['errors'])
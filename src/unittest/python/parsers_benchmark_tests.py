@@ -0,0 +1,71 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks the benchmark of the SLURM output parsers runs
+#
+
+import executor
+import json
+import os
+import slurm
+import tempfile
+import unittest
+from benchmarks import parsers_benchmark, synthetic
+
+class ParsersBenchmarkTests(unittest.TestCase):
+    """
+    It runs the benchmark with a small cluster, so it keeps working
+    while the parsers change
+    """
+
+    def test_synthetic_outputs(self):
+        """
+        It verifies the synthetic outputs have all the nodes and jobs
+        """
+
+        outputs = synthetic.generate_outputs(50, 20)
+
+        self.assertEquals(50, len(slurm.parse_sinfo_partitions(outputs['sinfo'])))
+        self.assertEquals(50, len(slurm.parse_scontrol_information(outputs['scontrol'])))
+        self.assertEquals(20, len(executor.__parse_sacct_table__(outputs['sacct'])))
+        self.assertEquals(20, len(outputs['sbatch']))
+
+    def test_run_and_compare(self):
+        """
+        It verifies each parser is measured and two runs are compared
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results', 'run.json')
+
+            document = parsers_benchmark.main([ '--nodes', '10,20', '--jobs', '5', '--repeat', '1', '--output', output ])
+
+            with open(output) as output_file:
+                self.assertEquals(document['results'], json.load(output_file)['results'])
+
+        self.assertEquals(16, len(document['results']))
+        self.assertEquals([ 'sinfo', 'scontrol', 'scontrol_fields', 'gres', 'cpuinfo', 'squeue', 'sbatch', 'sacct' ],
+                          [ result['parser'] for result in document['results'][:8] ])
+
+        sinfo = document['results'][8]
+        self.assertEquals(20, sinfo['nodes'])
+        self.assertEquals(20, sinfo['items'])
+        self.assertTrue(sinfo['peak_memory'] > 0)
+
+        lines = parsers_benchmark.compare(document, document)
+        self.assertEquals(17, len(lines))
+        self.assertIn('1.00x', lines[1])
@@ -1,126 +1,424 @@
-#
-# Copyright 2018 Atos Research and Innovation
-#
-# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
-# use this file except in compliance with the License. You may obtain a copy of
-# the License at
-#
-# https://www.gnu.org/licenses/agpl-3.0.txt
-#
-# Unless required by applicable law or agreed to in writing, software
-# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
-# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
-# License for the specific language governing permissions and limitations under
-# the License.
-# 
-# This is being developed for the TANGO Project: http://tango-project.eu
-#
-# Unit tests that checks ALDE shell module
-#
-
-import unittest
-import unittest.mock as mock
-import shell
-import subprocess
-from testfixtures import LogCapture
-
-class ShellTests(unittest.TestCase):
-    """
-    Unittests for the functions of the shell file
-    """
-
-    @mock.patch('shell.subprocess')
-    def test_check_port_notation(self, mock_subprocess):
-        """
-        It checks taht we are parsing correctly the : for extracting the
-        port and adding it as a parameter
-        """
-
-        shell.execute_command(command = "ls",
-                              server="pepito@ssh.com:2222",
-                              params=["-la", "."])
-
-        # We verify that the right params are passed to the mock_subprocess
-        mock_subprocess.check_output.assert_called_with(" ssh -p 2222 pepito@ssh.com ls -la .", shell=True)
-
-
-
-    @mock.patch('shell.subprocess')
-    def test_non_ssh_command(self, mock_subprocess):
-        """ test that a command is executed without using ssh """
-
-        # We setup the mock
-        mock_subprocess.check_output.return_value = "It is ok"
-
-        output = shell.execute_command(command = "ls")
-
-        # We verify this simple commands works
-        self.assertEquals("It is ok", output)
-        mock_subprocess.check_output.assert_called_with("ls", shell=True)
-
-        # We verify a more complex scenario with several params
-        output = shell.execute_command(command = "ls", params=["-la", "."])
-        # We verify that the params are passed in the correct way
-        mock_subprocess.check_output.assert_called_with(" ls -la .", shell=True)
-
-    @mock.patch('shell.subprocess')
-    def test_ssh_command(self, mock_subprocess):
-        """
-        Test that it is possible to exectue an ssh command if a server is given
-        """
-
-        shell.execute_command(command = "ls",
-                              server="pepito@ssh.com",
-                              params=["-la", "."])
-
-        # We verify that the right params are passed to the mock_subprocess
-        mock_subprocess.check_output.assert_called_with(" ssh pepito@ssh.com ls -la .", shell=True)
-
-    @mock.patch('shell.subprocess.check_output')
-    def test_raise_exception(self, mock_subprocess):
-        """
-        It verifies that an exception is raised when an error occours when
-        exectuting a command, the exception will be handled latar own
-        by the script that uses this function
-        """
-
-        l = LogCapture() # we cature the logger
-
-        error = subprocess.CalledProcessError(returncode=255, cmd="ls", output="failed")
-        mock_subprocess.side_effect = error
-
-        self.assertRaises(subprocess.CalledProcessError,
-                          shell.execute_command,
-                          command="ls",
-                          params=["-la", "."])
-
-        # Checking that we are logging the correct messages
-        l.check(
-            ('root', 'INFO', 'Executing: ls -la .'),
-            ('root', 'ERROR', "Trying to execute command:  ls -la ."),
-            ('root', 'ERROR', "Error: Command 'ls' returned non-zero exit status 255."),
-            ('root', 'ERROR', "failed"),
-            ('root', 'ERROR', 'Trying to execute command at server ')
-            )
-        l.uninstall() # We uninstall the capture of the logger
-
-    @mock.patch('shell.subprocess')
-    def test_scp_file(self, mock_subprocess):
-        """
-        Test that the command to scp a file is correctly done
-        """
-
-        shell.scp_file('/path/file', 'user@host', 'destination_path')
-
-        # We verify that the right params are passed to the mock_subproces
-        mock_subprocess.check_output.assert_called_with(' scp /path/file user@host:destination_path', shell=True)
-
-        shell.scp_file('/path/file', 'user@host:5000', 'destination_path')
-
-        # We verify that the right params are passed to the mock_subproces
-        mock_subprocess.check_output.assert_called_with(' scp -P 5000 /path/file user@host:destination_path', shell=True)
-
-        shell.scp_file('/path/file', 'user@host', 'destination_path', False)
-
-        # We verify that the right params are passed to the mock_subproces
-        mock_subprocess.check_output.assert_called_with(' scp user@host:destination_path /path/file', shell=True)
\ No newline at end of file
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+# 
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE shell module
+#
+
+import asyncio
+import unittest
+import unittest.mock as mock
+import shell
+import shlex
+import subprocess
+import threading
+import time
+from testfixtures import LogCapture
+
+class ShellTests(unittest.TestCase):
+    """
+    Unittests for the functions of the shell file
+    """
+
+    def setUp(self):
+        """ Each test starts with an empty connection pool """
+
+        shell.connection_pool = shell.ConnectionPool()
+
+    def _pool_options(self, server):
+        """
+        It returns the ssh options added by the connection pool
+        for the given server
+        """
+
+        return " -o ControlMaster=auto -o ControlPath=" + shell.connection_pool.control_path(server) + " -o ControlPersist=300"
+
+    def _mock_process(self, mock_popen, output=b'', returncode=0):
+        """
+        It configures the mocked Popen to return a process that
+        finishes with the given output and exit code
+        """
+
+        mock_popen.return_value.communicate.return_value = (output, None)
+        mock_popen.return_value.returncode = returncode
+
+    def _assert_executed(self, mock_popen, cmd):
+        """
+        It verifies that the last command was executed in its own session
+        """
+
+        mock_popen.assert_called_with(cmd, shell=True, stdout=subprocess.PIPE, start_new_session=True)
+
+    @mock.patch('shell.subprocess.Popen')
+    def test_check_port_notation(self, mock_popen):
+        """
+        It checks taht we are parsing correctly the : for extracting the
+        port and adding it as a parameter
+        """
+
+        self._mock_process(mock_popen)
+
+        shell.execute_command(command = "ls",
+                              server="pepito@ssh.com:2222",
+                              params=["-la", "."])
+
+        # We verify that the right params are passed to the mock_subprocess
+        self._assert_executed(mock_popen, " ssh" + self._pool_options("pepito@ssh.com:2222") + " -p 2222 pepito@ssh.com ls -la .")
+
+
+
+    @mock.patch('shell.subprocess.Popen')
+    def test_non_ssh_command(self, mock_popen):
+        """ test that a command is executed without using ssh """
+
+        # We setup the mock
+        self._mock_process(mock_popen, "It is ok")
+
+        output = shell.execute_command(command = "ls")
+
+        # We verify this simple commands works
+        self.assertEquals("It is ok", output)
+        self._assert_executed(mock_popen, "ls")
+
+        # We verify a more complex scenario with several params
+        output = shell.execute_command(command = "ls", params=["-la", "."])
+        # We verify that the params are passed in the correct way
+        self._assert_executed(mock_popen, " ls -la .")
+
+    @mock.patch('shell.subprocess.Popen')
+    def test_ssh_command(self, mock_popen):
+        """
+        Test that it is possible to exectue an ssh command if a server is given
+        """
+
+        self._mock_process(mock_popen)
+
+        shell.execute_command(command = "ls",
+                              server="pepito@ssh.com",
+                              params=["-la", "."])
+
+        # We verify that the right params are passed to the mock_subprocess
+        self._assert_executed(mock_popen, " ssh" + self._pool_options("pepito@ssh.com") + " pepito@ssh.com ls -la .")
+
+    @mock.patch('shell.subprocess.Popen')
+    def test_raise_exception(self, mock_popen):
+        """
+        It verifies that an exception is raised when an error occours when
+        exectuting a command, the exception will be handled latar own
+        by the script that uses this function
+        """
+
+        l = LogCapture() # we cature the logger
+
+        self._mock_process(mock_popen, "failed", 255)
+
+        self.assertRaises(subprocess.CalledProcessError,
+                          shell.execute_command,
+                          command="ls",
+                          params=["-la", "."])
+
+        # Checking that we are logging the correct messages
+        l.check(
+            ('root', 'INFO', 'Executing: ls -la .'),
+            ('root', 'ERROR', "Trying to execute command:  ls -la ."),
+            ('root', 'ERROR', "Error: Command ' ls -la .' returned non-zero exit status 255."),
+            ('root', 'ERROR', "failed"),
+            ('root', 'ERROR', 'Trying to execute command at server ')
+            )
+        l.uninstall() # We uninstall the capture of the logger
+
+    @mock.patch('shell.subprocess.Popen')
+    def test_scp_file(self, mock_popen):
+        """
+        Test that the command to scp a file is correctly done
+        """
+
+        self._mock_process(mock_popen)
+
+        shell.scp_file('/path/file', 'user@host', 'destination_path')
+
+        # We verify that the right params are passed to the mock_subproces
+        self._assert_executed(mock_popen, ' scp' + self._pool_options('user@host') + ' /path/file user@host:destination_path')
+
+        shell.scp_file('/path/file', 'user@host:5000', 'destination_path')
+
+        # We verify that the right params are passed to the mock_subproces
+        self._assert_executed(mock_popen, ' scp' + self._pool_options('user@host:5000') + ' -P 5000 /path/file user@host:destination_path')
+
+        shell.scp_file('/path/file', 'user@host', 'destination_path', False)
+
+        # We verify that the right params are passed to the mock_subproces
+        self._assert_executed(mock_popen, ' scp' + self._pool_options('user@host') + ' user@host:destination_path /path/file')
+
+    @mock.patch('shell.subprocess.Popen')
+    def test_connection_pool_reuse(self, mock_popen):
+        """
+        It verifies the connection pool keeps one master connection
+        per endpoint and counts how many times it is reused
+        """
+
+        self._mock_process(mock_popen)
+
+        shell.execute_command(command="ls", server="pepito@ssh.com:2222")
+        shell.execute_command(command="ls", server="pepito@ssh.com:2222")
+        shell.scp_file('/path/file', 'pepito@ssh.com:2222', 'destination_path')
+        shell.execute_command(command="ls", server="other@ssh.com")
+
+        stats = shell.get_connection_pool_stats()
+        self.assertTrue(stats['enabled'])
+        self.assertEquals(2, stats['opened'])
+        self.assertEquals(2, stats['reused'])
+        self.assertEquals(0, stats['evicted'])
+        self.assertEquals(2, len(stats['connections']))
+
+        connection = next(c for c in stats['connections'] if c['endpoint'] == "pepito@ssh.com:2222")
+        self.assertEquals(3, connection['uses'])
+
+        self.assertNotEqual(shell.connection_pool.control_path("pepito@ssh.com:2222"),
+                            shell.connection_pool.control_path("other@ssh.com"))
+
+        # If disabled no extra options are added
+        shell.connection_pool.enabled = False
+        shell.execute_command(command="ls", server="pepito@ssh.com")
+        self._assert_executed(mock_popen, " ssh pepito@ssh.com ls")
+
+    @mock.patch('shell.subprocess')
+    def test_maintain_connection_pool(self, mock_subprocess):
+        """
+        It verifies idle connections are closed and dead connections
+        are removed from the pool
+        """
+
+        self._mock_process(mock_subprocess.Popen)
+
+        shell.execute_command(command="ls", server="pepito@ssh.com:2222")
+        shell.execute_command(command="ls", server="other@ssh.com")
+        shell.connection_pool.connections["pepito@ssh.com:2222"]['last_used'] -= 1000
+
+        # The master connection of other@ssh.com is dead
+        mock_subprocess.call.return_value = 1
+
+        shell.maintain_connection_pool()
+
+        control_path = shell.connection_pool.control_path("pepito@ssh.com:2222")
+        mock_subprocess.call.assert_any_call(['ssh', '-O', 'exit', '-o', 'ControlPath=' + control_path, '-p', '2222', 'pepito@ssh.com'],
+                                             stdout=mock_subprocess.DEVNULL,
+                                             stderr=mock_subprocess.DEVNULL)
+        control_path = shell.connection_pool.control_path("other@ssh.com")
+        mock_subprocess.call.assert_called_with(['ssh', '-O', 'check', '-o', 'ControlPath=' + control_path, 'other@ssh.com'],
+                                                stdout=mock_subprocess.DEVNULL,
+                                                stderr=mock_subprocess.DEVNULL)
+
+        stats = shell.get_connection_pool_stats()
+        self.assertEquals(2, stats['evicted'])
+        self.assertEquals(0, len(stats['connections']))
+
+    def test_execute_command_async(self):
+        """
+        It verifies that the asyncio engine executes commands and
+        raises an exception when the command fails
+        """
+
+        outputs = shell.execute_commands([
+                    { 'command': 'echo', 'params': [ 'hello' ] },
+                    { 'command': 'exit 3' },
+                    { 'command': 'echo bye' } ])
+
+        self.assertEquals(b'hello\n', outputs[0])
+        self.assertIsInstance(outputs[1], subprocess.CalledProcessError)
+        self.assertEquals(3, outputs[1].returncode)
+        self.assertEquals(b'bye\n', outputs[2])
+
+    @mock.patch('shell._execute_command_async')
+    def test_endpoint_concurrency(self, mock_execute):
+        """
+        It verifies that the number of commands running at the same
+        time against an endpoint is limited
+        """
+
+        running = { 'now': 0, 'max': 0 }
+
+        async def fake_execute(command, timeout=None):
+            running['now'] += 1
+            running['max'] = max(running['max'], running['now'])
+            await asyncio.sleep(0.01)
+            running['now'] -= 1
+            return command
+
+        mock_execute.side_effect = fake_execute
+
+        shell.connection_pool.enabled = False
+        shell.set_endpoint_concurrency('user@host', 2)
+
+        outputs = shell.execute_commands([ { 'command': 'ls', 'server': 'user@host', 'params': [ str(i) ] } for i in range(10) ])
+
+        self.assertEquals(2, running['max'])
+        self.assertEquals(10, len(outputs))
+        self.assertEquals(['ssh', 'user@host', 'ls 0'], outputs[0])
+
+        running['max'] = 0
+        shell.execute_commands([ { 'command': 'ls', 'server': 'other@host' } for i in range(10) ])
+        self.assertEquals(shell.DEFAULT_ENDPOINT_CONCURRENCY, running['max'])
+
+        del shell.endpoint_concurrency['user@host']
+
+    def test_execute_batch(self):
+        """
+        It verifies that several commands are executed in one shell
+        and its stdout, stderr and exit code are separated
+        """
+
+        results = shell.execute_batch([ 'echo out; echo err >&2',
+                                        ('printf', [ 'no_new_line' ]),
+                                        'exit 4',
+                                        'echo "$HOME" | wc -l' ])
+
+        self.assertEquals(4, len(results))
+        self.assertEquals(shell.BatchResult('echo out; echo err >&2', b'out\n', b'err\n', 0), results[0])
+        self.assertEquals(shell.BatchResult('printf no_new_line', b'no_new_line', b'', 0), results[1])
+        self.assertEquals(shell.BatchResult('exit 4', b'', b'', 4), results[2])
+        self.assertEquals(b'1\n', results[3].output)
+
+        self.assertEquals([], shell.execute_batch([]))
+
+    def test_execute_batch_parallel(self):
+        """
+        It verifies that the commands of a batch can run at the same
+        time keeping the order and framing of the results
+        """
+
+        commands = [ 'sleep 0.3; echo a', 'echo err >&2; exit 3', ('printf', [ 'no_new_line' ]), 'sleep 0.3; echo b', 'echo c' ]
+
+        start = time.time()
+        results = shell.execute_batch(commands, parallel=4)
+        elapsed = time.time() - start
+
+        self.assertTrue(elapsed < 0.55)
+        self.assertEquals([ shell.BatchResult('sleep 0.3; echo a', b'a\n', b'', 0),
+                            shell.BatchResult('echo err >&2; exit 3', b'', b'err\n', 3),
+                            shell.BatchResult('printf no_new_line', b'no_new_line', b'', 0),
+                            shell.BatchResult('sleep 0.3; echo b', b'b\n', b'', 0),
+                            shell.BatchResult('echo c', b'c\n', b'', 0) ], results)
+
+        # Groups of two commands, the sleeps run one after the other
+        start = time.time()
+        results = shell.execute_batch([ 'sleep 0.2', 'sleep 0.2', 'sleep 0.2' ], parallel=2)
+
+        self.assertTrue(time.time() - start >= 0.4)
+        self.assertEquals([ 0, 0, 0 ], [ result.returncode for result in results ])
+
+    @mock.patch('shell.execute_command')
+    def test_execute_batch_ssh(self, mock_execute):
+        """
+        It verifies that the batch is sent as one single ssh command
+        """
+
+        def fake_execute(command, server='', timeout=None, cancel=None):
+            script = shlex.split(command)[0]
+            return subprocess.check_output(script, shell=True)
+
+        mock_execute.side_effect = fake_execute
+
+        results = shell.execute_batch([ ('sinfo', [ '-a' ]), 'echo "a b"' ], 'user@host')
+
+        self.assertEquals(1, mock_execute.call_count)
+        self.assertEquals('user@host', mock_execute.call_args[0][1])
+        self.assertEquals(127, results[0].returncode)
+        self.assertEquals(b'a b\n', results[1].output)
+
+    def test_execute_command_stream(self):
+        """
+        It verifies that the output of a command is yielded line by line
+        and that the error is raised after the last line
+        """
+
+        lines = shell.execute_command_stream(command="printf", params=[ "'a\\nb\\nc'" ])
+        self.assertEquals('a', next(lines))
+        self.assertEquals(['b', 'c'], list(lines))
+
+        lines = shell.execute_command_stream(command="echo a; exit 2")
+        self.assertEquals('a', next(lines))
+        self.assertRaises(subprocess.CalledProcessError, next, lines)
+
+        # Closing the generator before the end stops the command
+        lines = shell.execute_command_stream(command="yes")
+        self.assertEquals('y', next(lines))
+        lines.close()
+
+    def test_iter_lines(self):
+        """
+        It verifies that the lines of an output are iterated in the
+        same way as decoding and splitting it
+        """
+
+        for output in [ b'', b'a', b'a\nb', b'a\nb\n', b'\n\n' ]:
+            self.assertEquals(output.decode('utf-8').split('\n'), list(shell.iter_lines(output)))
+
+        self.assertEquals(['a', 'b'], list(shell.iter_lines(iter(['a', 'b']))))
+
+    def test_command_timeout(self):
+        """
+        It verifies that a command that runs for too long is killed,
+        together with its children, and the timeout is recorded
+        """
+
+        shell.timeouts.clear()
+        self.assertEquals(60, shell.command_timeout('sinfo'))
+        self.assertEquals(5, shell.command_timeout('sinfo', 5))
+        self.assertIsNone(shell.command_timeout('singularity'))
+        self.assertEquals(shell.DEFAULT_COMMAND_TIMEOUT, shell.command_timeout('ls'))
+
+        start = time.monotonic()
+        with self.assertRaises(shell.CommandTimeout) as context:
+            shell.execute_command('sleep 30 & sleep 30; wait', timeout=0.3)
+
+        self.assertTrue(time.monotonic() - start < 5)
+        self.assertIsInstance(context.exception, subprocess.TimeoutExpired)
+        self.assertEquals(0.3, context.exception.timeout)
+
+        lines = shell.execute_command_stream('echo a; sleep 30', timeout=0.3)
+        self.assertEquals('a', next(lines))
+        self.assertRaises(shell.CommandTimeout, list, lines)
+
+        outputs = shell.execute_commands([ { 'command': 'sleep 30', 'timeout': 0.3 } ])
+        self.assertIsInstance(outputs[0], shell.CommandTimeout)
+
+        stats = shell.get_timeout_stats()
+        self.assertEquals(1, len(stats))
+        self.assertEquals('', stats[0]['endpoint'])
+        self.assertEquals(3, stats[0]['count'])
+        self.assertEquals({ 'sleep': 2, 'echo': 1 }, stats[0]['commands'])
+
+        shell.timeouts.clear()
+
+    def test_command_cancelled(self):
+        """
+        It verifies that a running command is killed when its cancel
+        event is set
+        """
+
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+
+        start = time.monotonic()
+        self.assertRaises(shell.CommandCancelled,
+                          shell.execute_command,
+                          'sleep 30',
+                          cancel=cancel)
+        self.assertTrue(time.monotonic() - start < 5)
+
+        # A command that is not cancelled just finishes
+        self.assertEquals(b'ok\n', shell.execute_command('echo ok', cancel=threading.Event()))
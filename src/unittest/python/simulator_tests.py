@@ -0,0 +1,162 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE SLURM simulator
+#
+
+import command_cache
+import executor
+import shell
+import simulator
+import slurm
+import subprocess
+import unittest
+import linux_probes.cpu_info_parser as parser
+from models import Testbed
+
+class Clock():
+    """ Manual clock to control the simulated time """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class SimulatorTests(unittest.TestCase):
+    """
+    Unittests for the simulated SLURM cluster, its output is parsed
+    with the same functions that parse the output of a real cluster
+    """
+
+    def setUp(self):
+        """ It registers a simulated cluster with 10 nodes """
+
+        command_cache.results.clear()
+        self.clock = Clock()
+        self.cluster = simulator.SimulatedCluster({ 'nodes': 10,
+                                                    'partitions': [ 'bullx', 'gpus' ],
+                                                    'gpus_per_node': 2,
+                                                    'job_duration': 100,
+                                                    'seed': 1 },
+                                                  self.clock)
+        shell.register_backend('sim@cluster', self.cluster)
+        self.testbed = Testbed('sim', True, Testbed.slurm_category, Testbed.protocol_simulated, 'sim@cluster')
+
+    def tearDown(self):
+        """ It unregisters the simulated cluster """
+
+        shell.unregister_backend('sim@cluster')
+
+    def test_node_information(self):
+        """
+        It verifies the output of sinfo, scontrol and /proc/cpuinfo
+        """
+
+        nodes = slurm.get_nodes_testbed(self.testbed)
+
+        self.assertEquals([ 'nd' + str(i) for i in range(1, 11) ], [ node['node_name'] for node in nodes ])
+        self.assertEquals('bullx', nodes[0]['partition'])
+        self.assertEquals('gpus', nodes[9]['partition'])
+        self.assertEquals('idle', nodes[0]['partition_state'])
+
+        nodes_info = slurm.get_node_information(self.testbed)
+
+        self.assertEquals(10, len(nodes_info))
+        self.assertEquals('IDLE', nodes_info[0].state)
+        self.assertEquals(64000, nodes_info[0].real_memory)
+        self.assertEquals(2, len(slurm.parse_gre_field_info(nodes_info[0].gres)['gpu']))
+
+        cpus = parser.get_cpuinfo_nodes(self.testbed, [ type('Node', (), { 'name': 'nd1', 'disabled': False }) ])
+        self.assertEquals(16, len(cpus['nd1']))
+        self.assertEquals('GenuineIntel', cpus['nd1'][0].vendor_id)
+
+    def test_job_lifecycle(self):
+        """
+        It verifies the jobs submitted with sbatch, srun and
+        enqueue_compss are monitored, finished and cancelled
+        """
+
+        output = shell.execute_command('sbatch', 'sim@cluster', [ 'job.sh' ])
+        sbatch_id = int(executor.__extract_id_from_sbatch__(output))
+
+        output = shell.execute_command('(', 'sim@cluster', [ 'srun', '-N', '2', '-n', '16', 'app', '>', 'allout.txt',
+                                                             '2>&1', '&', ')', ';', 'sleep', '1;', 'squeue' ])
+        srun_id = executor.__extract_id_from_squeue__(output)
+        self.assertEquals(sbatch_id + 1, srun_id)
+
+        output = shell.execute_command('source', 'sim@cluster', [ 'env.sh', ';', 'enqueue_compss', '--num_nodes=8' ])
+        compss_id = executor.__extract_id_from_sigularity_pm_app__(output)
+
+        self.assertEquals('RUNNING', executor._parse_sacct_output(sbatch_id, 'sim@cluster'))
+        self.assertEquals(b'nd[2-3]\n', shell.execute_command('squeue', 'sim@cluster', executor.__squeue_nodes_params__(srun_id)))
+        self.assertEquals('nd2', executor.find_first_node(srun_id, 'sim@cluster'))
+
+        # There are not enough nodes for the COMPSs job
+        self.assertIn(b' PD ', shell.execute_command('squeue', 'sim@cluster', [ '-j', str(compss_id) ]))
+
+        shell.execute_command('scancel', 'sim@cluster', [ str(sbatch_id) ])
+        command_cache.results.clear()
+        self.assertEquals('CANCELLED', executor._parse_sacct_output(sbatch_id, 'sim@cluster'))
+
+        self.clock.now += 100000
+        command_cache.results.clear()
+        self.assertEquals('COMPLETED', executor._parse_sacct_output(srun_id, 'sim@cluster'))
+        self.assertRaises(subprocess.CalledProcessError, shell.execute_command, 'squeue', 'sim@cluster', [ '-j', str(srun_id) ])
+
+    def test_adaptation_and_drain(self):
+        """
+        It verifies the COMPSs adaptation and the drain of nodes
+        """
+
+        output = shell.execute_command('source', 'sim@cluster', [ 'env.sh', ';', 'enqueue_compss', '--num_nodes=1' ])
+        compss_id = executor.__extract_id_from_sigularity_pm_app__(output)
+
+        output = shell.execute_command('source', 'sim@cluster', [ 'env.sh', ';', 'adapt_compss_resources', 'nd1',
+                                                                  compss_id, 'CREATE SLURM-Cluster default', 'image.img' ])
+        self.assertTrue(executor.verify_adaptation_went_ok(output))
+        job_name = executor.parse_add_resource_output(output)
+        extra_id = executor.get_job_id_after_adaptation(job_name, 'sim@cluster')
+        self.assertEquals(str(compss_id + 1), extra_id)
+
+        shell.execute_command('source', 'sim@cluster', [ 'env.sh', ';', 'adapt_compss_resources', 'nd1',
+                                                         compss_id, 'REMOVE SLURM-Cluster', 'nd2' ])
+        self.assertEquals('CANCELLED', executor._parse_sacct_output(extra_id, 'sim@cluster'))
+
+        shell.execute_command('scontrol', 'sim@cluster', [ 'update', 'NodeName=nd3', 'State=drain', 'Reason="test"' ])
+        self.assertEquals('IDLE+DRAIN', self.cluster._node_state(self.cluster.nodes['nd3']))
+        shell.execute_command('scontrol', 'sim@cluster', [ 'update', 'NodeName=nd3', 'State=idle' ])
+        self.assertEquals('IDLE', self.cluster._node_state(self.cluster.nodes['nd3']))
+
+    def test_background_load(self):
+        """
+        It verifies the background jobs arrive and finish over time
+        """
+
+        cluster = simulator.SimulatedCluster({ 'nodes': 100, 'arrival_rate': 1.0, 'job_duration': 10,
+                                               'failure_rate': 0.5, 'seed': 2 }, self.clock)
+
+        self.clock.now += 1000
+        cluster.execute('squeue')
+
+        states = [ job['state'] for job in cluster.jobs.values() ]
+        self.assertTrue(states.count('COMPLETED') > 100)
+        self.assertTrue(states.count('FAILED') > 100)
+        self.assertTrue(len(cluster.running) > 0)
+
+        results = cluster.execute_batch([ 'sinfo', 'exit 1' ])
+        self.assertEquals(0, results[0][0])
@@ -1,576 +1,880 @@
-#
-# Copyright 2018 Atos Research and Innovation
-#
-# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
-# use this file except in compliance with the License. You may obtain a copy of
-# the License at
-#
-# https://www.gnu.org/licenses/agpl-3.0.txt
-#
-# Unless required by applicable law or agreed to in writing, software
-# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
-# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
-# License for the specific language governing permissions and limitations under
-# the License.
-# 
-# This is being developed for the TANGO Project: http://tango-project.eu
-#
-# Unit tests that checks ALDE slurm module
-#
-
-
-import unittest
-import unittest.mock as mock
-import slurm
-import re
-import inventory
-from models import Testbed, Application, Deployment, ExecutionConfiguration, Executable
-from sqlalchemy_mapping_tests.mapping_tests import MappingTest
-from models import db, Testbed, Node, CPU, Memory
-from testfixtures import LogCapture
-from unittest.mock import call
-
-class SlurmTests(MappingTest):
-    """
-    Unittests of the functions used to interact with and slurm
-    testbed
-    """
-
-    command_output=b'PARTITION   AVAIL  TIMELIMIT  NODES  STATE NODELIST\nbullx          up   infinite      1  drain nd15\nbullx          up   infinite      9   idle nd[10-14,16-19]\npartners*      up    8:00:00      1  drain nd15\npartners*      up    8:00:00      9   idle nd[10-14,16-19]\ngpus           up   infinite      2 drain* nd[20-21]\ngpus           up   infinite      1   idle nd22\ngpu2075        up   infinite      1 maint* nd23\nB510_2.2GHz    up   infinite      2 maint* nd[36-37]\nB510_2.2GHz    up   infinite      2   idle nd[38-39]\nB510_2.6GHz    up   infinite      2 maint* nd[32-33]\nB510_2.6GHz    up   infinite      1  maint nd31\nB510_2.6GHz    up   infinite      8   idle nd[24-26,29-30,40-41,43]\nB510_2.6GHz    up   infinite      3   down nd[27-28,42]\nbullion        up   infinite      1  alloc nd76\nbullion_S      up   infinite      1  alloc nd80\n'
-    command_scontrol_output=b'NodeName=nd80 Arch=x86_64 CoresPerSocket=18 CPUAlloc=288 CPUErr=0 CPUTot=288 CPULoad=128.35 Features=(null) Gres=(null) NodeAddr=nd80 NodeHostName=nd80 Version=14.11 OS=Linux RealMemory=6850663 AllocMem=0 Sockets=16 Boards=1 State=ALLOCATED ThreadsPerCore=1 TmpDisk=0 Weight=1 BootTime=2016-11-15T14:39:36 SlurmdStartTime=2017-01-10T08:43:22 CurrentWatts=4208 LowestJoules=4522674 ConsumedJoules=7611934651 ExtSensorsJoules=n/s ExtSensorsWatts=0 ExtSensorsTemp=n/s\nNodeName=nd23 Arch=x86_64 CoresPerSocket=4 CPUAlloc=0 CPUErr=0 CPUTot=8 CPULoad=0.59 Features=(null) Gres=gpu:tesla2075:2,bandwidth:lustre:no_consume:4G NodeAddr=nd23 NodeHostName=nd23 Version=14.11 OS=Linux RealMemory=24018 AllocMem=0 Sockets=2 Boards=1 State=MAINT ThreadsPerCore=1 TmpDisk=0 Weight=1 BootTime=2016-09-14T08:38:02 SlurmdStartTime=2017-01-24T17:31:11 CurrentWatts=n/s LowestJoules=n/s ConsumedJoules=n/s ExtSensorsJoules=n/s ExtSensorsWatts=0 ExtSensorsTemp=n/s Reason=Node unexpectedly rebooted [slurm@2016-09-14T08:37:00]\nNodeName=nd22 Arch=x86_64 CoresPerSocket=4 CPUAlloc=0 CPUErr=0 CPUTot=8 CPULoad=0.67 Features=(null) Gres=gpu:tesla2050:2 NodeAddr=nd22 NodeHostName=nd22 Version=14.11 OS=Linux RealMemory=24018 AllocMem=0 Sockets=2 Boards=1 State=MAINT ThreadsPerCore=1 TmpDisk=0 Weight=1 BootTime=2016-09-14T08:38:05 SlurmdStartTime=2017-01-24T17:33:47 CurrentWatts=n/s LowestJoules=n/s ConsumedJoules=n/s ExtSensorsJoules=n/s ExtSensorsWatts=0 ExtSensorsTemp=n/s\n'
-
-    example1 = {
-                'partition_state': 'drain',
-                'partition': 'bullx',
-                'node_name': 'nd15',
-                'partition_timelimit': 'infinite',
-                'partition_avail': 'up'
-               }
-    example2 = {
-                'partition_state': 'idle',
-                'partition': 'bullx',
-                'node_name': 'nd10',
-                'partition_timelimit': 'infinite',
-                'partition_avail': 'up'
-               }
-    example3 = {
-                'partition_state': 'idle',
-                'partition': 'B510_2.6GHz',
-                'node_name': 'nd43',
-                'partition_timelimit': 'infinite',
-                'partition_avail': 'up'
-               }
-    example4 = {
-                'partition_avail': 'up',
-                'partition': 'B510_2.6GHz',
-                'node_name': 'nd41',
-                'partition_timelimit': 'infinite',
-                'partition_state': 'idle'
-               }
-
-    def test_parse_sinfo_partitions(self):
-        """
-        Check it is possible to parse the output of the slurm
-        sinfo -a
-        command
-        """
-        output = slurm.parse_sinfo_partitions(self.command_output)
-
-        # We verify the output
-        self.assertEquals(44,len(output))
-        self.assertTrue(self.example1 in output)
-        self.assertTrue(self.example2 in output)
-        self.assertTrue(self.example3 in output)
-        self.assertTrue(self.example4 in output)
-
-    def test_is_node_idle(self):
-        """
-        Check in an array of nodes if the status is idle
-        """
-
-        nodes = slurm.parse_sinfo_partitions(self.command_output)
-        self.assertFalse(slurm.is_node_idle(nodes, 'nd15'))
-        self.assertTrue(slurm.is_node_idle(nodes, 'nd18'))
-        self.assertFalse(slurm.is_node_idle(nodes, 'Pepito'))
-
-    @mock.patch('slurm.shell.execute_command')
-    def test_get_nodes_testbed(self, mock_shell):
-        """
-        It verifies the correct work of the function get_nodes_testbed
-        """
-        command="sinfo"
-        params=["-a"]
-
-        # It checks first if it is type SLURM
-        testbed = Testbed('x', 'false', 'xxx', 'protocol', 'xxx')
-
-        nodes = slurm.get_nodes_testbed(testbed)
-        self.assertEquals(0, len(nodes))
-
-        # We create a testbed with local access
-        testbed = Testbed('x', 'false', Testbed.slurm_category, Testbed.protocol_local, 'xxx')
-        mock_shell.return_value = self.command_output
-        nodes = slurm.get_nodes_testbed(testbed)
-
-        self.assertEquals(44,len(nodes))
-        self.assertTrue(self.example1 in nodes)
-        self.assertTrue(self.example2 in nodes)
-        self.assertTrue(self.example3 in nodes)
-        self.assertTrue(self.example4 in nodes)
-        mock_shell.assert_called_with(command=command, params=params)
-
-        # We create a testbe with ssh access
-        testbed = Testbed('x', 'false', Testbed.slurm_category, Testbed.protocol_ssh , "user@ssh.com")
-        mock_shell.return_value = self.command_output
-        nodes = slurm.get_nodes_testbed(testbed)
-
-        self.assertEquals(44,len(nodes))
-        self.assertTrue(self.example1 in nodes)
-        self.assertTrue(self.example2 in nodes)
-        self.assertTrue(self.example3 in nodes)
-        self.assertTrue(self.example4 in nodes)
-        mock_shell.assert_called_with(command=command, server="user@ssh.com", params=params)
-
-        # Testbed with unknown protocol should return empty String
-        # We create a testbe with ssh access
-        testbed = Testbed('x', True, Testbed.slurm_category, "xxx" , "user@ssh.com")
-        mock_shell.return_value = self.command_output
-        nodes = slurm.get_nodes_testbed(testbed)
-
-        self.assertEquals(0,len(nodes))
-
-    def _create_initial_db_data(self):
-        """
-        This method creates some initial data in the db that is employed by
-        some of the tests here.
-        """
-
-        # We add two testbeds to the db
-        testbed = Testbed("name1",
-                            True,
-                            Testbed.slurm_category,
-                            "ssh",
-                            "user@server",
-                            ['slurm'])
-
-        # We add some nodes to Testbed_1
-        node_1 = Node()
-        node_1.name = "node_1"
-        node_1.information_retrieved = True
-        node_2 = Node()
-        node_2.name = "node_2"
-        node_2.information_retrieved = True
-        testbed.nodes = [ node_1,  node_2]
-        node_1.disabled = True
-
-        db.session.add(testbed)
-        db.session.commit()
-
-        return testbed, node_1, node_2
-
-    @mock.patch('slurm.get_nodes_testbed')
-    def test_check_nodes_in_db_for_on_line_testbeds(self, mock_get_nodes):
-        """
-        Test the correct work of this function
-        """
-        l = LogCapture() # we cature the logger
-
-        # We store some data in the db for the test.
-        testbed, node_1, node_2 = self._create_initial_db_data()
-
-        #We create the expectation to retrieve a list of nodes from slurm.
-        node_3 = { 'node_name': 'node_3' }
-        node_1_slurm = { 'node_name': 'node_1'}
-        mock_get_nodes.return_value = [ node_1_slurm, node_3 ]
-
-        # We exectue the command
-        slurm.check_nodes_in_db_for_on_line_testbeds()
-
-        # We check we get the desired result
-        node = db.session.query(Node).filter_by(name='node_3').all()
-        self.assertEquals(1, len(node))
-        node = node[0]
-        self.assertEquals('node_3', node.name)
-        self.assertTrue(node.information_retrieved)
-        self.assertEquals(3, len(testbed.nodes))
-
-        node = db.session.query(Node).filter_by(name='node_1').all()
-        self.assertEquals(1, len(node))
-        node = node[0]
-        self.assertFalse(node.disabled)
-
-        node = db.session.query(Node).filter_by(name='node_2').all()
-        self.assertEquals(1, len(node))
-        node = node[0]
-        self.assertTrue(node.disabled)
-
-        # Checking that we are logging the correct messages
-        l.check(
-            ('root', 'INFO', 'Checking node info for testbed: name1'),
-            ('root', 'INFO', 'Adding a new node: node_3 to testbed: name1'),
-            ('root', 'INFO', 'Enabling node: node_1'),
-            ('root', 'INFO', 'Disabling node: node_2')
-            )
-        l.uninstall() # We uninstall the capture of the logger
-
-    @mock.patch('linux_probes.cpu_info_parser.get_cpuinfo_node')
-    def test_update_cpu_node_information(self, mock_parser):
-        """
-        Test that the correct work of this function
-        """
-        l = LogCapture() # we cature the logger
-
-        # We store some data in the db for the test.
-        testbed, node_1, node_2 = self._create_initial_db_data()
-
-        node_3 =  Node()
-        node_3.name = "node_3"
-        node_3.information_retrieved = True
-        testbed.nodes.append(node_3)
-
-        node_3.cpus = [CPU("Intel", "Xeon", "x86_64", "e6333", "2600Mhz", True, 2, "cache", "111")]
-
-        # So, testbed has 3 nodes, one disabled and the other ones enabled
-        db.session.commit()
-
-        cpus_result = [CPU("Intel2", "Xeon2", "x86_64", "e6333", "2600Mhz", True, 2, "cache", "111"),
-                       CPU("Intel3", "Xeon3", "x86_64", "e6333", "2600Mhz", True, 2, "cache", "111")]
-
-        mock_parser.return_value = cpus_result
-
-        slurm.update_cpu_node_information()
-
-        # We verify the results
-        self.assertEquals(0, len(db.session.query(CPU).filter_by(vendor_id="Intel").all()))
-        self.assertEquals(1, len(db.session.query(CPU).filter_by(vendor_id="Intel2").all()))
-        self.assertEquals(1, len(db.session.query(CPU).filter_by(vendor_id="Intel3").all()))
-
-        calls = [ mock.call(testbed, node_2), mock.call(testbed, node_3)]
-        mock_parser.assert_has_calls(calls)
-        self.assertEquals(2, mock_parser.call_count)
-
-        # In case an error occours retrieving the information
-        mock_parser.return_value = []
-
-        slurm.update_cpu_node_information()
-
-        calls = [ mock.call(testbed, node_2), mock.call(testbed, node_3)]
-        mock_parser.assert_has_calls(calls)
-        self.assertEquals(4, mock_parser.call_count)
-
-        # Checking that we are logging the correct messages
-        l.check(
-            ('root', 'INFO', 'Updating CPU info for node: node_2'),
-            ('root', 'INFO', 'Updating CPU info for node: node_3'),
-            ('root', 'ERROR', 'Impossible to update CPU info for node: node_2'),
-            ('root', 'ERROR', 'Impossible to update CPU info for node: node_3')
-            )
-        l.uninstall() # We uninstall the capture of the logger
-
-    def test_parse_scontrol_information(self):
-        """
-        Unit test to verify the correct work of the function:
-        parse_scontrol_information
-        """
-
-        nodes_info = slurm.parse_scontrol_information(self.command_scontrol_output)
-
-        self.assertEquals(4, len(nodes_info))
-        self.assertEquals("nd80", nodes_info[0]['NodeName'])
-        self.assertEquals("x86_64", nodes_info[0]['Arch'])
-        self.assertEquals("18", nodes_info[0]['CoresPerSocket'])
-        self.assertEquals("6850663", nodes_info[0]['RealMemory'])
-        self.assertEquals("1", nodes_info[0]['ThreadsPerCore'])
-        self.assertEquals("16", nodes_info[0]['Sockets'])
-        self.assertEquals("nd23", nodes_info[1]['NodeName'])
-        self.assertEquals("gpu:tesla2075:2,bandwidth:lustre:no_consume:4G", nodes_info[1]['Gres'])
-        self.assertEquals("nd22", nodes_info[2]['NodeName'])
-
-    @mock.patch('slurm.shell.execute_command')
-    def test_get_node_information(self, mock_shell):
-        """
-        It verifies the correct work of the function get_nodes_testbed
-        """
-        command = "scontrol"
-        params = ["-o", "--all", "show", "node"]
-
-        # It checks first if it is type SLURM
-        testbed = Testbed('x', 'false', 'xxx', 'protocol', 'xxx')
-
-        nodes = slurm.get_node_information(testbed)
-        self.assertEquals(0, len(nodes))
-
-        # We create a testbed with local access
-        testbed = Testbed('x', 'false', Testbed.slurm_category, Testbed.protocol_local, 'xxx')
-        mock_shell.return_value = self.command_scontrol_output
-        nodes_info = slurm.get_node_information(testbed)
-
-        self.assertEquals(4, len(nodes_info))
-        self.assertEquals("nd80", nodes_info[0]['NodeName'])
-        self.assertEquals("x86_64", nodes_info[0]['Arch'])
-        self.assertEquals("18", nodes_info[0]['CoresPerSocket'])
-        self.assertEquals("6850663", nodes_info[0]['RealMemory'])
-        self.assertEquals("1", nodes_info[0]['ThreadsPerCore'])
-        self.assertEquals("16", nodes_info[0]['Sockets'])
-        self.assertEquals("nd23", nodes_info[1]['NodeName'])
-        self.assertEquals("gpu:tesla2075:2,bandwidth:lustre:no_consume:4G", nodes_info[1]['Gres'])
-        self.assertEquals("nd22", nodes_info[2]['NodeName'])
-        mock_shell.assert_called_with(command=command, params=params)
-
-        # We create a testbe with ssh access
-        testbed = Testbed('x', 'false', Testbed.slurm_category, Testbed.protocol_ssh , "user@ssh.com")
-        mock_shell.return_value = self.command_scontrol_output
-        nodes_info = slurm.get_node_information(testbed)
-
-        self.assertEquals(4, len(nodes_info))
-        self.assertEquals("nd80", nodes_info[0]['NodeName'])
-        self.assertEquals("x86_64", nodes_info[0]['Arch'])
-        self.assertEquals("18", nodes_info[0]['CoresPerSocket'])
-        self.assertEquals("6850663", nodes_info[0]['RealMemory'])
-        self.assertEquals("1", nodes_info[0]['ThreadsPerCore'])
-        self.assertEquals("16", nodes_info[0]['Sockets'])
-        self.assertEquals("nd23", nodes_info[1]['NodeName'])
-        self.assertEquals("gpu:tesla2075:2,bandwidth:lustre:no_consume:4G", nodes_info[1]['Gres'])
-        self.assertEquals("nd22", nodes_info[2]['NodeName'])
-        mock_shell.assert_called_with(command=command, server="user@ssh.com", params=params)
-
-        # Testbed with unknown protocol should return empty String
-        # We create a testbe with ssh access
-        testbed = Testbed('x', True, Testbed.slurm_category, "xxx" , "user@ssh.com")
-        nodes = slurm.get_node_information(testbed)
-
-        self.assertEquals(0,len(nodes))
-
-    @mock.patch('shell.execute_command')
-    def test_update_node_information(self, mock_shell):
-        """
-        Test that the correct work of this function
-        """
-        l = LogCapture() # we cature the logger
-        command = "scontrol"
-        params = ["-o", "--all", "show", "node"]
-
-        # We store some data in the db for the test.
-        # We add two testbeds to the db
-        testbed = Testbed("name1",
-                            True,
-                            Testbed.slurm_category,
-                            Testbed.protocol_ssh,
-                            "user@server",
-                            ['slurm'])
-
-        # We add some nodes to Testbed_1
-        node_1 = Node()
-        node_1.name = "nd80"
-        node_1.information_retrieved = True
-        node_2 = Node()
-        node_2.name = "nd23"
-        node_2.information_retrieved = True
-        testbed.nodes = [ node_1,  node_2]
-        node_1.disabled = True
-
-        db.session.add(testbed)
-        db.session.commit()
-
-        # We mock the command call
-        mock_shell.return_value = self.command_scontrol_output
-
-        slurm.update_node_information()
-
-        # We verify the results
-        node_80 = db.session.query(Node).filter_by(name='nd80').first()
-        node_23 = db.session.query(Node).filter_by(name='nd23').first()
-        self.assertEquals('ALLOCATED', node_80.state)
-        self.assertEquals(1, len(node_80.memories))
-        self.assertEquals(Memory.MEGABYTE, node_80.memories[0].units)
-        self.assertEquals(6850663, node_80.memories[0].size)
-        self.assertEquals(0,len(node_80.gpus))
-
-        self.assertEquals('MAINT', node_23.state)
-        self.assertEquals(1, len(node_23.memories))
-        self.assertEquals(Memory.MEGABYTE, node_23.memories[0].units)
-        self.assertEquals(24018, node_23.memories[0].size)
-        self.assertEquals(2,len(node_23.gpus))
-        self.assertEquals('Nvidia', node_23.gpus[0].vendor_id)
-        self.assertEquals('Nvidia TESLA C2075', node_23.gpus[0].model_name)
-        self.assertEquals('Nvidia', node_23.gpus[1].vendor_id)
-        self.assertEquals('Nvidia TESLA C2075', node_23.gpus[1].model_name)
-
-        mock_shell.assert_called_with(command=command, server="user@server", params=params)
-        self.assertEquals(1, mock_shell.call_count)
-
-        # Checking that we are logging the correct messages
-        l.check(
-            ('root', 'INFO', 'Updating information for node: nd80 if necessary'),
-            ('root', 'INFO', 'Updating memory information for node: nd80'),
-            ('root', 'INFO', 'Updating information for node: nd23 if necessary'),
-            ('root', 'INFO', 'Updating memory information for node: nd23'),
-            ('root', 'INFO', 'Updating gpu information for node: nd23')
-            )
-        l.uninstall() # We uninstall the capture of the logger
-
-    def test_parse_gre_field_info(self):
-        """
-        Checks this function works correctly
-        """
-
-        # We overwrite first the url of the inventory file db
-        inventory.GPU_FILE = "gpu_cards_list.json"
-
-        # Test starts here
-        gre_text_example='gpu:tesla2075:2,bandwidth:lustre:no_consume:4G'
-        resources = slurm.parse_gre_field_info(gre_text_example)
-
-        self.assertEquals(2, len(resources['gpu']))
-        self.assertEquals('Nvidia', resources['gpu'][0].vendor_id)
-        self.assertEquals('Nvidia TESLA C2075', resources['gpu'][0].model_name)
-        self.assertEquals('Nvidia', resources['gpu'][1].vendor_id)
-        self.assertEquals('Nvidia TESLA C2075', resources['gpu'][1].model_name)
-
-        gre_text_example='cpu:xxx1:1,gpu:tesla870,gpu:tesla2075:2,bandwidth:lustre:no_consume:4G'
-        resources = slurm.parse_gre_field_info(gre_text_example)
-
-        self.assertEquals(3, len(resources['gpu']))
-        self.assertEquals('Nvidia', resources['gpu'][0].vendor_id)
-        self.assertEquals('Nvidia TESLA C870', resources['gpu'][0].model_name)
-        self.assertEquals('Nvidia', resources['gpu'][1].vendor_id)
-        self.assertEquals('Nvidia TESLA C2075', resources['gpu'][1].model_name)
-        self.assertEquals('Nvidia', resources['gpu'][2].vendor_id)
-        self.assertEquals('Nvidia TESLA C2075', resources['gpu'][2].model_name)
-
-        gre_text_example='gpu:teslak20:2'
-        resources = slurm.parse_gre_field_info(gre_text_example)
-        self.assertEquals('Nvidia', resources['gpu'][0].vendor_id)
-        self.assertEquals('K20 GPU Accelerator', resources['gpu'][0].model_name)
-        self.assertEquals('Nvidia', resources['gpu'][1].vendor_id)
-        self.assertEquals('K20 GPU Accelerator', resources['gpu'][1].model_name)
-
-    @mock.patch("shell.execute_command")
-    def test_execute_srun(self, mock_shell):
-        """
-        Verifyies the correct work of the function "execute_srun"
-        """
-
-        # We define the different entities necessaryb for the test.
-        testbed = Testbed(name="nova2",
-                            on_line=True,
-                            category="SLURM",
-                            protocol="SSH",
-                            endpoint="user@testbed.com",
-                            package_formats= ['sbatch', 'SINGULARITY'],
-                            extra_config= {
-                                "enqueue_compss_sc_cfg": "nova.cfg" ,
-                                "enqueue_env_file": "/home_nfs/home_ejarquej/installations/rc1707/COMPSs/compssenv"
-                                })
-        application = Application(name="super_app")
-
-        executable = Executable()
-        executable.source_code_file = 'test.zip'
-        executable.compilation_script = 'gcc -X'
-        executable.compilation_type = "SINGULARITY:SRUN"
-        executable.singularity_app_folder="/singularity/app/folder"
-        executable.singularity_image_file="pepito.img"
-        executable.status = "COMPILED"
-        executable.application = application
-
-        deployment = Deployment()
-        deployment.testbed_id = testbed.id
-        deployment.executable_id = executable.id
-        deployment.path="/pepito/pepito.img"
-        
-        execution_config = ExecutionConfiguration()
-        execution_config.execution_type ="SINGULARITY:SRUN"
-        execution_config.application = application
-        execution_config.testbed = testbed
-        execution_config.executable = executable 
-        execution_config.num_nodes = 2
-        #execution_config.num_gpus_per_node = 2
-        execution_config.num_cpus_per_node = 16
-        execution_config.exec_time = 10 
-        execution_config.command = "/apps/application/master/Matmul 2 1024 12.34 /home_nfs/home_ejarquej/demo_test/cpu_gpu_run_data"
-        execution_config.compss_config = "--worker_in_master_cpus=12 --worker_in_master_memory=24000 --worker_working_dir=/home_nfs/home_ejarquej --lang=c --monitoring=1000 -d"
-
-        output = b'             JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)\n              4610       all singular  garciad  R       0:01      2 ns[55-56]\n'
-
-        mock_shell.return_value = output
-
-		# TEST starts here:
-        output_srun = slurm.execute_srun(testbed, execution_config, executable, deployment, True)
-
-        call_1 = call('(', "user@testbed.com",
-                            [
-                                "srun",
-                                "-N",
-                                "2",
-								"-n",
-								"16",
-								"singularity",
-								"run",
-								"/pepito/pepito.img",
-								">",
-								"allout.txt",
-								"2>&1",
-								"&",
-								")",
-								";",
-								"sleep",
-								"1;",
-								"squeue"
-							])
-
-        # adding a new type of execution
-        execution_config = ExecutionConfiguration()
-        execution_config.execution_type ="SINGULARITY:SRUN"
-        execution_config.application = application
-        execution_config.testbed = testbed
-        execution_config.executable = executable 
-        execution_config.num_gpus_per_node = 2
-        execution_config.num_cpus_per_node = 16
-        execution_config.exec_time = 10 
-        execution_config.command = "/apps/application/master/Matmul 2 1024 12.34 /home_nfs/home_ejarquej/demo_test/cpu_gpu_run_data"
-        execution_config.compss_config = "--worker_in_master_cpus=12 --worker_in_master_memory=24000 --worker_working_dir=/home_nfs/home_ejarquej --lang=c --monitoring=1000 -d"
-
-        self.assertEquals(output, output_srun)
-
-
-        output_srun = slurm.execute_srun(testbed, execution_config, executable, deployment, True)
-
-        call_2 = call('(', "user@testbed.com",
-                            [
-									  	"srun",
-									  	"--gres=gpu:2",
-									  	"-n",
-									  	"16",
-									  	"singularity",
-									  	"run",
-									  	"/pepito/pepito.img",
-									  	">",
-										"allout.txt",
-										"2>&1",
-									  	"&",
-									  	")",
-									  	";",
-									  	"sleep",
-									  	"1;",
-									  	"squeue"
-									   ])
-        calls = [ call_1, call_2]
-        mock_shell.assert_has_calls(calls)
-
-        self.assertEquals(output, output_srun)
-
-    @mock.patch("shell.execute_command")
-    def test_execute_srun(self, mock_shell):
-        """ 
-        It stops a command with scontrol
-        """
-
-        ## First case endpoint null
-        slurm.stop_execution(333, None)
-
-        mock_shell.assert_called_with(command="scontrol", params=["suspend", "333"])
-
-        ## Secon case endpoint not null
-        slurm.stop_execution(333, "endpoint")
-
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+# 
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE slurm module
+#
+
+
+import unittest
+import unittest.mock as mock
+import slurm
+import shell
+import command_cache
+import fanout
+import re
+import inventory
+import linux_probes.cpu_info_parser as parser
+import sqlalchemy
+import threading
+from models import Testbed, Application, Deployment, ExecutionConfiguration, Executable
+from sqlalchemy_mapping_tests.mapping_tests import MappingTest
+from models import db, Testbed, Node, CPU, Memory
+from testfixtures import LogCapture
+from unittest.mock import call
+
+class SlurmTests(MappingTest):
+    """
+    Unittests of the functions used to interact with and slurm
+    testbed
+    """
+
+    def setUp(self):
+        """
+        It creates the memory db and empties the command cache
+        """
+
+        super().setUp()
+        command_cache.results.clear()
+
+    command_output=b'PARTITION   AVAIL  TIMELIMIT  NODES  STATE NODELIST\nbullx          up   infinite      1  drain nd15\nbullx          up   infinite      9   idle nd[10-14,16-19]\npartners*      up    8:00:00      1  drain nd15\npartners*      up    8:00:00      9   idle nd[10-14,16-19]\ngpus           up   infinite      2 drain* nd[20-21]\ngpus           up   infinite      1   idle nd22\ngpu2075        up   infinite      1 maint* nd23\nB510_2.2GHz    up   infinite      2 maint* nd[36-37]\nB510_2.2GHz    up   infinite      2   idle nd[38-39]\nB510_2.6GHz    up   infinite      2 maint* nd[32-33]\nB510_2.6GHz    up   infinite      1  maint nd31\nB510_2.6GHz    up   infinite      8   idle nd[24-26,29-30,40-41,43]\nB510_2.6GHz    up   infinite      3   down nd[27-28,42]\nbullion        up   infinite      1  alloc nd76\nbullion_S      up   infinite      1  alloc nd80\n'
+    command_scontrol_output=b'NodeName=nd80 Arch=x86_64 CoresPerSocket=18 CPUAlloc=288 CPUErr=0 CPUTot=288 CPULoad=128.35 Features=(null) Gres=(null) NodeAddr=nd80 NodeHostName=nd80 Version=14.11 OS=Linux RealMemory=6850663 AllocMem=0 Sockets=16 Boards=1 State=ALLOCATED ThreadsPerCore=1 TmpDisk=0 Weight=1 BootTime=2016-11-15T14:39:36 SlurmdStartTime=2017-01-10T08:43:22 CurrentWatts=4208 LowestJoules=4522674 ConsumedJoules=7611934651 ExtSensorsJoules=n/s ExtSensorsWatts=0 ExtSensorsTemp=n/s\nNodeName=nd23 Arch=x86_64 CoresPerSocket=4 CPUAlloc=0 CPUErr=0 CPUTot=8 CPULoad=0.59 Features=(null) Gres=gpu:tesla2075:2,bandwidth:lustre:no_consume:4G NodeAddr=nd23 NodeHostName=nd23 Version=14.11 OS=Linux RealMemory=24018 AllocMem=0 Sockets=2 Boards=1 State=MAINT ThreadsPerCore=1 TmpDisk=0 Weight=1 BootTime=2016-09-14T08:38:02 SlurmdStartTime=2017-01-24T17:31:11 CurrentWatts=n/s LowestJoules=n/s ConsumedJoules=n/s ExtSensorsJoules=n/s ExtSensorsWatts=0 ExtSensorsTemp=n/s Reason=Node unexpectedly rebooted [slurm@2016-09-14T08:37:00]\nNodeName=nd22 Arch=x86_64 CoresPerSocket=4 CPUAlloc=0 CPUErr=0 CPUTot=8 CPULoad=0.67 Features=(null) Gres=gpu:tesla2050:2 NodeAddr=nd22 NodeHostName=nd22 Version=14.11 OS=Linux RealMemory=24018 AllocMem=0 Sockets=2 Boards=1 State=MAINT ThreadsPerCore=1 TmpDisk=0 Weight=1 BootTime=2016-09-14T08:38:05 SlurmdStartTime=2017-01-24T17:33:47 CurrentWatts=n/s LowestJoules=n/s ConsumedJoules=n/s ExtSensorsJoules=n/s ExtSensorsWatts=0 ExtSensorsTemp=n/s\n'
+
+    example1 = {
+                'partition_state': 'drain',
+                'partition': 'bullx',
+                'node_name': 'nd15',
+                'partition_timelimit': 'infinite',
+                'partition_avail': 'up'
+               }
+    example2 = {
+                'partition_state': 'idle',
+                'partition': 'bullx',
+                'node_name': 'nd10',
+                'partition_timelimit': 'infinite',
+                'partition_avail': 'up'
+               }
+    example3 = {
+                'partition_state': 'idle',
+                'partition': 'B510_2.6GHz',
+                'node_name': 'nd43',
+                'partition_timelimit': 'infinite',
+                'partition_avail': 'up'
+               }
+    example4 = {
+                'partition_avail': 'up',
+                'partition': 'B510_2.6GHz',
+                'node_name': 'nd41',
+                'partition_timelimit': 'infinite',
+                'partition_state': 'idle'
+               }
+
+    def test_parse_sinfo_partitions(self):
+        """
+        Check it is possible to parse the output of the slurm
+        sinfo -a
+        command
+        """
+        output = slurm.parse_sinfo_partitions(self.command_output)
+
+        # We verify the output
+        self.assertEquals(44,len(output))
+        self.assertTrue(self.example1 in output)
+        self.assertTrue(self.example2 in output)
+        self.assertTrue(self.example3 in output)
+        self.assertTrue(self.example4 in output)
+
+        # Zero padded ranges and several bracket groups
+        output = slurm.parse_sinfo_partitions(b'PARTITION AVAIL  TIMELIMIT  NODES  STATE NODELIST\n'
+                                              b'bullx        up   infinite      6   idle nd[001-002,010],rack[1-3]n01\n')
+
+        self.assertEquals([ 'nd001', 'nd002', 'nd010', 'rack1n01', 'rack2n01', 'rack3n01' ],
+                          [ node['node_name'] for node in output ])
+
+    def test_iter_sinfo_partitions(self):
+        """
+        Check that the generator version of the parser works with
+        the lines of a streamed output
+        """
+
+        lines = iter(self.command_output.decode('utf-8').split('\n'))
+        nodes = slurm.iter_sinfo_partitions(lines)
+
+        self.assertEquals(self.example1, next(nodes))
+        self.assertEquals(43, len(list(nodes)))
+
+        lines = iter(self.command_scontrol_output.decode('utf-8').split('\n'))
+        nodes_info = slurm.iter_scontrol_information(lines)
+
+        self.assertEquals("nd80", next(nodes_info).name)
+        self.assertEquals("nd23", next(nodes_info).name)
+
+    def test_is_node_idle(self):
+        """
+        Check in an array of nodes if the status is idle
+        """
+
+        nodes = slurm.parse_sinfo_partitions(self.command_output)
+        self.assertFalse(slurm.is_node_idle(nodes, 'nd15'))
+        self.assertTrue(slurm.is_node_idle(nodes, 'nd18'))
+        self.assertFalse(slurm.is_node_idle(nodes, 'Pepito'))
+
+    @mock.patch('slurm.shell.execute_command_stream')
+    def test_get_nodes_testbed(self, mock_shell):
+        """
+        It verifies the correct work of the function get_nodes_testbed
+        """
+        command="sinfo"
+        params=["-a"]
+
+        # It checks first if it is type SLURM
+        testbed = Testbed('x', 'false', 'xxx', 'protocol', 'xxx')
+
+        nodes = slurm.get_nodes_testbed(testbed)
+        self.assertEquals(0, len(nodes))
+
+        # We create a testbed with local access
+        testbed = Testbed('x', 'false', Testbed.slurm_category, Testbed.protocol_local, 'xxx')
+        mock_shell.return_value = self.command_output
+        nodes = slurm.get_nodes_testbed(testbed)
+
+        self.assertEquals(44,len(nodes))
+        self.assertTrue(self.example1 in nodes)
+        self.assertTrue(self.example2 in nodes)
+        self.assertTrue(self.example3 in nodes)
+        self.assertTrue(self.example4 in nodes)
+        mock_shell.assert_called_with(command=command, params=params)
+
+        # We create a testbe with ssh access
+        testbed = Testbed('x', 'false', Testbed.slurm_category, Testbed.protocol_ssh , "user@ssh.com")
+        mock_shell.return_value = self.command_output
+        nodes = slurm.get_nodes_testbed(testbed)
+
+        self.assertEquals(44,len(nodes))
+        self.assertTrue(self.example1 in nodes)
+        self.assertTrue(self.example2 in nodes)
+        self.assertTrue(self.example3 in nodes)
+        self.assertTrue(self.example4 in nodes)
+        mock_shell.assert_called_with(command=command, server="user@ssh.com", params=params)
+        self.assertEquals(2, mock_shell.call_count)
+
+        # A second call is served from the cache
+        nodes = slurm.get_nodes_testbed(testbed)
+
+        self.assertEquals(44,len(nodes))
+        self.assertEquals(2, mock_shell.call_count)
+
+        # Until the cache of the testbed is invalidated
+        command_cache.invalidate("user@ssh.com")
+        nodes = slurm.get_nodes_testbed(testbed)
+
+        self.assertEquals(44,len(nodes))
+        self.assertEquals(3, mock_shell.call_count)
+
+        # Testbed with unknown protocol should return empty String
+        # We create a testbe with ssh access
+        testbed = Testbed('x', True, Testbed.slurm_category, "xxx" , "user@ssh.com")
+        mock_shell.return_value = self.command_output
+        nodes = slurm.get_nodes_testbed(testbed)
+
+        self.assertEquals(0,len(nodes))
+
+    def _create_initial_db_data(self):
+        """
+        This method creates some initial data in the db that is employed by
+        some of the tests here.
+        """
+
+        # We add two testbeds to the db
+        testbed = Testbed("name1",
+                            True,
+                            Testbed.slurm_category,
+                            "ssh",
+                            "user@server",
+                            ['slurm'])
+
+        # We add some nodes to Testbed_1
+        node_1 = Node()
+        node_1.name = "node_1"
+        node_1.information_retrieved = True
+        node_2 = Node()
+        node_2.name = "node_2"
+        node_2.information_retrieved = True
+        testbed.nodes = [ node_1,  node_2]
+        node_1.disabled = True
+
+        db.session.add(testbed)
+        db.session.commit()
+
+        return testbed, node_1, node_2
+
+    @mock.patch('slurm.get_nodes_testbed')
+    def test_check_nodes_in_db_for_on_line_testbeds(self, mock_get_nodes):
+        """
+        Test the correct work of this function
+        """
+        l = LogCapture() # we cature the logger
+
+        # We store some data in the db for the test.
+        testbed, node_1, node_2 = self._create_initial_db_data()
+
+        #We create the expectation to retrieve a list of nodes from slurm.
+        node_3 = { 'node_name': 'node_3' }
+        node_1_slurm = { 'node_name': 'node_1'}
+        mock_get_nodes.return_value = [ node_1_slurm, node_3 ]
+
+        # We exectue the command
+        slurm.check_nodes_in_db_for_on_line_testbeds()
+
+        # We check we get the desired result
+        node = db.session.query(Node).filter_by(name='node_3').all()
+        self.assertEquals(1, len(node))
+        node = node[0]
+        self.assertEquals('node_3', node.name)
+        self.assertTrue(node.information_retrieved)
+        self.assertEquals(3, len(testbed.nodes))
+
+        node = db.session.query(Node).filter_by(name='node_1').all()
+        self.assertEquals(1, len(node))
+        node = node[0]
+        self.assertFalse(node.disabled)
+
+        node = db.session.query(Node).filter_by(name='node_2').all()
+        self.assertEquals(1, len(node))
+        node = node[0]
+        self.assertTrue(node.disabled)
+
+        # Checking that we are logging the correct messages
+        l.check(
+            ('root', 'INFO', 'Checking node info for testbed: name1'),
+            ('root', 'INFO', 'Adding a new node: node_3 to testbed: name1'),
+            ('root', 'INFO', 'Enabling node: node_1'),
+            ('root', 'INFO', 'Disabling node: node_2')
+            )
+        l.uninstall() # We uninstall the capture of the logger
+
+    @mock.patch('slurm.get_nodes_testbed')
+    def test_check_nodes_in_db_for_on_line_testbeds_bulk(self, mock_get_nodes):
+        """
+        It verifies that the nodes of a big testbed are reconciled with a
+        few statements, independently of the number of nodes
+        """
+
+        testbed = Testbed("name1", True, Testbed.slurm_category, "ssh", "user@server", ['slurm'])
+
+        for i in range(1200):
+            node = Node()
+            node.name = "nd" + str(i)
+            node.information_retrieved = True
+            node.disabled = i % 2 == 0
+            testbed.nodes.append(node)
+
+        db.session.add(testbed)
+        db.session.commit()
+
+        # Nodes 0-599 stay, 600-1199 disappear and 1200-1299 are new
+        mock_get_nodes.return_value = [ { 'node_name': 'nd' + str(i) } for i in range(1300) if i < 600 or i >= 1200 ]
+
+        statements = []
+        listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)
+        sqlalchemy.event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            slurm.check_nodes_in_db_for_on_line_testbeds()
+        finally:
+            sqlalchemy.event.remove(db.engine, 'before_cursor_execute', listener)
+
+        self.assertEquals(1300, len(testbed.nodes))
+        self.assertEquals(600, db.session.query(Node).filter_by(disabled=True).count())
+        self.assertEquals(0, db.session.query(Node).filter(Node.name.in_([ 'nd' + str(i) for i in range(600) ]),
+                                                            Node.disabled == True).count())
+        self.assertTrue(db.session.query(Node).filter_by(name='nd1250').first().information_retrieved)
+
+        # Testbeds, nodes, one insert and the updates in groups of 500 ids
+        self.assertTrue(len(statements) <= 8, statements)
+
+    @mock.patch('slurm.get_nodes_testbed')
+    def test_check_nodes_in_db_for_on_line_testbeds_timeout(self, mock_get_nodes):
+        """
+        It verifies that a testbed that does not answer in time is
+        skipped without changing its nodes
+        """
+
+        l = LogCapture() # we cature the logger
+
+        testbed, node_1, node_2 = self._create_initial_db_data()
+
+        mock_get_nodes.side_effect = shell.CommandTimeout('sinfo', 60, 'user@testbed')
+
+        slurm.check_nodes_in_db_for_on_line_testbeds()
+
+        self.assertEquals(2, len(testbed.nodes))
+        self.assertTrue(node_1.disabled)
+        self.assertFalse(node_2.disabled)
+
+        l.check(
+            ('root', 'INFO', 'Checking node info for testbed: name1'),
+            ('root', 'ERROR', 'Timeout checking node info for testbed: name1')
+            )
+        l.uninstall() # We uninstall the capture of the logger
+
+    @mock.patch('slurm.get_nodes_testbed')
+    def test_check_nodes_in_db_for_on_line_testbeds_parallel(self, mock_get_nodes):
+        """
+        It verifies that the testbeds are called at the same time from
+        other threads and the db is only written from this one
+        """
+
+        testbed_1 = Testbed("name1", True, Testbed.slurm_category, "ssh", "user@server1", ['slurm'])
+        testbed_2 = Testbed("name2", True, Testbed.slurm_category, "ssh", "user@server2", ['slurm'])
+        testbed_3 = Testbed("name3", True, Testbed.slurm_category, "ssh", "user@server3", ['slurm'])
+        db.session.add_all([ testbed_1, testbed_2, testbed_3 ])
+        db.session.commit()
+
+        # Each call waits for the other ones, it only works if they run at the same time
+        barrier = threading.Barrier(3, timeout=5)
+        threads = []
+
+        def get_nodes(testbed):
+            threads.append(threading.current_thread())
+            barrier.wait()
+
+            if testbed.name == 'name2':
+                raise shell.CommandTimeout('sinfo', 60, testbed.endpoint)
+
+            return [ { 'node_name': testbed.name + '_nd1' }, { 'node_name': testbed.name + '_nd2' } ]
+
+        mock_get_nodes.side_effect = get_nodes
+
+        statements = []
+        listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(threading.current_thread())
+        sqlalchemy.event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            slurm.check_nodes_in_db_for_on_line_testbeds()
+        finally:
+            sqlalchemy.event.remove(db.engine, 'before_cursor_execute', listener)
+
+        self.assertEquals(3, len(set(threads)))
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEquals({ threading.current_thread() }, set(statements))
+
+        self.assertEquals([ 'name1_nd1', 'name1_nd2' ], sorted(node.name for node in testbed_1.nodes))
+        self.assertEquals([], testbed_2.nodes)
+        self.assertEquals([ 'name3_nd1', 'name3_nd2' ], sorted(node.name for node in testbed_3.nodes))
+
+        # With one worker the testbeds are called one after the other in this thread
+        threads.clear()
+        barrier = threading.Barrier(1)
+        fanout.set_max_workers(1)
+        try:
+            slurm.check_nodes_in_db_for_on_line_testbeds()
+        finally:
+            fanout.set_max_workers(fanout.DEFAULT_MAX_WORKERS)
+
+        self.assertEquals([ threading.current_thread() ] * 3, threads)
+
+    @mock.patch('linux_probes.cpu_info_parser.probe_cpuinfo_nodes')
+    def test_update_cpu_node_information(self, mock_parser):
+        """
+        Test that the correct work of this function
+        """
+        l = LogCapture() # we cature the logger
+
+        # We store some data in the db for the test.
+        testbed, node_1, node_2 = self._create_initial_db_data()
+
+        node_3 =  Node()
+        node_3.name = "node_3"
+        node_3.information_retrieved = True
+        testbed.nodes.append(node_3)
+
+        node_3.cpus = [CPU("Intel", "Xeon", "x86_64", "e6333", "2600Mhz", True, 2, "cache", "111")]
+
+        # So, testbed has 3 nodes, one disabled and the other ones enabled
+        db.session.commit()
+
+        cpus_result = { 'node_2': parser.CpuinfoProbe('digest2', [CPU("Intel2", "Xeon2", "x86_64", "e6333", "2600Mhz", True, 2, "cache", "111")]),
+                        'node_3': parser.CpuinfoProbe('digest3', [CPU("Intel3", "Xeon3", "x86_64", "e6333", "2600Mhz", True, 2, "cache", "111")]) }
+
+        mock_parser.return_value = cpus_result
+
+        slurm.update_cpu_node_information()
+
+        # We verify the results
+        self.assertEquals(0, len(db.session.query(CPU).filter_by(vendor_id="Intel").all()))
+        self.assertEquals(1, len(db.session.query(CPU).filter_by(vendor_id="Intel2").all()))
+        self.assertEquals(1, len(db.session.query(CPU).filter_by(vendor_id="Intel3").all()))
+        self.assertEquals("Intel3", node_3.cpus[0].vendor_id)
+        self.assertEquals("digest3", node_3.cpuinfo_digest)
+
+        # Only one call per testbed with the enabled nodes
+        mock_parser.assert_called_with(fanout.remote_testbed(testbed), fanout.remote_nodes([ node_2, node_3 ]), {})
+        self.assertEquals(1, mock_parser.call_count)
+
+        # In case an error occours retrieving the information, the nodes
+        # without BootTime are probed every time with their digests
+        mock_parser.return_value = { 'node_2': parser.CpuinfoProbe(None, []) }
+
+        slurm.update_cpu_node_information()
+
+        mock_parser.assert_called_with(fanout.remote_testbed(testbed), fanout.remote_nodes([ node_2, node_3 ]),
+                                       { 'node_2': 'digest2', 'node_3': 'digest3' })
+        self.assertEquals(2, mock_parser.call_count)
+        self.assertEquals("digest3", node_3.cpuinfo_digest)
+
+        # Checking that we are logging the correct messages
+        l.check(
+            ('root', 'INFO', 'Updating CPU info for node: node_2'),
+            ('root', 'INFO', 'Updating CPU info for node: node_3'),
+            ('root', 'ERROR', 'Impossible to update CPU info for node: node_2'),
+            ('root', 'ERROR', 'Impossible to update CPU info for node: node_3')
+            )
+        l.clear()
+
+        # The nodes that did not reboot since their last probe are not probed
+        node_2.boot_time = '2018-01-01T10:00:00'
+        node_3.boot_time = '2018-01-01T10:00:00'
+        db.session.commit()
+        cpu_id = node_3.cpus[0].id
+
+        mock_parser.return_value = { 'node_2': parser.CpuinfoProbe('digest2', None),
+                                     'node_3': parser.CpuinfoProbe('digest3', None) }
+
+        slurm.update_cpu_node_information()
+        slurm.update_cpu_node_information()
+
+        mock_parser.assert_called_with(fanout.remote_testbed(testbed), [], {})
+        self.assertEquals(4, mock_parser.call_count)
+        self.assertEquals('2018-01-01T10:00:00', node_3.cpuinfo_boot_time)
+        self.assertEquals(cpu_id, node_3.cpus[0].id)
+
+        # After a reboot the node is probed again, its cpuinfo is only
+        # written if it changed
+        node_3.boot_time = '2018-02-01T10:00:00'
+        db.session.commit()
+
+        mock_parser.return_value = { 'node_3': parser.CpuinfoProbe('digest3b', [CPU("Intel4", "Xeon4", "x86_64", "e6333", "2600Mhz", True, 2, "cache", "111")]) }
+
+        slurm.update_cpu_node_information()
+
+        mock_parser.assert_called_with(fanout.remote_testbed(testbed), fanout.remote_nodes([ node_3 ]), { 'node_3': 'digest3' })
+        self.assertEquals("Intel4", node_3.cpus[0].vendor_id)
+        self.assertEquals("digest3b", node_3.cpuinfo_digest)
+        self.assertEquals('2018-02-01T10:00:00', node_3.cpuinfo_boot_time)
+        self.assertEquals("Intel2", node_2.cpus[0].vendor_id)
+
+        l.check(('root', 'INFO', 'Updating CPU info for node: node_3'))
+        l.uninstall() # We uninstall the capture of the logger
+
+        # If the testbed does not answer in time it is skipped
+        node_3.boot_time = '2018-03-01T10:00:00'
+        db.session.commit()
+        mock_parser.side_effect = shell.CommandTimeout('batch', 120, testbed.endpoint)
+
+        slurm.update_cpu_node_information()
+
+        self.assertEquals("Intel4", node_3.cpus[0].vendor_id)
+        self.assertEquals('2018-02-01T10:00:00', node_3.cpuinfo_boot_time)
+
+    def test_parse_scontrol_information(self):
+        """
+        Unit test to verify the correct work of the function:
+        parse_scontrol_information
+        """
+
+        nodes_info = slurm.parse_scontrol_information(self.command_scontrol_output)
+
+        self.assertEquals(3, len(nodes_info))
+        self.assertEquals("nd80", nodes_info[0].name)
+        self.assertEquals("x86_64", nodes_info[0].fields['Arch'])
+        self.assertEquals("18", nodes_info[0].fields['CoresPerSocket'])
+        self.assertEquals(6850663, nodes_info[0].real_memory)
+        self.assertEquals(288, nodes_info[0].cpu_total)
+        self.assertEquals(288, nodes_info[0].cpu_alloc)
+        self.assertEquals("ALLOCATED", nodes_info[0].state)
+        self.assertEquals("2016-11-15T14:39:36", nodes_info[0].boot_time)
+        self.assertEquals((), nodes_info[0].gres)
+        self.assertIsNone(nodes_info[0].reason)
+        self.assertEquals("nd23", nodes_info[1].name)
+        self.assertEquals("Node unexpectedly rebooted [slurm@2016-09-14T08:37:00]", nodes_info[1].reason)
+        self.assertEquals((slurm.GresEntry('gpu', 'tesla2075', 2), slurm.GresEntry('bandwidth', 'lustre', 4 * 1024 ** 3)),
+                          nodes_info[1].gres)
+        self.assertEquals("nd22", nodes_info[2].name)
+
+        # Only the requested fields are parsed, values can have spaces
+        output = (b'NodeName=nd1 Arch=x86_64 CPUAlloc=4 CPUTot=16 FreeMem=N/A OS=Linux 3.10.0-514.el7.x86_64 #1 SMP '
+                  b'RealMemory=64000 State=IDLE+DRAIN* Reason=maintenance of the rack [root@2018-01-01T10:00:00]\n')
+
+        nodes_info = slurm.parse_scontrol_information(output, [ 'State', 'OS', 'Reason' ])
+
+        self.assertEquals(1, len(nodes_info))
+        self.assertEquals('nd1', nodes_info[0].name)
+        self.assertEquals('IDLE+DRAIN*', nodes_info[0].state)
+        self.assertEquals('IDLE', nodes_info[0].base_state)
+        self.assertEquals(('DRAIN', 'NOT_RESPONDING'), nodes_info[0].state_flags)
+        self.assertEquals('maintenance of the rack [root@2018-01-01T10:00:00]', nodes_info[0].reason)
+        self.assertEquals({ 'OS': 'Linux 3.10.0-514.el7.x86_64 #1 SMP' }, nodes_info[0].fields)
+        self.assertIsNone(nodes_info[0].real_memory)
+        self.assertIsNone(nodes_info[0].cpu_total)
+
+        nodes_info = slurm.parse_scontrol_information(output)
+        self.assertEquals(4, nodes_info[0].cpu_alloc)
+        self.assertEquals(16, nodes_info[0].cpu_total)
+        self.assertIsNone(nodes_info[0].free_memory)
+        self.assertEquals(64000, nodes_info[0].real_memory)
+
+    def test_parse_gres(self):
+        """
+        It verifies the Gres field is parsed into entries with a count
+        """
+
+        self.assertEquals((), slurm.parse_gres('(null)'))
+        self.assertEquals((slurm.GresEntry('gpu', 'tesla870', 1), slurm.GresEntry('gpu', None, 2)),
+                          slurm.parse_gres('gpu:tesla870,gpu:2'))
+        self.assertEquals((slurm.GresEntry('gpu', 'v100', 4), slurm.GresEntry('mic', None, 1)),
+                          slurm.parse_gres('gpu:v100:4(S:0-1),mic'))
+
+    @mock.patch('slurm.shell.execute_command_stream')
+    def test_get_node_information(self, mock_shell):
+        """
+        It verifies the correct work of the function get_nodes_testbed
+        """
+        command = "scontrol"
+        params = ["-o", "--all", "show", "node"]
+
+        # It checks first if it is type SLURM
+        testbed = Testbed('x', 'false', 'xxx', 'protocol', 'xxx')
+
+        nodes = slurm.get_node_information(testbed)
+        self.assertEquals(0, len(nodes))
+
+        # We create a testbed with local access
+        testbed = Testbed('x', 'false', Testbed.slurm_category, Testbed.protocol_local, 'xxx')
+        mock_shell.return_value = self.command_scontrol_output
+        nodes_info = slurm.get_node_information(testbed)
+
+        self.assertEquals(3, len(nodes_info))
+        self.assertEquals("nd80", nodes_info[0].name)
+        self.assertEquals("x86_64", nodes_info[0].fields['Arch'])
+        self.assertEquals("18", nodes_info[0].fields['CoresPerSocket'])
+        self.assertEquals(6850663, nodes_info[0].real_memory)
+        self.assertEquals("1", nodes_info[0].fields['ThreadsPerCore'])
+        self.assertEquals("16", nodes_info[0].fields['Sockets'])
+        self.assertEquals("nd23", nodes_info[1].name)
+        self.assertEquals((slurm.GresEntry('gpu', 'tesla2075', 2), slurm.GresEntry('bandwidth', 'lustre', 4 * 1024 ** 3)),
+                          nodes_info[1].gres)
+        self.assertEquals("nd22", nodes_info[2].name)
+        mock_shell.assert_called_with(command=command, params=params)
+
+        # We create a testbe with ssh access
+        testbed = Testbed('x', 'false', Testbed.slurm_category, Testbed.protocol_ssh , "user@ssh.com")
+        mock_shell.return_value = self.command_scontrol_output
+        nodes_info = slurm.get_node_information(testbed)
+
+        self.assertEquals(3, len(nodes_info))
+        self.assertEquals("nd80", nodes_info[0].name)
+        self.assertEquals("x86_64", nodes_info[0].fields['Arch'])
+        self.assertEquals("18", nodes_info[0].fields['CoresPerSocket'])
+        self.assertEquals(6850663, nodes_info[0].real_memory)
+        self.assertEquals("1", nodes_info[0].fields['ThreadsPerCore'])
+        self.assertEquals("16", nodes_info[0].fields['Sockets'])
+        self.assertEquals("nd23", nodes_info[1].name)
+        self.assertEquals((slurm.GresEntry('gpu', 'tesla2075', 2), slurm.GresEntry('bandwidth', 'lustre', 4 * 1024 ** 3)),
+                          nodes_info[1].gres)
+        self.assertEquals("nd22", nodes_info[2].name)
+        mock_shell.assert_called_with(command=command, server="user@ssh.com", params=params)
+
+        # Testbed with unknown protocol should return empty String
+        # We create a testbe with ssh access
+        testbed = Testbed('x', True, Testbed.slurm_category, "xxx" , "user@ssh.com")
+        nodes = slurm.get_node_information(testbed)
+
+        self.assertEquals(0,len(nodes))
+
+    @mock.patch('shell.execute_command_stream')
+    def test_update_node_information(self, mock_shell):
+        """
+        Test that the correct work of this function
+        """
+        l = LogCapture() # we cature the logger
+        command = "scontrol"
+        params = ["-o", "--all", "show", "node"]
+
+        # We store some data in the db for the test.
+        # We add two testbeds to the db
+        testbed = Testbed("name1",
+                            True,
+                            Testbed.slurm_category,
+                            Testbed.protocol_ssh,
+                            "user@server",
+                            ['slurm'])
+
+        # We add some nodes to Testbed_1
+        node_1 = Node()
+        node_1.name = "nd80"
+        node_1.information_retrieved = True
+        node_2 = Node()
+        node_2.name = "nd23"
+        node_2.information_retrieved = True
+        testbed.nodes = [ node_1,  node_2]
+        node_1.disabled = True
+
+        db.session.add(testbed)
+        db.session.commit()
+
+        # We mock the command call
+        mock_shell.return_value = self.command_scontrol_output
+
+        slurm.update_node_information()
+
+        # We verify the results
+        node_80 = db.session.query(Node).filter_by(name='nd80').first()
+        node_23 = db.session.query(Node).filter_by(name='nd23').first()
+        self.assertEquals('ALLOCATED', node_80.state)
+        self.assertEquals(1, len(node_80.memories))
+        self.assertEquals(Memory.MEGABYTE, node_80.memories[0].units)
+        self.assertEquals(6850663, node_80.memories[0].size)
+        self.assertEquals(0,len(node_80.gpus))
+
+        self.assertEquals('MAINT', node_23.state)
+        self.assertEquals(1, len(node_23.memories))
+        self.assertEquals(Memory.MEGABYTE, node_23.memories[0].units)
+        self.assertEquals(24018, node_23.memories[0].size)
+        self.assertEquals(2,len(node_23.gpus))
+        self.assertEquals('Nvidia', node_23.gpus[0].vendor_id)
+        self.assertEquals('Nvidia TESLA C2075', node_23.gpus[0].model_name)
+        self.assertEquals('Nvidia', node_23.gpus[1].vendor_id)
+        self.assertEquals('Nvidia TESLA C2075', node_23.gpus[1].model_name)
+
+        mock_shell.assert_called_with(command=command, server="user@server", params=params)
+        self.assertEquals(1, mock_shell.call_count)
+
+        # Checking that we are logging the correct messages
+        l.check(
+            ('root', 'INFO', 'Updating information for node: nd80'),
+            ('root', 'INFO', 'Updating memory information for node: nd80'),
+            ('root', 'INFO', 'Updating information for node: nd23'),
+            ('root', 'INFO', 'Updating memory information for node: nd23'),
+            ('root', 'INFO', 'Updating gpu information for node: nd23'),
+            ('root', 'INFO', 'Node information of testbed: name1 updated, 6 rows changed')
+            )
+        l.clear()
+
+        # If nothing changes nothing is written
+        memory_id = node_23.memories[0].id
+        gpu_ids = [ gpu.id for gpu in node_23.gpus ]
+        command_cache.results.clear()
+        db.session.expire_all()
+
+        statements = []
+        listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)
+        sqlalchemy.event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            self.assertEquals({ 'name1': 0 }, slurm.update_node_information())
+        finally:
+            sqlalchemy.event.remove(db.engine, 'before_cursor_execute', listener)
+
+        # The memories and GPUs of the nodes whose digest did not change are not read
+        self.assertEquals([], [ statement for statement in statements if 'memories' in statement or 'gpus' in statement ])
+        self.assertEquals('2016-09-14T08:38:02', node_23.boot_time)
+
+        self.assertEquals(memory_id, node_23.memories[0].id)
+        self.assertEquals(gpu_ids, [ gpu.id for gpu in node_23.gpus ])
+        self.assertEquals(1, len(db.session.query(Memory).filter_by(node_id=node_23.id).all()))
+        l.check(('root', 'INFO', 'Node information of testbed: name1 updated, 0 rows changed'))
+
+        # Only the differences are written
+        mock_shell.return_value = self.command_scontrol_output.replace(b'State=MAINT', b'State=IDLE').replace(b'RealMemory=24018', b'RealMemory=48036', 1)
+        command_cache.results.clear()
+        l.clear()
+
+        self.assertEquals({ 'name1': 3 }, slurm.update_node_information())
+
+        self.assertEquals('IDLE', node_23.state)
+        self.assertEquals(48036, node_23.memories[0].size)
+        self.assertEquals(1, len(db.session.query(Memory).filter_by(node_id=node_23.id).all()))
+        self.assertEquals(gpu_ids, [ gpu.id for gpu in node_23.gpus ])
+        l.check(
+            ('root', 'INFO', 'Updating information for node: nd23'),
+            ('root', 'INFO', 'Updating memory information for node: nd23'),
+            ('root', 'INFO', 'Node information of testbed: name1 updated, 3 rows changed')
+            )
+        l.uninstall() # We uninstall the capture of the logger
+
+    def test_parse_gre_field_info(self):
+        """
+        Checks this function works correctly
+        """
+
+        # We overwrite first the url of the inventory file db
+        inventory.GPU_FILE = "gpu_cards_list.json"
+
+        # Test starts here
+        gre_text_example='gpu:tesla2075:2,bandwidth:lustre:no_consume:4G'
+        resources = slurm.parse_gre_field_info(gre_text_example)
+
+        self.assertEquals(2, len(resources['gpu']))
+        self.assertEquals('Nvidia', resources['gpu'][0].vendor_id)
+        self.assertEquals('Nvidia TESLA C2075', resources['gpu'][0].model_name)
+        self.assertEquals('Nvidia', resources['gpu'][1].vendor_id)
+        self.assertEquals('Nvidia TESLA C2075', resources['gpu'][1].model_name)
+
+        gre_text_example='cpu:xxx1:1,gpu:tesla870,gpu:tesla2075:2,bandwidth:lustre:no_consume:4G'
+        resources = slurm.parse_gre_field_info(gre_text_example)
+
+        self.assertEquals(3, len(resources['gpu']))
+        self.assertEquals('Nvidia', resources['gpu'][0].vendor_id)
+        self.assertEquals('Nvidia TESLA C870', resources['gpu'][0].model_name)
+        self.assertEquals('Nvidia', resources['gpu'][1].vendor_id)
+        self.assertEquals('Nvidia TESLA C2075', resources['gpu'][1].model_name)
+        self.assertEquals('Nvidia', resources['gpu'][2].vendor_id)
+        self.assertEquals('Nvidia TESLA C2075', resources['gpu'][2].model_name)
+
+        gre_text_example='gpu:teslak20:2'
+        resources = slurm.parse_gre_field_info(gre_text_example)
+        self.assertEquals('Nvidia', resources['gpu'][0].vendor_id)
+        self.assertEquals('K20 GPU Accelerator', resources['gpu'][0].model_name)
+        self.assertEquals('Nvidia', resources['gpu'][1].vendor_id)
+        self.assertEquals('K20 GPU Accelerator', resources['gpu'][1].model_name)
+
+    @mock.patch("shell.execute_command")
+    def test_execute_srun(self, mock_shell):
+        """
+        Verifyies the correct work of the function "execute_srun"
+        """
+
+        # We define the different entities necessaryb for the test.
+        testbed = Testbed(name="nova2",
+                            on_line=True,
+                            category="SLURM",
+                            protocol="SSH",
+                            endpoint="user@testbed.com",
+                            package_formats= ['sbatch', 'SINGULARITY'],
+                            extra_config= {
+                                "enqueue_compss_sc_cfg": "nova.cfg" ,
+                                "enqueue_env_file": "/home_nfs/home_ejarquej/installations/rc1707/COMPSs/compssenv"
+                                })
+        application = Application(name="super_app")
+
+        executable = Executable()
+        executable.source_code_file = 'test.zip'
+        executable.compilation_script = 'gcc -X'
+        executable.compilation_type = "SINGULARITY:SRUN"
+        executable.singularity_app_folder="/singularity/app/folder"
+        executable.singularity_image_file="pepito.img"
+        executable.status = "COMPILED"
+        executable.application = application
+
+        deployment = Deployment()
+        deployment.testbed_id = testbed.id
+        deployment.executable_id = executable.id
+        deployment.path="/pepito/pepito.img"
+        
+        execution_config = ExecutionConfiguration()
+        execution_config.execution_type ="SINGULARITY:SRUN"
+        execution_config.application = application
+        execution_config.testbed = testbed
+        execution_config.executable = executable 
+        execution_config.num_nodes = 2
+        #execution_config.num_gpus_per_node = 2
+        execution_config.num_cpus_per_node = 16
+        execution_config.exec_time = 10 
+        execution_config.command = "/apps/application/master/Matmul 2 1024 12.34 /home_nfs/home_ejarquej/demo_test/cpu_gpu_run_data"
+        execution_config.compss_config = "--worker_in_master_cpus=12 --worker_in_master_memory=24000 --worker_working_dir=/home_nfs/home_ejarquej --lang=c --monitoring=1000 -d"
+
+        output = b'             JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)\n              4610       all singular  garciad  R       0:01      2 ns[55-56]\n'
+
+        mock_shell.return_value = output
+
+		# TEST starts here:
+        output_srun = slurm.execute_srun(testbed, execution_config, executable, deployment, True)
+
+        call_1 = call('(', "user@testbed.com",
+                            [
+                                "srun",
+                                "-N",
+                                "2",
+								"-n",
+								"16",
+								"singularity",
+								"run",
+								"/pepito/pepito.img",
+								">",
+								"allout.txt",
+								"2>&1",
+								"&",
+								")",
+								";",
+								"sleep",
+								"1;",
+								"squeue"
+							])
+
+        # adding a new type of execution
+        execution_config = ExecutionConfiguration()
+        execution_config.execution_type ="SINGULARITY:SRUN"
+        execution_config.application = application
+        execution_config.testbed = testbed
+        execution_config.executable = executable 
+        execution_config.num_gpus_per_node = 2
+        execution_config.num_cpus_per_node = 16
+        execution_config.exec_time = 10 
+        execution_config.command = "/apps/application/master/Matmul 2 1024 12.34 /home_nfs/home_ejarquej/demo_test/cpu_gpu_run_data"
+        execution_config.compss_config = "--worker_in_master_cpus=12 --worker_in_master_memory=24000 --worker_working_dir=/home_nfs/home_ejarquej --lang=c --monitoring=1000 -d"
+
+        self.assertEquals(output, output_srun)
+
+
+        output_srun = slurm.execute_srun(testbed, execution_config, executable, deployment, True)
+
+        call_2 = call('(', "user@testbed.com",
+                            [
+									  	"srun",
+									  	"--gres=gpu:2",
+									  	"-n",
+									  	"16",
+									  	"singularity",
+									  	"run",
+									  	"/pepito/pepito.img",
+									  	">",
+										"allout.txt",
+										"2>&1",
+									  	"&",
+									  	")",
+									  	";",
+									  	"sleep",
+									  	"1;",
+									  	"squeue"
+									   ])
+        calls = [ call_1, call_2]
+        mock_shell.assert_has_calls(calls)
+
+        self.assertEquals(output, output_srun)
+
+    @mock.patch("shell.execute_command")
+    def test_execute_srun(self, mock_shell):
+        """ 
+        It stops a command with scontrol
+        """
+
+        ## First case endpoint null
+        slurm.stop_execution(333, None)
+
+        mock_shell.assert_called_with(command="scontrol", params=["suspend", "333"])
+
+        ## Secon case endpoint not null
+        slurm.stop_execution(333, "endpoint")
+
         mock_shell.assert_called_with(command="scontrol", server="endpoint", params=["suspend", "333"])
\ No newline at end of file
@@ -0,0 +1,198 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE snapshot module
+#
+
+import command_cache
+import json
+import shell
+import simulator
+import snapshot
+import unittest.mock as mock
+from sqlalchemy_mapping_tests.mapping_tests import MappingTest
+from models import db, Testbed, Node, CPU
+from testfixtures import LogCapture
+
+class SnapshotTests(MappingTest):
+    """
+    Unittests of the snapshots of the testbeds, taken from a simulated
+    cluster
+    """
+
+    def setUp(self):
+        """
+        It creates the memory db and registers a simulated cluster
+        """
+
+        db.create_all()
+        command_cache.results.clear()
+        snapshot.clear()
+
+        self.cluster = simulator.SimulatedCluster({ 'nodes': 4,
+                                                    'partitions': [ 'bullx', 'gpus' ],
+                                                    'gpus_per_node': 2,
+                                                    'arrival_rate': 0,
+                                                    'seed': 1 },
+                                                  lambda: 1000.0)
+        shell.register_backend('sim@cluster', self.cluster)
+
+        self.testbed = Testbed('sim', True, Testbed.slurm_category, Testbed.protocol_simulated, 'sim@cluster')
+        db.session.add(self.testbed)
+        db.session.commit()
+
+    def tearDown(self):
+        """
+        It unregisters the simulated cluster
+        """
+
+        shell.unregister_backend('sim@cluster')
+        snapshot.clear()
+
+    def test_update_snapshots(self):
+        """
+        It verifies one cycle takes the snapshot of the testbed and the
+        consumers update the nodes, their information and their CPUs
+        """
+
+        snapshots = snapshot.update_snapshots()
+
+        self.assertEquals(1, len(snapshots))
+        self.assertEquals(4, len(snapshots[0].partitions))
+        self.assertEquals(4, len(snapshots[0].nodes))
+        self.assertEquals({}, dict(snapshots[0].cpuinfo))
+
+        nodes = db.session.query(Node).order_by(Node.name).all()
+        self.assertEquals([ 'nd1', 'nd2', 'nd3', 'nd4' ], [ node.name for node in nodes ])
+        self.assertEquals('IDLE', nodes[0].state)
+        self.assertEquals(64000, nodes[0].memories[0].size)
+        self.assertEquals(2, len(nodes[0].gpus))
+        self.assertEquals(0, db.session.query(CPU).count())
+
+        # The nodes are known now, their cpuinfo is probed in the next cycle
+        command_cache.results.clear()
+        snapshots = snapshot.update_snapshots()
+
+        self.assertEquals([ 'nd1', 'nd2', 'nd3', 'nd4' ], sorted(snapshots[0].cpuinfo))
+        self.assertEquals(16, len(nodes[0].cpus))
+        self.assertEquals(nodes[0].boot_time, nodes[0].cpuinfo_boot_time)
+
+        # The nodes did not reboot, they are not probed again
+        command_cache.results.clear()
+        cpu_ids = [ cpu.id for cpu in nodes[0].cpus ]
+        snapshots = snapshot.update_snapshots()
+
+        self.assertEquals({}, dict(snapshots[0].cpuinfo))
+        self.assertEquals(cpu_ids, [ cpu.id for cpu in nodes[0].cpus ])
+
+        # A node that is not returned by sinfo anymore is disabled
+        command_cache.results.clear()
+        del self.cluster.nodes['nd4']
+        snapshot.update_snapshots()
+
+        self.assertTrue(nodes[3].disabled)
+        self.assertEquals(3, snapshot.summary(snapshot.latest('sim'))['nodes'])
+
+    def test_update_snapshots_partial(self):
+        """
+        It verifies that if a command fails the consumers use the rest of
+        the snapshot and an error in a consumer does not stop the others
+        """
+
+        l = LogCapture() # we cature the logger
+
+        def timeout(testbed, fields=None):
+            raise shell.CommandTimeout('scontrol', 60, testbed.endpoint)
+
+        consumer = mock.MagicMock(side_effect=ValueError('broken consumer'))
+        snapshot.consumers.insert(1, consumer)
+
+        try:
+            with mock.patch('slurm.get_node_information', side_effect=timeout):
+                snapshots = snapshot.update_snapshots()
+        finally:
+            snapshot.consumers.remove(consumer)
+
+        self.assertIsNone(snapshots[0].nodes)
+        self.assertFalse(snapshot.summary(snapshots[0])['complete'])
+        consumer.assert_called_once_with(snapshots[0])
+
+        nodes = db.session.query(Node).order_by(Node.name).all()
+        self.assertEquals(4, len(nodes))
+        self.assertIsNone(nodes[0].state)
+
+        self.assertIn(('root', 'ERROR', 'Impossible to get the scontrol of testbed: sim'),
+                      [ (record.name, record.levelname, record.getMessage()) for record in l.records ])
+        self.assertIn(('root', 'ERROR', 'Error processing the snapshot of testbed: sim'),
+                      [ (record.name, record.levelname, record.getMessage()) for record in l.records ])
+        l.uninstall()
+
+    def test_snapshot_is_immutable(self):
+        """
+        It verifies the snapshot can not be changed by its readers
+        """
+
+        taken = snapshot.update_snapshots()[0]
+
+        self.assertRaises(AttributeError, setattr, taken, 'nodes', ())
+        self.assertRaises(AttributeError, setattr, taken.nodes[0], 'state', 'DOWN')
+        self.assertIsInstance(taken.nodes, tuple)
+
+        with self.assertRaises(TypeError):
+            taken.cpuinfo['nd1'] = b''
+
+    def test_http_api(self):
+        """
+        It verifies the latest snapshots are served without reading
+        the db
+        """
+
+        snapshot.update_snapshots()
+        client = self.app.test_client()
+        self.app.register_blueprint(snapshot.snapshot_blueprint, url_prefix='/api/v1/snapshots')
+
+        with mock.patch.object(db.session, 'query', side_effect=AssertionError('db used')):
+            response = client.get('/api/v1/snapshots')
+            summaries = json.loads(response.data.decode('utf-8'))
+
+            self.assertEquals(200, response.status_code)
+            self.assertEquals(1, len(summaries))
+            self.assertEquals('sim', summaries[0]['testbed'])
+            self.assertEquals(4, summaries[0]['nodes'])
+            self.assertEquals({ 'IDLE': 4 }, summaries[0]['states'])
+            self.assertEquals(8, summaries[0]['gpus'])
+            self.assertEquals([ 'bullx', 'gpus' ], summaries[0]['partitions'])
+
+            response = client.get('/api/v1/snapshots/sim')
+            document = json.loads(response.data.decode('utf-8'))
+
+            self.assertEquals(200, response.status_code)
+            self.assertEquals('sim@cluster', document['testbed']['endpoint'])
+            self.assertEquals('nd1', document['nodes'][0]['name'])
+            self.assertEquals('gpu', document['nodes'][0]['gres'][0]['name'])
+            self.assertEquals({}, document['cpuinfo'])
+
+            response = client.get('/api/v1/snapshots/other')
+
+            self.assertEquals(404, response.status_code)
+
+        # The testbeds that are not on-line anymore are removed
+        self.testbed.on_line = False
+        db.session.commit()
+        snapshot.update_snapshots()
+
+        self.assertIsNone(snapshot.latest('sim'))
@@ -0,0 +1,138 @@
+#
+# Copyright 2018 Atos Research and Innovation
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+# https://www.gnu.org/licenses/agpl-3.0.txt
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+# This is being developed for the TANGO Project: http://tango-project.eu
+#
+# Unit tests that checks ALDE transfer module
+#
+
+import hashlib
+import os
+import shutil
+import tempfile
+import transfer
+import unittest
+import unittest.mock as mock
+
+class TransferTests(unittest.TestCase):
+    """
+    Unittests for the functions of the transfer file, the files are
+    transferred between local folders using small chunks
+    """
+
+    def setUp(self):
+        """ It creates the test file of 3 chunks, the last one incomplete """
+
+        self.folder = tempfile.mkdtemp()
+        self.patcher = mock.patch.multiple(transfer, BLOCK_SIZE=1024, CHUNK_BLOCKS=4)
+        self.patcher.start()
+
+        self.data = os.urandom(10000)
+        self.local_file = os.path.join(self.folder, 'image.img')
+
+        with open(self.local_file, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        """ It removes the test files """
+
+        self.patcher.stop()
+        shutil.rmtree(self.folder)
+
+    def _read(self, filename):
+        """ It returns the content of a file """
+
+        with open(filename, 'rb') as f:
+            return f.read()
+
+    def test_file_checksums(self):
+        """
+        It verifies the checksums of the file and of each chunk
+        """
+
+        checksum, chunks = transfer.file_checksums(self.local_file)
+
+        self.assertEquals(hashlib.sha256(self.data).hexdigest(), checksum)
+        self.assertEquals([ hashlib.sha256(self.data[0:4096]).hexdigest(),
+                            hashlib.sha256(self.data[4096:8192]).hexdigest(),
+                            hashlib.sha256(self.data[8192:]).hexdigest() ], chunks)
+        self.assertEquals(checksum, transfer.file_checksum(self.local_file))
+
+    def test_upload_file(self):
+        """
+        It verifies that a file is uploaded, that it is not uploaded
+        again if it is identical and that an interrupted upload only
+        sends the missing chunks
+        """
+
+        remote_file = os.path.join(self.folder, 'remote', 'image.img')
+
+        result = transfer.upload_file(self.local_file, '', remote_file)
+
+        self.assertFalse(result.skipped)
+        self.assertEquals(10000, result.transferred)
+        self.assertEquals(self.data, self._read(remote_file))
+        self.assertFalse(os.path.exists(remote_file + '.part'))
+
+        result = transfer.upload_file(self.local_file, '', remote_file)
+
+        self.assertTrue(result.skipped)
+        self.assertEquals(0, result.transferred)
+
+        # The second chunk of the previous upload was corrupted
+        os.remove(remote_file)
+        with open(remote_file + '.part', 'wb') as f:
+            f.write(self.data[0:4096] + b'x' * 4096 + self.data[8192:9000])
+
+        result = transfer.upload_file(self.local_file, '', remote_file)
+
+        self.assertFalse(result.skipped)
+        self.assertEquals(4096 + 1808, result.transferred)
+        self.assertEquals(self.data, self._read(remote_file))
+
+    def test_download_file(self):
+        """
+        It verifies that a file is downloaded and that an interrupted
+        download only receives the missing chunks
+        """
+
+        local_file = os.path.join(self.folder, 'downloaded.img')
+
+        with open(local_file + '.part', 'wb') as f:
+            f.write(self.data[0:4096] + b'x' * 3000)
+
+        result = transfer.download_file(local_file, '', self.local_file)
+
+        self.assertFalse(result.skipped)
+        self.assertEquals(10000 - 4096, result.transferred)
+        self.assertEquals(self.data, self._read(local_file))
+        self.assertFalse(os.path.exists(local_file + '.part'))
+
+        result = transfer.download_file(local_file, '', self.local_file)
+        self.assertTrue(result.skipped)
+
+    def test_upload_image(self):
+        """
+        It verifies that the images are stored in a folder named after
+        its checksum
+        """
+
+        with mock.patch.object(transfer, 'REMOTE_IMAGES_FOLDER', os.path.join(self.folder, 'images')):
+            path = transfer.upload_image(self.local_file, '')
+
+            checksum = hashlib.sha256(self.data).hexdigest()
+            self.assertEquals(os.path.join(self.folder, 'images', checksum, 'image.img'), path)
+            self.assertEquals(self.data, self._read(path))
+            self.assertEquals(checksum + '\n', self._read(path + '.sha256').decode('utf-8'))